@@ -0,0 +1,133 @@
+import argparse
+import logging
+import random
+import statistics
+import time
+from collections import Counter
+
+from sqlglot import exp, parse_one
+
+from ScaleSQL.utils import read_json, setup_logging
+from ScaleSQL.utils.auto_index import count_filter_columns
+from ScaleSQL.utils.utils import get_cursor_from_path
+
+setup_logging()
+
+
+def load_candidate_sql(sql_file, sample_size, seed):
+    """
+    Load candidate SQL from a JSON list of strings or of dicts with a "SQL"/"sql" key.
+    """
+    data = read_json(sql_file)
+    sql_list = []
+    for item in data:
+        if isinstance(item, str):
+            sql_list.append(item)
+        elif isinstance(item, dict):
+            sql = item.get("SQL") or item.get("sql")
+            if sql:
+                sql_list.append(sql)
+    if sample_size and sample_size < len(sql_list):
+        sql_list = random.Random(seed).sample(sql_list, sample_size)
+    return sql_list
+
+
+def has_unordered_limit(sql, dialect="sqlite"):
+    """
+    Whether any SELECT of `sql` has a LIMIT without an ORDER BY. Such queries may legitimately
+    return different rows once indexes change the plan, so their results are not compared.
+    """
+    try:
+        tree = parse_one(sql, read=dialect)
+    except Exception:
+        return False
+    if tree is None:
+        return False
+    return any(
+        select.args.get("limit") is not None and select.args.get("order") is None
+        for select in tree.find_all(exp.Select)
+    )
+
+
+def timed_execute(cursor, sql, timeout_sec):
+    """
+    Execute `sql` and return (elapsed seconds, rows or None on error/timeout).
+    """
+    deadline = time.perf_counter() + timeout_sec
+    cursor.connection.set_progress_handler(lambda: int(time.perf_counter() > deadline), 10000)
+    start = time.perf_counter()
+    try:
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+    except Exception:
+        rows = None
+    finally:
+        cursor.connection.set_progress_handler(None, 0)
+    return time.perf_counter() - start, rows
+
+
+def run_benchmark(db_path, sql_list, tables_json_path=None, repeat=3, timeout_sec=30.0, top_filter_columns=20):
+    filter_columns = tuple(
+        name for name, _ in count_filter_columns(sql_list).most_common(top_filter_columns)
+    )
+    plain_cursor = get_cursor_from_path(db_path)
+    indexed_cursor = get_cursor_from_path(
+        db_path, auto_index=True, tables_json_path=tables_json_path, filter_columns=filter_columns
+    )
+
+    plain_times, indexed_times, mismatches, unordered_limits = [], [], [], []
+    for i, sql in enumerate(sql_list):
+        plain_best, indexed_best = float("inf"), float("inf")
+        plain_rows = indexed_rows = None
+        for _ in range(repeat):
+            elapsed, plain_rows = timed_execute(plain_cursor, sql, timeout_sec)
+            plain_best = min(plain_best, elapsed)
+            elapsed, indexed_rows = timed_execute(indexed_cursor, sql, timeout_sec)
+            indexed_best = min(indexed_best, elapsed)
+        plain_times.append(plain_best)
+        indexed_times.append(indexed_best)
+        if plain_rows is None or indexed_rows is None:
+            continue
+        if has_unordered_limit(sql):
+            # LIMIT without ORDER BY: the plan decides which rows are kept, so only report differences
+            if Counter(plain_rows) != Counter(indexed_rows):
+                unordered_limits.append(i)
+            continue
+        # rows are compared as multisets: without ORDER BY SQLite may return them in another order
+        if Counter(plain_rows) != Counter(indexed_rows):
+            mismatches.append(i)
+
+    return {
+        "num_sql": len(sql_list),
+        "filter_columns": list(filter_columns),
+        "plain_total_sec": sum(plain_times),
+        "indexed_total_sec": sum(indexed_times),
+        "plain_median_ms": statistics.median(plain_times) * 1000 if plain_times else 0.0,
+        "indexed_median_ms": statistics.median(indexed_times) * 1000 if indexed_times else 0.0,
+        "speedup": sum(plain_times) / max(sum(indexed_times), 1e-9),
+        "result_mismatches": mismatches,
+        "unordered_limit_differences": unordered_limits,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db_path", required=True, type=str, help="SQLite 数据库文件路径")
+    parser.add_argument("--sql_file", required=True, type=str, help="候选 SQL 的 JSON 文件")
+    parser.add_argument("--tables_json_path", type=str, default=None, help="tables.json 路径")
+    parser.add_argument("--sample_size", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sql_list = load_candidate_sql(args.sql_file, args.sample_size, args.seed)
+    report = run_benchmark(
+        db_path=args.db_path,
+        sql_list=sql_list,
+        tables_json_path=args.tables_json_path,
+        repeat=args.repeat,
+        timeout_sec=args.timeout,
+    )
+    for key, value in report.items():
+        logging.info(f"{key}: {value}")
@@ -0,0 +1,99 @@
+import argparse
+import logging
+import random
+import statistics
+import time
+
+import pandas as pd
+
+from ScaleSQL.utils import setup_logging
+from ScaleSQL.utils.markdown import markdown_table
+
+setup_logging()
+
+
+def synthetic_schema_tables(num_tables, seed=42):
+    """Column information tables shaped like those of LightSchema: names, types, descriptions and value lists."""
+    rng = random.Random(seed)
+    types = ["INTEGER", "REAL", "TEXT", "DATE"]
+    tables = []
+    for _ in range(num_tables):
+        data = {"column_name": [], "column_type": [], "column_description": [], "value_examples": []}
+        for column in range(rng.randint(3, 30)):
+            column_type = rng.choice(types)
+            data["column_name"].append(f"column_{column}")
+            data["column_type"].append(column_type)
+            data["column_description"].append(rng.choice(["", f"description of column {column}"]))
+            if column_type == "INTEGER":
+                samples = [rng.randint(0, 10 ** 6) for _ in range(3)]
+            elif column_type == "REAL":
+                samples = [round(rng.uniform(-1000, 1000), rng.randint(0, 4)) for _ in range(3)]
+            else:
+                samples = [f"value {rng.randint(0, 100)}" for _ in range(3)]
+            data["value_examples"].append(samples)
+        tables.append(data)
+    return tables
+
+
+def synthetic_execution_results(num_results, seed=42):
+    """Execution result previews: up to five rows of ints, floats, strings and NULLs per column."""
+    rng = random.Random(seed)
+    generators = [
+        lambda: rng.randint(-10 ** 7, 10 ** 7),
+        lambda: rng.uniform(0, 10 ** 4),
+        lambda: f"name {rng.randint(0, 1000)}",
+        lambda: rng.choice([None, rng.randint(0, 100)]),
+    ]
+    results = []
+    for _ in range(num_results):
+        num_rows = rng.randint(0, 5)
+        results.append({
+            f"col_{column}": [generator() for _ in range(num_rows)]
+            for column, generator in enumerate(rng.choices(generators, k=rng.randint(1, 6)))
+        })
+    return results
+
+
+def time_renderer(render, tables, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in tables:
+            render(data)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) / max(len(tables), 1) * 1e6
+
+
+def run_benchmark(num_tables=2000, num_results=2000, repeat=5, seed=42):
+    """Time markdown_table against DataFrame.to_markdown and check that both render identical tables."""
+    reports = {}
+    workloads = {
+        "light_schema": synthetic_schema_tables(num_tables, seed),
+        "execution_result": synthetic_execution_results(num_results, seed),
+    }
+    for name, tables in workloads.items():
+        mismatches = sum(
+            1 for data in tables if markdown_table(data) != pd.DataFrame(data).to_markdown(index=False)
+        )
+        pandas_us = time_renderer(lambda data: pd.DataFrame(data).to_markdown(index=False), tables, repeat)
+        native_us = time_renderer(markdown_table, tables, repeat)
+        reports[name] = {
+            "tables": len(tables),
+            "mismatches": mismatches,
+            "pandas_us_per_table": round(pandas_us, 1),
+            "markdown_table_us_per_table": round(native_us, 1),
+            "speedup": round(pandas_us / native_us, 2) if native_us else None,
+        }
+        logging.info(f"{name}: {reports[name]}")
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_tables", type=int, default=2000, help="合成的 schema 列信息表数量")
+    parser.add_argument("--num_results", type=int, default=2000, help="合成的执行结果数量")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_benchmark(num_tables=args.num_tables, num_results=args.num_results, repeat=args.repeat, seed=args.seed)
@@ -0,0 +1,219 @@
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import yaml
+
+from ScaleSQL.retrievers.base import RetrieveRequest
+from ScaleSQL.retrievers.exact_knn import l2_top_k
+from ScaleSQL.retrievers.numpy_store import NumpyVectorStore, write_numpy_store
+from ScaleSQL.retrievers.registry import get_chroma_registry
+from ScaleSQL.retrievers.search_plan import (
+    DEFAULT_EXACT_SEARCH_THRESHOLD,
+    choose_hnsw_params,
+    choose_search_plan,
+    hnsw_configuration,
+)
+from ScaleSQL.utils import setup_logging
+
+setup_logging()
+
+
+def load_collection_matrix(collection, page_size=10000):
+    """Read all embeddings of a Chroma collection into a float32 matrix."""
+    embeddings = []
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+        embeddings.extend(page["embeddings"])
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def synthetic_matrix(size, dimension=384, clusters=256, seed=42):
+    """Normalized clustered vectors, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size)] + 0.5 * rng.standard_normal((size, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def sample_queries(matrix, num_queries, noise=0.05, seed=42):
+    """Perturbed copies of stored vectors, so every query has close neighbours like a real literal."""
+    rng = np.random.default_rng(seed)
+    queries = matrix[rng.integers(0, len(matrix), num_queries)]
+    queries = queries + noise * rng.standard_normal(queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def build_hnsw_collection(client, name, matrix, params, batch_size=5000):
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    collection = client.create_collection(name=name, configuration=hnsw_configuration(params))
+    for start in range(0, len(matrix), batch_size):
+        block = matrix[start: start + batch_size]
+        collection.add(ids=[str(i) for i in range(start, start + len(block))], embeddings=block)
+    return collection
+
+
+class PrecomputedNumpyStore(NumpyVectorStore):
+    """NumpyVectorStore whose queries are already embedded; the query text is the row of `query_vectors`."""
+
+    def __init__(self, store_path, index_name, query_vectors):
+        super().__init__(store_path, index_name)
+        self.query_vectors = query_vectors
+
+    def _embed_queries(self, texts):
+        return self.query_vectors[[int(text) for text in texts]]
+
+
+def build_numpy_store(store_path, name, matrix, quantization):
+    """Write `matrix` as the flat store retrieval would search, documents are the row numbers."""
+    write_numpy_store(
+        os.path.join(store_path, name), [str(i) for i in range(len(matrix))], [{}] * len(matrix), matrix, quantization
+    )
+
+
+def recall(truth_indices, truth_distances, found_indices, threshold):
+    """Recall@k, and recall of the exact neighbours closer than `threshold` (what retrieval keeps)."""
+    hits = within = within_hits = 0
+    for truth_row, distance_row, found in zip(truth_indices, truth_distances, found_indices):
+        found = set(found)
+        hits += sum(1 for index in truth_row if index in found)
+        kept = [index for index, distance in zip(truth_row, distance_row) if distance < threshold]
+        within += len(kept)
+        within_hits += sum(1 for index in kept if index in found)
+    total = truth_indices.size
+    return hits / total if total else 1.0, within_hits / within if within else 1.0
+
+
+def benchmark_collection(collection, store, matrix, queries, k, threshold, ef_search_values):
+    report = {"count": len(matrix)}
+    # fp32 neighbours of the unquantized vectors, the ground truth of both backends
+    truth_indices, truth_distances = l2_top_k(queries, matrix, k)
+
+    store.connect()
+    latencies, found = [], []
+    for i in range(len(queries)):
+        # no distance threshold, so recall@k compares full top-k lists as for HNSW
+        request = RetrieveRequest(
+            search_query=str(i), mode="vector", index_name=store.index_name, k=k, threshold=float("inf")
+        )
+        start = time.perf_counter()
+        response = store.search(request)
+        latencies.append(time.perf_counter() - start)
+        found.append([int(doc.content) for doc in response.docs or []])
+    recall_at_k, threshold_recall = recall(truth_indices, truth_distances, found, threshold)
+    report["exact_median_ms"] = statistics.median(latencies) * 1000
+    report[f"exact_recall@{k}"] = round(recall_at_k, 4)
+    report["exact_threshold_recall"] = round(threshold_recall, 4)
+
+    for ef_search in ef_search_values:
+        collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        latencies, found = [], []
+        for query in queries:
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[query], n_results=k, include=[])
+            latencies.append(time.perf_counter() - start)
+            found.append([int(doc_id) for doc_id in result["ids"][0]] if result["ids"] else [])
+        recall_at_k, threshold_recall = recall(truth_indices, truth_distances, found, threshold)
+        report[f"hnsw_ef{ef_search}_median_ms"] = statistics.median(latencies) * 1000
+        report[f"hnsw_ef{ef_search}_recall@{k}"] = round(recall_at_k, 4)
+        report[f"hnsw_ef{ef_search}_threshold_recall"] = round(threshold_recall, 4)
+    return report
+
+
+def run_benchmark(
+        sizes,
+        chroma_path=None,
+        collections=None,
+        num_queries=200,
+        k=5,
+        threshold=0.8,
+        exact_threshold=DEFAULT_EXACT_SEARCH_THRESHOLD,
+        default_ef_search=100,
+        quantization="float16",
+):
+    """Compare exact search with HNSW at Chroma's default and at the planned ef_search for every collection.
+
+    Exact search runs on a NumpyVectorStore written with `quantization`, the store collections below
+    the threshold are exported to; recall of both backends is measured against fp32 neighbours.
+    Existing collections are read from `chroma_path` (their ids need not be integers, so they are
+    copied into a temporary client); otherwise synthetic collections of the given sizes are built
+    with the planned HNSW parameters.
+    """
+    reports = {}
+    work_dir = tempfile.mkdtemp(prefix="search_plan_benchmark_")
+    client = get_chroma_registry().get_client(work_dir)
+    numpy_dir = os.path.join(work_dir, "numpy")
+    sources = []
+    if chroma_path:
+        source_client = get_chroma_registry().get_client(chroma_path)
+        for name in collections or [col.name for col in source_client.list_collections()]:
+            sources.append((name, load_collection_matrix(source_client.get_collection(name))))
+    else:
+        for size in sizes:
+            sources.append((f"synthetic_{size}", synthetic_matrix(size)))
+
+    for name, matrix in sources:
+        if len(matrix) == 0:
+            continue
+        params = choose_hnsw_params(len(matrix))
+        start = time.perf_counter()
+        collection = build_hnsw_collection(client, f"bench_{len(reports)}", matrix, params)
+        build_sec = time.perf_counter() - start
+        queries = sample_queries(matrix, num_queries)
+        store_name = f"bench_{len(reports)}"
+        build_numpy_store(numpy_dir, store_name, matrix, quantization)
+        store = PrecomputedNumpyStore(numpy_dir, store_name, queries)
+        report = benchmark_collection(
+            collection, store, matrix, queries, k, threshold, sorted({default_ef_search, params["ef_search"]})
+        )
+        report["hnsw_build_sec"] = round(build_sec, 2)
+        report["quantization"] = quantization
+        report["plan"] = choose_search_plan(len(matrix), exact_threshold)["backend"]
+        # the plan is right when it picks the faster of exact search and HNSW at the planned ef_search
+        exact_faster = report["exact_median_ms"] <= report[f"hnsw_ef{params['ef_search']}_median_ms"]
+        report["plan_matches_latency"] = (report["plan"] == "numpy") == exact_faster
+        reports[name] = report
+        logging.info(f"{name}: {report}")
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chroma_path", type=str, default=None, help="Chroma 持久化目录，为空时使用合成数据")
+    parser.add_argument("--collections", nargs="*", default=None)
+    parser.add_argument("--sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--num_queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--exact_threshold", type=int, default=DEFAULT_EXACT_SEARCH_THRESHOLD)
+    parser.add_argument("--quantization", type=str, default=None, help="float16 | int8，为空时使用配置中的 vector_store.quantization")
+    parser.add_argument(
+        "--config_path",
+        type=str,
+        default="ScaleSQL/workflows/config/pipeline_config.yaml"
+    )
+    args = parser.parse_args()
+
+    quantization = args.quantization
+    if quantization is None:
+        with open(args.config_path, "r", encoding="utf-8") as f:
+            configs = yaml.safe_load(f)
+        quantization = (configs.get("vector_store") or {}).get("quantization", "float16")
+
+    run_benchmark(
+        sizes=args.sizes,
+        chroma_path=args.chroma_path,
+        collections=args.collections,
+        num_queries=args.num_queries,
+        k=args.k,
+        threshold=args.threshold,
+        exact_threshold=args.exact_threshold,
+        quantization=quantization,
+    )
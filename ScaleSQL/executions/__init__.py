@@ -1,6 +1,17 @@
 from .base import QueryExecutionRequest, QueryExecutionResponse
+from .cost_guard import CostAssessment, CostGuard
+from .sandbox import SandboxedExecutor, SQLiteWorkerPool
+from .validator import SchemaCatalog, SQLValidationResult, SQLValidator, get_schema_catalog
 
 __all__ = [
+    "CostAssessment",
+    "CostGuard",
     "QueryExecutionRequest",
     "QueryExecutionResponse",
+    "SandboxedExecutor",
+    "SchemaCatalog",
+    "SQLiteWorkerPool",
+    "SQLValidationResult",
+    "SQLValidator",
+    "get_schema_catalog",
 ]
@@ -0,0 +1,156 @@
+import logging
+import re
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlglot import exp
+
+from ScaleSQL.executions.validator import parse_sql
+
+_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+_SEARCH_PATTERN = re.compile(r"^SEARCH (?:TABLE )?(\S+)")
+
+# 每个数据库的表行数缓存，key 为连接字符串
+_row_count_cache: Dict[str, Dict[str, int]] = {}
+
+
+class CostAssessment(BaseModel):
+    """EXPLAIN QUERY PLAN based cost assessment of a candidate SQL."""
+
+    action: Literal["run", "skip", "low_priority", "reduced_deadline"] = Field(default="run")
+    estimated_cost: float = Field(default=0.0)
+    reasons: List[str] = Field(default_factory=list)
+    timeout: Optional[float] = Field(default=None)
+
+
+class CostGuard(object):
+    """
+    在执行候选 SQL 前运行 EXPLAIN QUERY PLAN，结合缓存的表行数识别高代价的执行计划：
+    相关子查询中的大表全表扫描、多个大表全表扫描以及嵌套循环中的全表扫描。
+    命中时按 `on_flagged` 决定跳过、放入低优先级队列或使用更短的超时执行。
+    """
+
+    def __init__(
+            self,
+            large_table_rows: int = 100_000,
+            correlated_scan_rows: int = 10_000,
+            max_large_scans: int = 2,
+            max_cost: float = 1e9,
+            on_flagged: Literal["skip", "low_priority", "reduced_deadline"] = "reduced_deadline",
+            reduced_timeout: float = 5.0,
+    ):
+        """
+        Args:
+            large_table_rows: 行数不少于该值的表视为大表。
+            correlated_scan_rows: 相关子查询中全表扫描的表行数阈值。
+            max_large_scans: 允许的大表全表扫描次数上限。
+            max_cost: 估算代价（嵌套扫描行数之积）上限。
+            on_flagged: 命中后的处理方式。
+            reduced_timeout: `reduced_deadline` 时使用的超时时间（秒）。
+        """
+        self.large_table_rows = large_table_rows
+        self.correlated_scan_rows = correlated_scan_rows
+        self.max_large_scans = max_large_scans
+        self.max_cost = max_cost
+        self.on_flagged = on_flagged
+        self.reduced_timeout = reduced_timeout
+
+    @staticmethod
+    def table_row_counts(conn, cache_key: str) -> Dict[str, int]:
+        """
+        获取（并缓存）数据库中每张表的行数，表名小写。
+        """
+        if cache_key not in _row_count_cache:
+            tables = conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+            ).fetchall()
+            row_counts = {}
+            for (table,) in tables:
+                try:
+                    row_counts[table.lower()] = conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+                except Exception as e:
+                    logging.warning(f"Count rows of {table} failed: {e}")
+            _row_count_cache[cache_key] = row_counts
+        return _row_count_cache[cache_key]
+
+    @staticmethod
+    def _alias_map(sql: str) -> Dict[str, str]:
+        tree, _ = parse_sql(sql)
+        alias_map = {}
+        if tree is not None:
+            for table in tree.find_all(exp.Table):
+                alias_map[table.alias_or_name.lower()] = table.name.lower()
+        return alias_map
+
+    def assess(self, conn, sql: str, cache_key: str) -> CostAssessment:
+        """
+        评估一条 SQL 的执行代价。
+
+        Args:
+            conn: SQLAlchemy 连接（SQLite）。
+            sql: 候选 SQL。
+            cache_key: 行数缓存使用的数据库标识，一般为连接字符串。
+
+        Returns:
+            CostAssessment: 评估结果，EXPLAIN 失败时返回 `run`，由执行阶段报告错误。
+        """
+        try:
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        except Exception:
+            return CostAssessment()
+
+        row_counts = self.table_row_counts(conn, cache_key)
+        alias_map = self._alias_map(sql)
+        nodes = {row[0]: (row[1], row[3]) for row in plan}
+
+        def scanned_rows(detail: str) -> int:
+            match = _SCAN_PATTERN.match(detail)
+            if not match:
+                return 0
+            name = match.group(1).lower()
+            return row_counts.get(alias_map.get(name, name), 0)
+
+        def in_correlated_subquery(node_id: int) -> bool:
+            parent = nodes[node_id][0]
+            while parent in nodes:
+                if nodes[parent][1].startswith("CORRELATED"):
+                    return True
+                parent = nodes[parent][0]
+            return False
+
+        reasons = []
+        large_scans = 0
+        # 同一父节点下的 SCAN/SEARCH 依次构成嵌套循环，代价按扫描行数相乘估算
+        loop_costs: Dict[int, float] = {}
+        for node_id, (parent, detail) in nodes.items():
+            rows = scanned_rows(detail)
+            if rows:
+                loop_costs[parent] = loop_costs.get(parent, 1.0) * rows
+                if rows >= self.large_table_rows:
+                    large_scans += 1
+                if in_correlated_subquery(node_id) and rows >= self.correlated_scan_rows:
+                    reasons.append(f"full scan of {rows} rows inside correlated subquery: {detail}")
+            elif _SEARCH_PATTERN.match(detail):
+                loop_costs.setdefault(parent, 1.0)
+
+        # 相关子查询按外层驱动表的行数重复执行
+        estimated_cost = 0.0
+        for node_id, cost in loop_costs.items():
+            if node_id in nodes and nodes[node_id][1].startswith("CORRELATED"):
+                cost *= max(loop_costs.get(nodes[node_id][0], 1.0), 1.0)
+            estimated_cost += cost
+
+        if large_scans >= self.max_large_scans:
+            reasons.append(f"{large_scans} full scans of tables with >= {self.large_table_rows} rows")
+        if estimated_cost >= self.max_cost:
+            reasons.append(f"estimated cost {estimated_cost:.3g} exceeds {self.max_cost:.3g}")
+
+        if not reasons:
+            return CostAssessment(estimated_cost=estimated_cost)
+        return CostAssessment(
+            action=self.on_flagged,
+            estimated_cost=estimated_cost,
+            reasons=reasons,
+            timeout=self.reduced_timeout if self.on_flagged == "reduced_deadline" else None,
+        )
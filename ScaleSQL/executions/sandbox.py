@@ -0,0 +1,245 @@
+import logging
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ScaleSQL.exceptions import ExecutionServiceException
+from ScaleSQL.executions.base import (
+    BaseDatabaseExecutor,
+    QueryExecutionRequest,
+    QueryExecutionResponse,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _load_memory_copy(db_path: str) -> sqlite3.Connection:
+    disk_conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    memory_conn = sqlite3.connect(":memory:")
+    disk_conn.backup(memory_conn)
+    disk_conn.close()
+    return memory_conn
+
+
+def _worker_main(channel, memory_limit_mb: Optional[int], preload: List[str]) -> None:
+    """
+    执行进程主循环：持有各数据库的内存副本连接，逐条执行父进程发来的查询。
+    """
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    connections: Dict[str, sqlite3.Connection] = {}
+    for db_path in preload:
+        try:
+            connections[db_path] = _load_memory_copy(db_path)
+        except Exception as e:
+            logging.warning(f"[Sandbox PID: {os.getpid()}] Preload {db_path} failed: {e}")
+
+    while True:
+        try:
+            message = channel.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        db_path, sql = message
+        try:
+            if db_path not in connections:
+                connections[db_path] = _load_memory_copy(db_path)
+            cursor = connections[db_path].execute(sql)
+            columns = [description[0] for description in cursor.description or []]
+            results = defaultdict(list)
+            for row in cursor.fetchall():
+                for key, value in zip(columns, row):
+                    results[key].append(value)
+            channel.send(("ok", dict(results)))
+        except MemoryError:
+            channel.send(("error", "Query exceeded the worker memory limit."))
+        except Exception as e:
+            channel.send(("error", str(e)))
+
+
+class _Worker(object):
+    def __init__(self, process, channel):
+        self.process = process
+        self.channel = channel
+
+    def rss_mb(self) -> float:
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+        except (OSError, IndexError, ValueError):
+            return 0.0
+
+
+class SQLiteWorkerPool(object):
+    """
+    预先启动的 SQLite 执行进程池。
+
+    每个进程持有自己的数据库内存副本；查询超过期限或内存上限时父进程直接杀掉该进程并重新拉起，
+    超时的查询不会继续在后台占用 CPU。
+    """
+
+    def __init__(
+            self,
+            num_workers: int = 4,
+            memory_limit_mb: Optional[int] = None,
+            preload: Optional[List[str]] = None,
+            start_method: str = "spawn",
+            poll_interval: float = 0.05,
+    ):
+        """
+        Args:
+            num_workers: 执行进程数量。
+            memory_limit_mb: 单个执行进程的内存上限（MB），None 表示不限制。
+            preload: 进程启动时即加载到内存的数据库文件路径。
+            start_method: multiprocessing 启动方式。
+            poll_interval: 等待结果时检查期限与内存的间隔（秒）。
+        """
+        self.num_workers = num_workers
+        self.memory_limit_mb = memory_limit_mb
+        self.preload = list(preload or [])
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context(start_method)
+        self.idle_workers: "queue.Queue[_Worker]" = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers: List[_Worker] = []
+        self.respawn_count = 0
+        for _ in range(num_workers):
+            self._release(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent_channel, child_channel = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(child_channel, self.memory_limit_mb, self.preload),
+            daemon=True,
+        )
+        process.start()
+        child_channel.close()
+        worker = _Worker(process, parent_channel)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def _kill(self, worker: _Worker) -> None:
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.channel.close()
+
+    def _release(self, worker: _Worker) -> None:
+        self.idle_workers.put(worker)
+
+    def _respawn(self, worker: _Worker, reason: str) -> None:
+        logging.warning(f"Kill sandbox worker {worker.process.pid}: {reason}")
+        self._kill(worker)
+        self.respawn_count += 1
+        self._release(self._spawn())
+
+    def execute(self, db_path: str, sql: str, timeout: Optional[float] = None) -> Tuple[str, Any]:
+        """
+        在空闲进程中执行查询。
+
+        Returns:
+            ("ok", 列式结果) 或 ("error", 错误信息)。
+        """
+        worker = self.idle_workers.get()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        # 只有正常收到结果时才把进程放回池中，其他任何退出路径（包括序列化失败、KeyboardInterrupt）
+        # 都可能在管道中留下未读的结果，一律重启该进程
+        reason = "execution interrupted"
+        try:
+            worker.channel.send((db_path, sql))
+            while not worker.channel.poll(self.poll_interval):
+                if not worker.process.is_alive():
+                    reason = "worker died"
+                    return "error", "Execution worker died unexpectedly."
+                if deadline is not None and time.monotonic() > deadline:
+                    reason = f"timed out after {timeout} seconds"
+                    return "error", f"Query timed out after {timeout} seconds."
+                if self.memory_limit_mb and worker.rss_mb() > self.memory_limit_mb:
+                    reason = f"exceeded {self.memory_limit_mb} MB"
+                    return "error", f"Query exceeded the memory limit of {self.memory_limit_mb} MB."
+            result = worker.channel.recv()
+            reason = None
+            return result
+        except (EOFError, OSError) as e:
+            reason = str(e)
+            return "error", f"Execution worker failed: {e}"
+        finally:
+            if reason is None:
+                self._release(worker)
+            else:
+                self._respawn(worker, reason)
+
+    def close(self) -> None:
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            try:
+                worker.channel.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+        with self.lock:
+            self.workers.clear()
+
+
+class SandboxedExecutor(BaseDatabaseExecutor):
+    """
+    在隔离的执行进程池中运行 SQLite 查询的执行器，可直接替换 SQLAlchemyExecutor。
+    """
+
+    def __init__(
+            self,
+            connection_string: str,
+            pool: Optional[SQLiteWorkerPool] = None,
+            timeout: Optional[float] = 30.0,
+            **pool_kwargs,
+    ):
+        """
+        Args:
+            connection_string (str): 'sqlite:///path/to/db.sqlite' 或数据库文件路径。
+            pool (SQLiteWorkerPool, optional): 共享的进程池，为空时新建一个。
+            timeout (float, optional): 默认超时时间（秒），可被 `extra_args["timeout"]` 覆盖。
+            **pool_kwargs: 新建进程池时的参数。
+
+        Raises:
+            ExecutionServiceException: 数据库文件不存在。
+        """
+        super().__init__(connection_string)
+        self.db_path = connection_string[len("sqlite:///"):] if connection_string.startswith(
+            "sqlite:///") else connection_string
+        if not os.path.exists(self.db_path):
+            raise ExecutionServiceException(f"数据库文件不存在: {self.db_path}")
+        self.pool = pool if pool is not None else SQLiteWorkerPool(**pool_kwargs)
+        self.timeout = timeout
+
+    def execute_query(self, query: QueryExecutionRequest) -> QueryExecutionResponse:
+        """
+        执行一个SQL查询，并以列式存储格式返回结果；超时或超出内存时执行进程会被杀掉并重启。
+        """
+        timeout = self.timeout
+        if query.extra_args and query.extra_args.get("timeout") is not None:
+            timeout = query.extra_args["timeout"]
+        status, payload = self.pool.execute(self.db_path, query.query, timeout)
+        if status == "ok":
+            return QueryExecutionResponse(results=payload)
+        return QueryExecutionResponse(error_message=payload)
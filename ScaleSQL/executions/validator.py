@@ -0,0 +1,217 @@
+import re
+import sqlite3
+from functools import lru_cache
+from typing import Dict, Iterable, List, Literal, Optional, Set, Tuple
+
+import sqlglot
+from pydantic import BaseModel, Field
+from sqlglot import exp
+
+# rowid 别名在任何普通表上都可以直接引用
+_ROWID_ALIASES = {"rowid", "oid", "_rowid_"}
+_LIGHT_SCHEMA_TABLE_PATTERN = re.compile(r"^## Table: (.+)$")
+
+
+class SQLValidationResult(BaseModel):
+    """Static validation result of a candidate SQL."""
+
+    valid: bool
+    error_type: Optional[Literal["parse_error", "unknown_table", "unknown_column"]] = Field(default=None)
+    error_message: Optional[str] = Field(default=None)
+    identifier: Optional[str] = Field(default=None)
+
+
+class SchemaCatalog(object):
+    """
+    数据库的表/列目录，表名和列名均以小写保存，用于候选 SQL 的静态校验。
+    """
+
+    def __init__(self, tables: Dict[str, Set[str]]):
+        self.tables = {table.lower(): {column.lower() for column in columns} for table, columns in tables.items()}
+        self.all_columns = set().union(*self.tables.values()) if self.tables else set()
+
+    def has_table(self, table: str) -> bool:
+        return table.lower() in self.tables
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column.lower() in self.tables.get(table.lower(), ())
+
+    @classmethod
+    def from_db_info(cls, db_info: Dict) -> "SchemaCatalog":
+        """
+        从 `tables.json` 中的单个数据库条目构建目录。
+        """
+        table_names = db_info["table_names_original"]
+        tables = {table: set() for table in table_names}
+        for table_id, column_name in db_info["column_names_original"]:
+            if table_id < 0:
+                continue
+            tables[table_names[table_id]].add(column_name)
+        return cls(tables)
+
+    @classmethod
+    def from_light_schema(cls, light_schema: str) -> "SchemaCatalog":
+        """
+        从 LightSchema 生成的 markdown 模式文本构建目录。
+        """
+        tables = {}
+        current_table = None
+        for line in light_schema.splitlines():
+            match = _LIGHT_SCHEMA_TABLE_PATTERN.match(line)
+            if match:
+                current_table = match.group(1).strip()
+                tables[current_table] = set()
+                continue
+            if current_table is None or not line.startswith("|"):
+                continue
+            cells = line.strip("|").split("|")
+            column_name = cells[0].strip()
+            if not column_name or column_name == "column_name" or set(column_name) <= {"-", ":"}:
+                continue
+            tables[current_table].add(column_name)
+        return cls(tables)
+
+    @classmethod
+    def from_sqlite(cls, db_path: str) -> "SchemaCatalog":
+        """
+        以只读方式读取 SQLite 文件中的表结构构建目录。
+        """
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            tables = {}
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall()
+            for (table,) in rows:
+                columns = conn.execute(f"PRAGMA table_info(`{table}`)").fetchall()
+                tables[table] = {column[1] for column in columns}
+        finally:
+            conn.close()
+        return cls(tables)
+
+
+_catalog_cache: Dict[str, SchemaCatalog] = {}
+
+
+def get_schema_catalog(
+        db_id: str,
+        db_info: Optional[Dict] = None,
+        light_schema: Optional[str] = None,
+        db_path: Optional[str] = None,
+) -> SchemaCatalog:
+    """
+    获取某个数据库的目录，按 db_id 缓存；首次构建时依次使用 db_info、light_schema、db_path。
+    """
+    if db_id in _catalog_cache:
+        return _catalog_cache[db_id]
+    if db_info is not None:
+        catalog = SchemaCatalog.from_db_info(db_info)
+    elif light_schema is not None:
+        catalog = SchemaCatalog.from_light_schema(light_schema)
+    elif db_path is not None:
+        catalog = SchemaCatalog.from_sqlite(db_path)
+    else:
+        raise ValueError(f"No schema source given for database '{db_id}'.")
+    _catalog_cache[db_id] = catalog
+    return catalog
+
+
+@lru_cache(maxsize=4096)
+def parse_sql(sql: str, dialect: str = "sqlite") -> Tuple[Optional[exp.Expression], Optional[str]]:
+    """
+    解析 SQL，同一条 SQL 只解析一次。
+
+    Returns:
+        (语法树, 错误信息)，二者之一为 None。
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read=dialect)
+    except Exception as e:
+        return None, str(e)
+    if tree is None:
+        return None, "Empty SQL."
+    return tree, None
+
+
+class SQLValidator(object):
+    """
+    使用 sqlglot 对候选 SQL 做静态校验：语法、表引用与列引用。
+
+    只拒绝一定会在执行时报错的 SQL，无法确定的引用（CTE、子查询别名、SELECT 别名、
+    双引号字符串等）一律放行。
+    """
+
+    def __init__(self, catalog: SchemaCatalog, dialect: str = "sqlite"):
+        self.catalog = catalog
+        self.dialect = dialect
+
+    def validate(self, sql: str) -> SQLValidationResult:
+        tree, error = parse_sql(sql, self.dialect)
+        if tree is None:
+            return SQLValidationResult(valid=False, error_type="parse_error", error_message=error)
+
+        cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+        derived_names = {subquery.alias.lower() for subquery in tree.find_all(exp.Subquery) if subquery.alias}
+        output_names = {alias.alias.lower() for alias in tree.find_all(exp.Alias) if alias.alias}
+        for table_alias in tree.find_all(exp.TableAlias):
+            output_names.update(column.name.lower() for column in table_alias.columns)
+
+        alias_map = {}
+        for table in tree.find_all(exp.Table):
+            if not isinstance(table.this, exp.Identifier):
+                continue
+            name = table.name.lower()
+            if name not in cte_names and not self.catalog.has_table(name):
+                return SQLValidationResult(
+                    valid=False,
+                    error_type="unknown_table",
+                    error_message=f"no such table: {table.name}",
+                    identifier=table.name,
+                )
+            # 不同作用域可能复用同一个别名，保留所有候选表
+            alias_map.setdefault(table.alias_or_name.lower(), set()).add(name)
+
+        for column in tree.find_all(exp.Column):
+            if isinstance(column.this, exp.Star):
+                name = None
+            else:
+                name = column.name.lower()
+                if name in _ROWID_ALIASES:
+                    continue
+            qualifier = column.table.lower()
+            if qualifier:
+                tables = alias_map.get(qualifier)
+                if tables is None:
+                    if qualifier in cte_names or qualifier in derived_names:
+                        continue
+                    return SQLValidationResult(
+                        valid=False,
+                        error_type="unknown_table",
+                        error_message=f"no such table or alias: {column.table}",
+                        identifier=column.table,
+                    )
+                if name is None or any(
+                        table in cte_names or self.catalog.has_column(table, name) for table in tables
+                ):
+                    continue
+                return SQLValidationResult(
+                    valid=False,
+                    error_type="unknown_column",
+                    error_message=f"no such column: {column.table}.{column.name}",
+                    identifier=f"{column.table}.{column.name}",
+                )
+
+            if name is None or name in output_names or name in self.catalog.all_columns:
+                continue
+            # SQLite 会把无法解析的双引号标识符当作字符串字面量
+            if column.this.args.get("quoted"):
+                continue
+            return SQLValidationResult(
+                valid=False,
+                error_type="unknown_column",
+                error_message=f"no such column: {column.name}",
+                identifier=column.name,
+            )
+
+        return SQLValidationResult(valid=True)
+
+    def validate_many(self, sql_list: Iterable[str]) -> List[SQLValidationResult]:
+        return [self.validate(sql) for sql in sql_list]
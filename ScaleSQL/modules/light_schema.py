@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-import pandas as pd
+from ScaleSQL.utils.markdown import markdown_table
 
 LIGHT_SCHEMA_TEMPLATE = """## Table: {table}
 ### Table description
@@ -64,5 +64,4 @@ class LightSchema(object):
             pd_data["column_description"].append(column.get("description", ""))
             pd_data["value_examples"].append(column["samples"])
 
-        column_information = pd.DataFrame(pd_data)
-        return column_information.to_markdown(index=False)
+        return markdown_table(pd_data)
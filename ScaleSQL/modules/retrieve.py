@@ -1,29 +1,167 @@
+import json
 import logging
-from ScaleSQL.retrievers.chroma import ChromaVectorStore, RetrieveRequest
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from ScaleSQL.retrievers import (
+    DEFAULT_EMBEDDING_MODEL_PATH,
+    BaseVectorStore,
+    CellValueStore,
+    Condition,
+    RetrieveRequest,
+    init_chroma_registry,
+    init_embedding,
+    init_query_cache,
+    skeleton_examples,
+)
+from ScaleSQL.retrievers.factory import VectorStoreBackend, create_vector_store
+from ScaleSQL.retrievers.hybrid import HybridRetriever
 from ScaleSQL.utils import setup_logging
 
 
 setup_logging()
 
+DEFAULT_PIPELINE_CONFIG_PATH = "./ScaleSQL/workflows/config/pipeline_config.yaml"
+DEFAULT_NUMPY_STORE_PATH = "./ScaleSQL/numpy_store"
+
+_retrieval_initialized = False
+_retrieval_init_lock = threading.RLock()
+# the `vector_store` settings used when a retrieval does not name its backend
+_retrieval_settings: Dict[str, Any] = {
+    "backend": "chroma",
+    "numpy_path": DEFAULT_NUMPY_STORE_PATH,
+    "embedding_model_path": DEFAULT_EMBEDDING_MODEL_PATH,
+}
+
+
+def init_retrieval(configs: Dict[str, Any]) -> None:
+    """Set up the process-wide chroma registry, query embedding cache, embedding model
+    (`embedding.model_path` / `embedding.precision`) and default vector store backend
+    (`vector_store.backend` / `vector_store.numpy_path`) from the pipeline config.
+
+    Call once per process before the first retrieval; otherwise the first retrieval initialises them
+    from `DEFAULT_PIPELINE_CONFIG_PATH`, or with default settings when that file does not exist.
+    """
+    global _retrieval_initialized
+    store_config = configs.get("vector_store") or {}
+    embedding_config = configs.get("embedding") or {}
+    with _retrieval_init_lock:
+        # before the registry, whose warm-up already loads the model
+        init_embedding(configs)
+        init_chroma_registry(configs)
+        init_query_cache(configs)
+        _retrieval_settings.update(
+            backend=store_config.get("backend") or "chroma",
+            numpy_path=store_config.get("numpy_path") or DEFAULT_NUMPY_STORE_PATH,
+            embedding_model_path=embedding_config.get("model_path") or DEFAULT_EMBEDDING_MODEL_PATH,
+        )
+        _retrieval_initialized = True
+
+
+def _ensure_retrieval_initialized() -> None:
+    if _retrieval_initialized:
+        return
+    with _retrieval_init_lock:
+        if _retrieval_initialized:
+            return
+        configs = {}
+        if os.path.exists(DEFAULT_PIPELINE_CONFIG_PATH):
+            with open(DEFAULT_PIPELINE_CONFIG_PATH, "r", encoding="utf-8") as f:
+                configs = yaml.safe_load(f) or {}
+        init_retrieval(configs)
+
+
+def _resolve_store(backend: Optional[VectorStoreBackend], store_path: str):
+    """The backend and store path of a retrieval. Without an explicit `backend` the configured one
+    is used; for numpy the Chroma client path is then mapped to its export under `numpy_path`,
+    the layout written by `export_numpy_store` and the cell writer."""
+    if backend is not None:
+        return backend, store_path
+    backend = _retrieval_settings["backend"]
+    if backend == "numpy":
+        store_path = os.path.join(
+            _retrieval_settings["numpy_path"], os.path.basename(os.path.normpath(store_path))
+        )
+    return backend, store_path
+
 
 class DatabaseCellRetrieval:
-    def __init__(self, database_literals, search_client, collection_name):
+    def __init__(
+            self,
+            database_literals,
+            search_client,
+            collection_name,
+            vector_store: Optional[BaseVectorStore] = None,
+            embedding_model_path: Optional[str] = None,
+            backend: Optional[VectorStoreBackend] = None,
+            bm25_index_path: Optional[str] = None,
+            db_id: Optional[str] = None,
+    ):
+        """
+        Args:
+            database_literals: literals extracted from the question.
+            search_client: path of the Chroma persistent client, or the flat store root
+                when `backend="numpy"` is passed explicitly.
+            collection_name: the cell-value collection of the database.
+            vector_store: an already connected store to search instead, e.g. a shared
+                `MicroBatchVectorStore` that merges requests from concurrent questions.
+            embedding_model_path: local model used to embed the literals, shared in the process;
+                defaults to `embedding.model_path` of the pipeline config.
+            backend: "chroma", "numpy" or "auto", see `create_vector_store`; defaults to
+                `vector_store.backend` of the pipeline config, see `init_retrieval`.
+            bm25_index_path: Lucene content index of the database (see `build_contents_bm25_index`);
+                when given, literals are searched with BM25 and vectors together and fused with RRF.
+            db_id: restrict the search to this database, for a `collection_name` that holds the
+                values of all databases (single-collection layout).
+        """
+        _ensure_retrieval_initialized()
         self.database_literals = database_literals
-        self.search_client = ChromaVectorStore(
-            client_path=search_client, index_name=collection_name
+        # a store passed in is shared with other callers and stays open on close()
+        self.owned_store = None
+        if vector_store is not None:
+            self.search_client = vector_store
+        else:
+            backend, store_path = _resolve_store(backend, search_client)
+            self.search_client = create_vector_store(
+                backend, store_path, collection_name,
+                embedding_model_path or _retrieval_settings["embedding_model_path"],
+            )
+            self.owned_store = self.search_client
+        # one result per (table, column, value) although a value is stored once for all its columns
+        self.search_client = CellValueStore(self.search_client)
+        self.filter_conditions = (
+            [Condition(field="db_id", operator="=", value=[db_id])] if db_id is not None else []
         )
-        self.search_client.connect()
+        self.mode = "text"
+        if bm25_index_path is not None:
+            self.search_client = HybridRetriever(
+                self.search_client,
+                bm25_index_path,
+                bm25_biz_data={"db_id": db_id} if db_id is not None else None,
+            )
+            self.mode = "hybrid"
         self.retrieval_results = []
 
     def retrieve(self, threshold=0.8, k=5):
         results_set = set()
-        for value in self.database_literals:
-            if not isinstance(value, str) or value.isdigit():
-                continue
-            request = RetrieveRequest(
-                search_query=value, mode="text", threshold=threshold, k=k, index_name=""
+        requests = [
+            RetrieveRequest(
+                search_query=value,
+                mode=self.mode,
+                threshold=threshold,
+                k=k,
+                index_name="",
+                filter_conditions=self.filter_conditions,
             )
-            responses = self.search_client.search(request)
+            for value in self.database_literals
+            if isinstance(value, str) and not value.isdigit()
+        ]
+        # all literals are embedded and searched in one batch
+        for responses in self.search_client.search_many(requests):
             contents = [doc.content for doc in responses.docs if doc.content]
             metadatas = [doc.biz_data for doc in responses.docs if doc.biz_data]
             content_meta_pairs = [
@@ -44,6 +182,67 @@ class DatabaseCellRetrieval:
                 )
         return self.retrieval_results
 
+    def close(self):
+        """Release the store opened by this retrieval; BM25 searchers are shared by the process."""
+        if isinstance(self.search_client, HybridRetriever):
+            self.search_client.close()
+        if self.owned_store is not None:
+            self.owned_store.disconnect()
+            self.owned_store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+@lru_cache(maxsize=8)
+def load_skeleton_lookup(lookup_path: str) -> Dict:
+    """Load a neighbour lookup written by `skeleton_neighbor_process`, once per process."""
+    with open(lookup_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def lookup_skeleton_examples(
+        lookup_path: str, question_skeleton: str, threshold: float, k: int
+) -> Optional[List[Dict]]:
+    """Precomputed neighbours of the skeleton, or None when the lookup cannot answer the call.
+
+    Neighbours are stored nearest first and already cut at the lookup's threshold, so any call
+    with a smaller or equal k and threshold is a prefix of the stored list.
+    """
+    lookup = load_skeleton_lookup(lookup_path)
+    if k > lookup["k"] or threshold > lookup["threshold"]:
+        return None
+    hits = lookup["neighbors"].get(question_skeleton)
+    if hits is None:
+        return None
+    return [lookup["examples"][train_id] for train_id, distance in hits[:k] if distance < threshold]
+
+
+def _token_overlap(question: str, example: Dict) -> int:
+    tokens = set(str(example.get("question", "")).lower().split())
+    return len(tokens & set(question.lower().split()))
+
+
+def expand_skeleton_hits(
+        metadatas: List[Dict],
+        k: int,
+        question: Optional[str] = None,
+        max_examples_per_group: Optional[int] = None,
+) -> List[Dict]:
+    """Flatten skeleton hits, nearest first, into at most k training examples."""
+    examples = []
+    for metadata in metadatas:
+        group = skeleton_examples(metadata)
+        if question:
+            group = sorted(group, key=lambda example: _token_overlap(question, example), reverse=True)
+        examples.extend(group[:max_examples_per_group])
+        if len(examples) >= k:
+            break
+    return examples[:k]
+
 
 def skeleton_retrieve(
         skeleton_client_path: str,
@@ -51,11 +250,52 @@ def skeleton_retrieve(
         question_skeleton: str,
         threshold=1.5,
         k=15,
+        embedding_model_path: Optional[str] = None,
+        backend: Optional[VectorStoreBackend] = None,
+        lookup_path: Optional[str] = None,
+        question: Optional[str] = None,
+        max_examples_per_group: Optional[int] = None,
 ):
-    skeleton_chroma = ChromaVectorStore(
-        client_path=skeleton_client_path, index_name=skeleton_collection_name
+    """Few-shot examples whose skeletons are nearest to `question_skeleton`.
+
+    Training examples are grouped by skeleton, so each hit is expanded to the examples of its
+    group, best matches to `question` first, until k examples are collected.
+    """
+    _ensure_retrieval_initialized()
+    metadatas = None
+    if lookup_path is not None and os.path.exists(lookup_path):
+        metadatas = lookup_skeleton_examples(lookup_path, question_skeleton, threshold, k)
+    if metadatas is None:
+        metadatas = _live_skeleton_search(
+            skeleton_client_path, skeleton_collection_name, question_skeleton, threshold, k,
+            embedding_model_path, backend,
+        )
+    return_results = []
+    for metadata in expand_skeleton_hits(metadatas, k, question, max_examples_per_group):
+        question_text = metadata.get("question")
+        sql = metadata.get("sql")
+        evidence = metadata.get("evidence")
+        res = "Question: {}\nEvidence: {}\nSQL: {}".format(question_text, evidence, sql)
+        return_results.append(res)
+
+    logging.info(f"Retrieved {len(return_results)} skeleton examples.")
+    return return_results
+
+
+def _live_skeleton_search(
+        skeleton_client_path: str,
+        skeleton_collection_name: str,
+        question_skeleton: str,
+        threshold: float,
+        k: int,
+        embedding_model_path: Optional[str],
+        backend: Optional[VectorStoreBackend],
+) -> List[Dict]:
+    backend, store_path = _resolve_store(backend, skeleton_client_path)
+    skeleton_store = create_vector_store(
+        backend, store_path, skeleton_collection_name,
+        embedding_model_path or _retrieval_settings["embedding_model_path"],
     )
-    skeleton_chroma.connect()
     request = RetrieveRequest(
         search_query=question_skeleton,
         mode="text",
@@ -63,14 +303,5 @@ def skeleton_retrieve(
         k=k,
         index_name="",
     )
-    retrieval_results = skeleton_chroma.search(request)
-    return_results = []
-    for result in retrieval_results.docs:
-        question = result.biz_data.get("question")
-        sql = result.biz_data.get("sql")
-        evidence = result.biz_data.get("evidence")
-        res = "Question: {}\nEvidence: {}\nSQL: {}".format(question, evidence, sql)
-        return_results.append(res)
-
-    logging.info(f"Retrieved {len(return_results)} skeleton examples.")
-    return return_results
+    retrieval_results = skeleton_store.search(request)
+    return [result.biz_data for result in retrieval_results.docs]
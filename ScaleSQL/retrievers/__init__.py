@@ -4,12 +4,69 @@ from .base import (
     RetrieveDoc,
     RetrieveRequest,
     RetrieveResponse,
+    cell_document_id,
+    cell_locations,
+    document_id,
+    matches_conditions,
+    pack_skeleton_examples,
+    skeleton_examples,
+    validate_condition,
 )
+from .batching import MicroBatchVectorStore
+from .cell_values import CellValueStore, expand_cell_doc
+from .embedding import (
+    DEFAULT_EMBEDDING_MODEL_PATH,
+    EmbeddingModel,
+    SharedEmbeddingFunction,
+    get_embedding_function,
+    get_embedding_model,
+    init_embedding,
+)
+from .embedding_cache import EmbeddingCache, embed_with_cache, open_embedding_cache
+from .hybrid import HybridRetriever, close_hybrid_resources, get_lucene_searcher
+from .query_cache import QueryEmbeddingCache, SharedQueryEmbeddings, get_query_cache, init_query_cache
+from .numpy_store import NumpyVectorStore, export_chroma_collection, write_numpy_store
+from .search_plan import choose_search_plan, load_search_plans
+from .registry import ChromaRegistry, get_chroma_registry, init_chroma_registry
 
 __all__ = [
+    "DEFAULT_EMBEDDING_MODEL_PATH",
+    "EmbeddingCache",
+    "EmbeddingModel",
+    "SharedEmbeddingFunction",
+    "embed_with_cache",
+    "export_chroma_collection",
+    "get_embedding_function",
+    "get_embedding_model",
     "BaseVectorStore",
+    "CellValueStore",
+    "ChromaRegistry",
     "Condition",
+    "HybridRetriever",
+    "MicroBatchVectorStore",
+    "NumpyVectorStore",
+    "QueryEmbeddingCache",
     "RetrieveDoc",
     "RetrieveRequest",
     "RetrieveResponse",
+    "SharedQueryEmbeddings",
+    "cell_document_id",
+    "close_hybrid_resources",
+    "choose_search_plan",
+    "cell_locations",
+    "document_id",
+    "expand_cell_doc",
+    "matches_conditions",
+    "pack_skeleton_examples",
+    "skeleton_examples",
+    "validate_condition",
+    "get_chroma_registry",
+    "get_lucene_searcher",
+    "get_query_cache",
+    "init_chroma_registry",
+    "init_embedding",
+    "init_query_cache",
+    "load_search_plans",
+    "open_embedding_cache",
+    "write_numpy_store",
 ]
@@ -1,8 +1,12 @@
+import hashlib
+import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
+from ScaleSQL.exceptions import RetrieveServiceException
+
 
 class Condition(BaseModel):
     field: str
@@ -50,6 +54,83 @@ class RetrieveResponse(BaseModel):
     error_message: Optional[str] = Field(default=None)
 
 
+def document_id(*parts: str) -> str:
+    """Deterministic document ID from its identifying parts, stable across runs and writers."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(hashlib.sha1(str(part).encode("utf-8", errors="surrogatepass")).digest())
+    return digest.hexdigest()
+
+
+def cell_document_id(db_id: str, value: str, locations: str) -> str:
+    """ID of a cell value document: one per distinct value of a database.
+
+    The JSON-encoded (table, column) locations are part of the ID, so a value that gains or loses
+    a column is rewritten while unchanged values keep their ID.
+    """
+    return document_id(db_id, locations, value)
+
+
+def cell_locations(biz_data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(table, column) locations of a cell value document.
+
+    Documents written before values were deduplicated carry a single `table` / `column` pair.
+    """
+    if biz_data.get("locations"):
+        return [(table, column) for table, column in json.loads(biz_data["locations"])]
+    return [(biz_data["table"], biz_data["column"])]
+
+
+def validate_condition(condition: Condition) -> str:
+    """Return the lower-cased operator of `condition`, raising for filters that no store evaluates.
+
+    Every vector store applies the same rules, so an invalid filter fails the same way whichever
+    backend serves the request instead of being silently ignored.
+    """
+    operator = condition.operator.lower()
+    if operator not in ("=", "!=", "in", "not in"):
+        raise RetrieveServiceException(f"Unsupported filter operator: {condition.operator}")
+    if operator in ("=", "!=") and len(condition.value) != 1:
+        raise RetrieveServiceException(
+            f"Filter {condition.field} {condition.operator} takes exactly one value, got: {condition.value}"
+        )
+    return operator
+
+
+def matches_conditions(biz_data: Dict[str, Any], conditions: List[Condition]) -> bool:
+    """Whether metadata satisfies every condition, for filters evaluated outside the vector store."""
+    for condition in conditions or []:
+        value = biz_data.get(condition.field)
+        if validate_condition(condition) in ("=", "in"):
+            if value not in condition.value:
+                return False
+        elif value in condition.value:
+            return False
+    return True
+
+
+SKELETON_EXAMPLE_FIELDS = ("question", "sql", "evidence", "db", "id")
+
+
+def pack_skeleton_examples(examples: List[Dict[str, Any]]) -> str:
+    """Encode the training examples sharing one skeleton as a compact JSON string of rows."""
+    return json.dumps(
+        [[example.get(field, "") for field in SKELETON_EXAMPLE_FIELDS] for example in examples],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def skeleton_examples(biz_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Training examples of a skeleton document.
+
+    Documents written before skeletons were grouped hold a single example in their metadata.
+    """
+    if "examples" in biz_data:
+        return [dict(zip(SKELETON_EXAMPLE_FIELDS, row)) for row in json.loads(biz_data["examples"])]
+    return [biz_data]
+
+
 class BaseVectorStore(ABC):
     """Base class for vector store."""
 
@@ -80,3 +161,16 @@ class BaseVectorStore(ABC):
             RetrieveResponse: Retrieve response.
         """
         pass
+
+    def search_many(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        """Search for a batch of requests in the vector store.
+
+        Backends that can embed and query several texts at once should override this.
+
+        Args:
+            retrieve_requests (List[RetrieveRequest]): Retrieve requests.
+
+        Returns:
+            List[RetrieveResponse]: One response per request, in request order.
+        """
+        return [self.search(retrieve_request) for retrieve_request in retrieve_requests]
@@ -0,0 +1,84 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+from ScaleSQL.retrievers.base import BaseVectorStore, RetrieveRequest, RetrieveResponse
+
+
+class MicroBatchVectorStore(BaseVectorStore):
+    """Merge search requests from concurrent callers into batched `search_many` calls.
+
+    Requests are collected for at most `max_wait_ms` or until `max_batch_size` requests are
+    queued, then sent to the wrapped store in one call. Each caller blocks only on its own results.
+    """
+
+    def __init__(self, vector_store: BaseVectorStore, max_batch_size: int = 256, max_wait_ms: float = 5.0):
+        super().__init__(vector_store.index_name)
+        self.vector_store = vector_store
+        self.max_batch_size = max_batch_size
+        self.max_wait_sec = max_wait_ms / 1000
+        self.pending: "queue.Queue[Tuple[RetrieveRequest, Future]]" = queue.Queue()
+        self.stats: Dict[str, int] = {"requests": 0, "batches": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batch-search", daemon=True)
+        self._thread.start()
+
+    def add_documents(self, documents: List[Dict]) -> List[str]:
+        return self.vector_store.add_documents(documents)
+
+    def search(self, retrieve_request: RetrieveRequest) -> RetrieveResponse:
+        return self.search_many([retrieve_request])[0]
+
+    def search_many(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        if self._closed:
+            raise RuntimeError("MicroBatchVectorStore is closed.")
+        futures = []
+        for retrieve_request in retrieve_requests:
+            future = Future()
+            self.pending.put((retrieve_request, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _collect(self) -> List[Tuple[RetrieveRequest, Future]]:
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.max_wait_sec
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            stop = any(future is None for _, future in batch)
+            batch = [item for item in batch if item[1] is not None]
+            if batch:
+                self._serve(batch)
+            if stop:
+                return
+
+    def _serve(self, batch: List[Tuple[RetrieveRequest, Future]]) -> None:
+        requests = [retrieve_request for retrieve_request, _ in batch]
+        try:
+            responses = self.vector_store.search_many(requests)
+        except Exception as e:
+            logging.error(f"Micro batch search failed: {e}")
+            responses = [RetrieveResponse(error_message=str(e)) for _ in requests]
+        self.stats["requests"] += len(requests)
+        self.stats["batches"] += 1
+        for (_, future), response in zip(batch, responses):
+            future.set_result(response)
+
+    def close(self) -> None:
+        """Stop the batching thread once the queued requests are served."""
+        self._closed = True
+        self.pending.put((None, None))
+        self._thread.join()
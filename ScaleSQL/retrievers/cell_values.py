@@ -0,0 +1,88 @@
+from typing import Dict, List
+
+from ScaleSQL.retrievers.base import (
+    BaseVectorStore,
+    Condition,
+    RetrieveDoc,
+    RetrieveRequest,
+    RetrieveResponse,
+    cell_locations,
+    matches_conditions,
+)
+
+# fields that differ between the locations of a deduplicated value
+LOCATION_FIELDS = ("table", "column")
+
+
+def expand_cell_doc(doc: RetrieveDoc) -> List[RetrieveDoc]:
+    """One document per (table, column) location of a cell value, without the `locations` field."""
+    biz_data = {key: value for key, value in (doc.biz_data or {}).items() if key != "locations"}
+    if not (doc.biz_data or {}).get("locations"):
+        return [RetrieveDoc(content=doc.content, biz_data=biz_data, score=doc.score)]
+    return [
+        RetrieveDoc(content=doc.content, biz_data={**biz_data, "table": table, "column": column}, score=doc.score)
+        for table, column in cell_locations(doc.biz_data)
+    ]
+
+
+class CellValueStore(BaseVectorStore):
+    """Search a cell-value collection as if it held one document per (table, column, value).
+
+    `ChromaWriter` stores a value that occurs in several columns once, with all its columns in the
+    `locations` metadata and only the first in `table` / `column`. This wrapper expands every hit
+    into its locations, applies conditions on `table` / `column` to the expanded documents instead
+    of pushing them down, and returns `k` (table, column, value) documents. When filters drop
+    locations, the store is searched again with `fetch_factor` times more candidates, until `k`
+    documents are found or the store has no more hits within the threshold.
+    """
+
+    def __init__(self, vector_store: BaseVectorStore, fetch_factor: int = 4, max_fetch: int = 1000):
+        super().__init__(vector_store.index_name)
+        self.vector_store = vector_store
+        self.fetch_factor = fetch_factor
+        self.max_fetch = max_fetch
+
+    def add_documents(self, documents: List[Dict]) -> List[str]:
+        return self.vector_store.add_documents(documents)
+
+    def search(self, retrieve_request: RetrieveRequest) -> RetrieveResponse:
+        return self.search_many([retrieve_request])[0]
+
+    @staticmethod
+    def _split_conditions(retrieve_request: RetrieveRequest):
+        pushed: List[Condition] = []
+        location: List[Condition] = []
+        for condition in retrieve_request.filter_conditions or []:
+            (location if condition.field in LOCATION_FIELDS else pushed).append(condition)
+        return pushed, location
+
+    def search_many(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        responses: List[RetrieveResponse] = [RetrieveResponse() for _ in retrieve_requests]
+        conditions = [self._split_conditions(retrieve_request) for retrieve_request in retrieve_requests]
+        fetch = {i: retrieve_request.k for i, retrieve_request in enumerate(retrieve_requests)}
+        pending = list(fetch)
+        while pending:
+            inner_requests = [
+                retrieve_requests[i].model_copy(update={"k": fetch[i], "filter_conditions": conditions[i][0]})
+                for i in pending
+            ]
+            retry = []
+            for i, inner_response in zip(pending, self.vector_store.search_many(inner_requests)):
+                if inner_response.error_message:
+                    responses[i] = inner_response
+                    continue
+                docs = [
+                    location_doc
+                    for doc in inner_response.docs
+                    for location_doc in expand_cell_doc(doc)
+                    if matches_conditions(location_doc.biz_data, conditions[i][1])
+                ]
+                k = retrieve_requests[i].k
+                exhausted = len(inner_response.docs) < fetch[i] or fetch[i] >= self.max_fetch
+                if len(docs) < k and not exhausted:
+                    fetch[i] = min(fetch[i] * self.fetch_factor, self.max_fetch)
+                    retry.append(i)
+                    continue
+                responses[i] = RetrieveResponse(docs=docs[:k])
+            pending = retry
+        return responses
@@ -1,9 +1,12 @@
-from typing import List
-
-import chromadb
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional
 
 from ScaleSQL.retrievers import RetrieveRequest, RetrieveResponse
-from ScaleSQL.retrievers.base import BaseVectorStore, RetrieveDoc
+from ScaleSQL.retrievers.base import BaseVectorStore, Condition, RetrieveDoc, document_id, validate_condition
+from ScaleSQL.retrievers.embedding import get_embedding_function
+from ScaleSQL.retrievers.query_cache import embed_queries
+from ScaleSQL.retrievers.registry import get_chroma_registry
 
 
 class ChromaVectorStore(BaseVectorStore):
@@ -11,13 +14,24 @@ class ChromaVectorStore(BaseVectorStore):
     基于 ChromaDB 实现的 VectorStore。
     """
 
-    def __init__(self, client_path: str, index_name: str):
+    def __init__(self, client_path: str, index_name: str, embedding_model_path: Optional[str] = None):
         """
         初始化 ChromaVectorStore。
+
+        Args:
+            client_path: Chroma 持久化目录。
+            index_name: 集合名称。
+            embedding_model_path: 本地向量模型路径，查询时使用进程内共享的模型编码；
+                为空时使用集合默认的向量函数。
         """
         super().__init__(index_name)
         self.collection = None
-        self.client = chromadb.PersistentClient(path=client_path)
+        self.client_path = client_path
+        self.embedding_function = (
+            get_embedding_function(embedding_model_path) if embedding_model_path else None
+        )
+        # 客户端与集合由进程级注册表复用，避免每次检索都重新加载
+        self.client = get_chroma_registry().get_client(client_path)
 
     def connect(self):
         """
@@ -25,8 +39,8 @@ class ChromaVectorStore(BaseVectorStore):
         """
         if self.collection is None:
             try:
-                self.collection = self.client.get_or_create_collection(
-                    name=self.index_name
+                self.collection = get_chroma_registry().get_collection(
+                    self.client_path, self.index_name, embedding_function=self.embedding_function
                 )
             except Exception as e:
                 raise Exception(f"Error connecting to chromadb collection: {e}") from e
@@ -45,12 +59,15 @@ class ChromaVectorStore(BaseVectorStore):
             )
 
         try:
-            existing_count = self.collection.count()
             contents = [document.content for document in documents]
             metadatas = [document.biz_data for document in documents]
-            ids = [f"doc_{i + existing_count}" for i in range(len(contents))]
+            # ID 由内容与元数据决定，并发写入或重复写入同一文档时不会冲突
+            ids = [
+                document_id(content, json.dumps(metadata, sort_keys=True, default=str))
+                for content, metadata in zip(contents, metadatas)
+            ]
 
-            self.collection.add(documents=contents, metadatas=metadatas, ids=ids)
+            self.collection.upsert(documents=contents, metadatas=metadatas, ids=ids)
 
             print("Data successfully add to the collection!")
 
@@ -59,47 +76,96 @@ class ChromaVectorStore(BaseVectorStore):
 
         return ids
 
+    @staticmethod
+    def _build_condition(cond: Condition) -> Dict:
+        operator = validate_condition(cond)
+        if operator in ("=", "!="):
+            return {cond.field: {"$eq" if operator == "=" else "$ne": cond.value[0]}}
+        if operator == "in":
+            return {cond.field: {"$in": list(cond.value)}}
+        return {cond.field: {"$nin": list(cond.value)}}
+
+    @classmethod
+    def _build_where(cls, retrieve_request: RetrieveRequest) -> Optional[Dict]:
+        """将全部过滤条件下推为 Chroma where 子句，不支持的条件直接抛出异常而不是忽略。"""
+        and_conditions = [cls._build_condition(cond) for cond in retrieve_request.filter_conditions or []]
+        if not and_conditions:
+            return None
+        # Chroma 要求 $and 至少包含两个条件
+        if len(and_conditions) == 1:
+            return and_conditions[0]
+        return {"$and": and_conditions}
+
+    @staticmethod
+    def _to_docs(
+            retrieve_request: RetrieveRequest,
+            result_documents: List[str],
+            result_metadatas: List[Dict],
+            result_distances: List[float],
+    ) -> List[RetrieveDoc]:
+        docs = []
+        for document, metadata, distance in zip(
+                result_documents[: retrieve_request.k],
+                result_metadatas[: retrieve_request.k],
+                result_distances[: retrieve_request.k],
+        ):
+            # 只保留那些满足质量阈值（距离足够近）的结果
+            if distance < retrieve_request.threshold:
+                docs.append(
+                    RetrieveDoc(content=document, biz_data=metadata)
+                )
+        return docs
+
     def search(self, retrieve_request: RetrieveRequest) -> RetrieveResponse:
-        try:
-            where_clause = None
-            if retrieve_request.filter_conditions:
-                and_conditions = []
-                for cond in retrieve_request.filter_conditions:
-                    if cond.operator.lower() == "in":
-                        op = "$in"
-                    elif cond.operator.lower() == "nin":
-                        op = "$nin"
-                    else:
-                        continue
-
-                    and_conditions.append({cond.field: {op: cond.value}})
-
-                if and_conditions:
-                    where_clause = {"$and": and_conditions}
-
-            results = self.collection.query(
-                query_texts=[retrieve_request.search_query],
-                n_results=retrieve_request.k,
-                where=where_clause,
-            )
+        return self.search_many([retrieve_request])[0]
 
-            docs = []
-            if results and results.get("documents"):
-                result_documents = results["documents"][0]
-                result_metadatas = results["metadatas"][0]
-                result_distances = results["distances"][0]
-
-                for document, metadata, distance in zip(
-                        result_documents, result_metadatas, result_distances
-                ):
-                    # 只保留那些满足质量阈值（距离足够近）的结果
-                    if distance < retrieve_request.threshold:
-                        docs.append(
-                            RetrieveDoc(content=document, biz_data=metadata)
+    def search_many(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        """
+        批量检索：过滤条件相同的请求合并为一次 collection.query，查询文本在一个批次内完成编码。
+        每个请求仍使用自己的 k 与 threshold。
+
+        Raises:
+            RetrieveServiceException: 过滤条件无法转换为 Chroma where 子句。
+        """
+        responses: List[Optional[RetrieveResponse]] = [None] * len(retrieve_requests)
+        groups: Dict[str, List[int]] = defaultdict(list)
+        where_clauses = {}
+        for i, retrieve_request in enumerate(retrieve_requests):
+            # 过滤条件非法时直接抛出，避免静默返回未过滤的结果
+            where_clause = self._build_where(retrieve_request)
+            group_key = json.dumps(where_clause, sort_keys=True, default=str)
+            groups[group_key].append(i)
+            where_clauses[group_key] = where_clause
+
+        for group_key, indices in groups.items():
+            try:
+                query_texts = [retrieve_requests[i].search_query for i in indices]
+                query_kwargs = {
+                    "n_results": max(retrieve_requests[i].k for i in indices),
+                    "where": where_clauses[group_key],
+                }
+                if self.embedding_function is not None:
+                    # 查询向量经进程级 LRU 缓存，重复的字面值与 skeleton 不再调用模型
+                    query_kwargs["query_embeddings"] = list(
+                        embed_queries(self.embedding_function.embedding_model, query_texts)
+                    )
+                else:
+                    query_kwargs["query_texts"] = query_texts
+                results = self.collection.query(**query_kwargs)
+                for position, i in enumerate(indices):
+                    docs = []
+                    if results and results.get("documents"):
+                        docs = self._to_docs(
+                            retrieve_requests[i],
+                            results["documents"][position],
+                            results["metadatas"][position],
+                            results["distances"][position],
                         )
+                    responses[i] = RetrieveResponse(docs=docs)
 
-            return RetrieveResponse(docs=docs)
+            except Exception as e:
+                error = str(e)
+                for i in indices:
+                    responses[i] = RetrieveResponse(error_message=error)
 
-        except Exception as e:
-            error = str(e)
-            return RetrieveResponse(error_message=error)
+        return responses
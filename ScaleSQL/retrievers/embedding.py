@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+DEFAULT_EMBEDDING_MODEL_PATH = "./ScaleSQL/model/all-MiniLM-L6-v2"
+
+Precision = Literal["fp32", "fp16", "int8"]
+
+
+class EmbeddingModel(object):
+    """A local sentence-transformer model loaded once per process.
+
+    `precision="fp16"` halves the weights, `precision="int8"` applies dynamic int8 quantization
+    to the linear layers and is only available on CPU.
+    """
+
+    def __init__(self, model_path: str, device: str = "cpu", precision: Precision = "fp32"):
+        from sentence_transformers import SentenceTransformer
+
+        if precision == "int8" and device != "cpu":
+            raise ValueError("int8 quantized embedding model is only supported on cpu.")
+
+        start = time.perf_counter()
+        self.model_path = model_path
+        self.device = device
+        self.precision = precision
+        self.model = SentenceTransformer(model_path, device=device)
+        if precision == "fp16":
+            self.model.half()
+        elif precision == "int8":
+            import torch
+
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model_id = f"{os.path.basename(os.path.normpath(model_path))}@{precision}"
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        logging.info(
+            f"Loaded embedding model {self.model_id} on {device} in {time.perf_counter() - start:.2f}s"
+        )
+
+    def encode(self, texts: List[str], batch_size: int = 256, normalize: bool = False) -> np.ndarray:
+        """Encode texts into a float32 matrix of shape (len(texts), dimension)."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        embeddings = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize,
+            show_progress_bar=False,
+        )
+        return embeddings.astype(np.float32, copy=False)
+
+
+_models: Dict[Tuple[str, str, str], EmbeddingModel] = {}
+_models_lock = threading.Lock()
+# precision of the models loaded without an explicit one, e.g. by the retrieval stores
+_default_precision: Precision = "fp32"
+
+
+def init_embedding(configs: Dict[str, Any]) -> None:
+    """Use `embedding.precision` of the pipeline config for models loaded without a precision, so
+    that retrieval shares the model (and query cache keys) of the writers that built the index."""
+    global _default_precision
+    _default_precision = (configs.get("embedding") or {}).get("precision") or "fp32"
+
+
+def get_embedding_model(
+        model_path: str = DEFAULT_EMBEDDING_MODEL_PATH,
+        device: Optional[str] = None,
+        precision: Optional[Precision] = None,
+) -> EmbeddingModel:
+    """Return the process-wide instance of the model, loading it on first use.
+
+    Without a `precision` the one set by `init_embedding` is used (fp32 by default).
+    """
+    if precision is None:
+        precision = _default_precision
+    if device is None:
+        from ScaleSQL.utils.utils import get_default_device
+
+        device = get_default_device()
+    key = (os.path.abspath(model_path), device, precision)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = EmbeddingModel(model_path, device=device, precision=precision)
+        return _models[key]
+
+
+class SharedEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """Chroma embedding function backed by a shared `EmbeddingModel`.
+
+    It keeps the name and config of `SentenceTransformerEmbeddingFunction`, so collections written
+    with either one can be opened with the other.
+    """
+
+    def __init__(self, embedding_model: EmbeddingModel, normalize_embeddings: bool = False, batch_size: int = 256):
+        # 不调用父类构造函数，避免再次加载模型
+        self.model_name = embedding_model.model_path
+        self.device = embedding_model.device
+        self.normalize_embeddings = normalize_embeddings
+        self.kwargs = {}
+        self._model = embedding_model.model
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+
+    def __call__(self, input):
+        embeddings = self.embedding_model.encode(
+            list(input), batch_size=self.batch_size, normalize=self.normalize_embeddings
+        )
+        return [embedding for embedding in embeddings]
+
+
+def get_embedding_function(
+        model_path: str = DEFAULT_EMBEDDING_MODEL_PATH,
+        device: Optional[str] = None,
+        precision: Optional[Precision] = None,
+) -> Optional[SharedEmbeddingFunction]:
+    """Return a Chroma embedding function over the shared model, or None when the local model is missing."""
+    if not os.path.exists(model_path):
+        logging.warning(f"Embedding model path {model_path} does not exist, using the collection default.")
+        return None
+    return SharedEmbeddingFunction(get_embedding_model(model_path, device, precision))
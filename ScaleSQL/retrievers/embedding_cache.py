@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ScaleSQL.retrievers.embedding import EmbeddingModel
+
+_KEY_SIZE = 16
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=_KEY_SIZE).digest()
+
+
+class EmbeddingCache(object):
+    """Content-addressed on-disk cache of text embeddings for one model.
+
+    Layout of `<cache_dir>/<model_id>/`:
+        vectors.f16  memory-mapped float16 matrix, one row per cached text
+        keys.bin     16-byte blake2b digests of the texts, row order
+        meta.json    model id and dimension
+
+    `keys.bin` is only appended after the matching rows are written, so a crashed run never
+    leaves a key pointing at a missing vector. A cache directory supports one writer at a time.
+    """
+
+    def __init__(self, cache_dir: str, model_id: str, dimension: int, initial_capacity: int = 65536):
+        self.path = os.path.join(cache_dir, model_id.replace("/", "_"))
+        os.makedirs(self.path, exist_ok=True)
+        self.model_id = model_id
+        self.dimension = dimension
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dimension"] != dimension:
+                raise ValueError(
+                    f"Embedding cache {self.path} has dimension {meta['dimension']}, expected {dimension}."
+                )
+        else:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"model_id": model_id, "dimension": dimension}, f)
+
+        self.keys_path = os.path.join(self.path, "keys.bin")
+        self.vectors_path = os.path.join(self.path, "vectors.f16")
+        self.index: Dict[bytes, int] = {}
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % _KEY_SIZE
+            for row in range(usable // _KEY_SIZE):
+                self.index[data[row * _KEY_SIZE: (row + 1) * _KEY_SIZE]] = row
+        self.count = len(self.index)
+
+        capacity = max(initial_capacity, self.count)
+        if os.path.exists(self.vectors_path):
+            capacity = max(capacity, os.path.getsize(self.vectors_path) // (2 * dimension))
+        self.vectors = self._open_vectors(capacity)
+
+    def _open_vectors(self, capacity: int) -> np.memmap:
+        size = capacity * self.dimension * 2
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.capacity = capacity
+        return np.memmap(self.vectors_path, dtype=np.float16, mode="r+", shape=(capacity, self.dimension))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get_many(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """Look up texts.
+
+        Returns:
+            (float32 matrix with the cached vectors filled in, indices of the texts that missed)
+        """
+        result = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        missing = []
+        with self.lock:
+            rows, positions = [], []
+            for i, text in enumerate(texts):
+                row = self.index.get(_text_key(text))
+                if row is None:
+                    missing.append(i)
+                else:
+                    rows.append(row)
+                    positions.append(i)
+            if rows:
+                result[positions] = self.vectors[rows]
+            self.stats["hits"] += len(rows)
+            self.stats["misses"] += len(missing)
+        return result, missing
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        with self.lock:
+            new_keys, new_rows = [], []
+            # 集合用于去重，列表保持写入顺序
+            seen = set()
+            for text, vector in zip(texts, vectors):
+                key = _text_key(text)
+                if key in self.index or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_rows.append(vector)
+            if not new_keys:
+                return
+            if self.count + len(new_keys) > self.capacity:
+                self.vectors.flush()
+                del self.vectors
+                self.vectors = self._open_vectors(max(self.capacity * 2, self.count + len(new_keys)))
+            start = self.count
+            self.vectors[start: start + len(new_keys)] = np.asarray(new_rows, dtype=np.float16)
+            self.vectors.flush()
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(new_keys))
+            for offset, key in enumerate(new_keys):
+                self.index[key] = start + offset
+            self.count += len(new_keys)
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+
+def open_embedding_cache(cache_dir: Optional[str], embedding_model: EmbeddingModel) -> Optional[EmbeddingCache]:
+    """Open the cache of `embedding_model` under `cache_dir`, or return None when caching is disabled."""
+    if not cache_dir:
+        return None
+    return EmbeddingCache(cache_dir, embedding_model.model_id, embedding_model.dimension)
+
+
+def embed_with_cache(
+        embedding_model: EmbeddingModel,
+        cache: Optional[EmbeddingCache],
+        texts: List[str],
+        batch_size: int = 256,
+) -> np.ndarray:
+    """Embed texts, running the model only on texts that are not in the cache yet."""
+    if cache is None:
+        return embedding_model.encode(texts, batch_size=batch_size)
+    embeddings, missing = cache.get_many(texts)
+    if missing:
+        missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+        missing_embeddings = embedding_model.encode(missing_texts, batch_size=batch_size)
+        cache.put_many(missing_texts, missing_embeddings)
+        positions = {text: row for row, text in enumerate(missing_texts)}
+        embeddings[missing] = missing_embeddings[[positions[texts[i]] for i in missing]]
+    logging.debug(f"Embedded {len(texts)} texts, {len(missing)} cache misses.")
+    return embeddings
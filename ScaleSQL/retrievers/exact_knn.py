@@ -0,0 +1,54 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def l2_top_k(
+        queries: np.ndarray,
+        matrix: np.ndarray,
+        k: int,
+        query_block: int = 1024,
+        row_block: int = 65536,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact k nearest rows of `matrix` for every query by squared L2 distance.
+
+    Distances are computed as |q|^2 + |x|^2 - 2 q.x with blocked matrix multiplies, so memory
+    stays at (query_block x row_block) floats however large both sides are. This is the same
+    distance Chroma reports for its default "l2" space.
+
+    Returns:
+        (indices, distances), both of shape (len(queries), min(k, len(matrix))), nearest first.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    k = min(k, len(matrix))
+    indices = np.zeros((len(queries), k), dtype=np.int64)
+    distances = np.zeros((len(queries), k), dtype=np.float32)
+    if k == 0 or len(queries) == 0:
+        return indices, distances
+
+    row_norms = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), row_block):
+        block = np.asarray(matrix[start: start + row_block], dtype=np.float32)
+        row_norms[start: start + len(block)] = np.einsum("ij,ij->i", block, block)
+
+    for q_start in range(0, len(queries), query_block):
+        query = queries[q_start: q_start + query_block]
+        query_norms = np.einsum("ij,ij->i", query, query)
+        best_distances = np.full((len(query), k), np.inf, dtype=np.float32)
+        best_indices = np.full((len(query), k), -1, dtype=np.int64)
+        for start in range(0, len(matrix), row_block):
+            block = np.asarray(matrix[start: start + row_block], dtype=np.float32)
+            block_distances = query_norms[:, None] + row_norms[None, start: start + len(block)] - 2.0 * query @ block.T
+            np.maximum(block_distances, 0.0, out=block_distances)
+            block_indices = np.broadcast_to(np.arange(start, start + len(block)), block_distances.shape)
+
+            merged_distances = np.concatenate([best_distances, block_distances], axis=1)
+            merged_indices = np.concatenate([best_indices, block_indices], axis=1)
+            top = np.argpartition(merged_distances, k - 1, axis=1)[:, :k]
+            best_distances = np.take_along_axis(merged_distances, top, axis=1)
+            best_indices = np.take_along_axis(merged_indices, top, axis=1)
+
+        order = np.argsort(best_distances, axis=1, kind="stable")
+        distances[q_start: q_start + len(query)] = np.take_along_axis(best_distances, order, axis=1)
+        indices[q_start: q_start + len(query)] = np.take_along_axis(best_indices, order, axis=1)
+    return indices, distances
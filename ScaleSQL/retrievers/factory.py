@@ -0,0 +1,46 @@
+from typing import Literal
+
+from ScaleSQL.retrievers.base import BaseVectorStore
+from ScaleSQL.retrievers.chroma import ChromaVectorStore
+from ScaleSQL.retrievers.embedding import DEFAULT_EMBEDDING_MODEL_PATH
+from ScaleSQL.retrievers.numpy_store import NumpyVectorStore
+from ScaleSQL.retrievers.search_plan import load_search_plans
+
+VectorStoreBackend = Literal["chroma", "numpy", "auto"]
+
+
+def create_vector_store(
+        backend: VectorStoreBackend,
+        store_path: str,
+        index_name: str,
+        embedding_model_path: str = DEFAULT_EMBEDDING_MODEL_PATH,
+) -> BaseVectorStore:
+    """Open the index `index_name` under `store_path` with the given backend.
+
+    Args:
+        backend: "chroma" for a Chroma persistent client directory, "numpy" for a directory of
+            flat stores written by `write_numpy_store` / `export_chroma_collection`, "auto" for the
+            backend `ChromaWriter` chose for this collection by its size (see `search_plan`),
+            falling back to chroma for collections without a plan.
+        store_path: the Chroma client path or the flat store root; the Chroma client path for "auto".
+        index_name: collection name.
+        embedding_model_path: local model used to embed queries.
+    """
+    if backend == "auto":
+        plan = load_search_plans(store_path).get(index_name) or {}
+        if plan.get("backend") == "numpy" and plan.get("numpy_path"):
+            backend, store_path = "numpy", plan["numpy_path"]
+        else:
+            backend = "chroma"
+    if backend == "chroma":
+        vector_store = ChromaVectorStore(
+            client_path=store_path, index_name=index_name, embedding_model_path=embedding_model_path
+        )
+    elif backend == "numpy":
+        vector_store = NumpyVectorStore(
+            store_path=store_path, index_name=index_name, embedding_model_path=embedding_model_path
+        )
+    else:
+        raise ValueError(f"Unsupported vector store backend: {backend}")
+    vector_store.connect()
+    return vector_store
@@ -0,0 +1,196 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ScaleSQL.retrievers.base import (
+    BaseVectorStore,
+    RetrieveDoc,
+    RetrieveRequest,
+    RetrieveResponse,
+    matches_conditions,
+)
+from ScaleSQL.retrievers.cell_values import expand_cell_doc
+
+FusionKey = Tuple[str, str, str]
+
+# BM25 与向量检索共用的线程池，进程内所有 HybridRetriever 共享
+HYBRID_SEARCH_WORKERS = 8
+
+_searchers: Dict[str, Any] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_lucene_searcher(index_path: str):
+    """Return the process-wide `LuceneSearcher` of `index_path`, opening it on first use.
+
+    Searchers are thread safe and are kept open for the life of the process, one per index.
+    """
+    with _shared_lock:
+        if index_path not in _searchers:
+            from pyserini.search.lucene import LuceneSearcher
+
+            _searchers[index_path] = LuceneSearcher(index_path)
+        return _searchers[index_path]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _shared_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HYBRID_SEARCH_WORKERS, thread_name_prefix="hybrid-search")
+        return _executor
+
+
+def close_hybrid_resources() -> None:
+    """Close the shared searchers and thread pool, e.g. at the end of a pipeline run."""
+    global _executor
+    with _shared_lock:
+        for searcher in _searchers.values():
+            searcher.close()
+        _searchers.clear()
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _fusion_key(doc: RetrieveDoc) -> FusionKey:
+    biz_data = doc.biz_data or {}
+    return str(biz_data.get("table", "")).lower(), str(biz_data.get("column", "")).lower(), doc.content
+
+
+class HybridRetriever(BaseVectorStore):
+    """BM25 + vector retrieval fused with reciprocal rank fusion.
+
+    Requests with `mode="hybrid"` are searched in the Lucene index built by
+    `build_contents_bm25_index` and in the wrapped vector store at the same time; the two ranked
+    lists are merged on (table, column, content) with `score = sum(1 / (rrf_k + rank))`.
+    Other modes are passed to the vector store unchanged.
+    """
+
+    def __init__(
+            self,
+            vector_store: BaseVectorStore,
+            bm25_index_path: str,
+            rrf_k: int = 60,
+            candidate_k: Optional[int] = None,
+            bm25_threads: int = 8,
+            searcher=None,
+            bm25_biz_data: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            vector_store: connected store holding the cell-value embeddings.
+            bm25_index_path: Lucene index of one database's column contents.
+            rrf_k: RRF damping constant.
+            candidate_k: results taken from each backend before fusion, defaults to 2 * k.
+            bm25_threads: threads used by `LuceneSearcher.batch_search`.
+            searcher: an already opened `LuceneSearcher`; defaults to the process-wide searcher
+                of `bm25_index_path`, see `get_lucene_searcher`.
+            bm25_biz_data: metadata shared by every document of the Lucene index, e.g. its db_id,
+                added to BM25 hits so that filters on it match.
+        """
+        super().__init__(vector_store.index_name)
+        self.searcher = searcher if searcher is not None else get_lucene_searcher(bm25_index_path)
+        self.vector_store = vector_store
+        self.rrf_k = rrf_k
+        self.candidate_k = candidate_k
+        self.bm25_threads = bm25_threads
+        self.bm25_biz_data = bm25_biz_data or {}
+
+    def add_documents(self, documents: List[Dict]) -> List[str]:
+        return self.vector_store.add_documents(documents)
+
+    def search(self, retrieve_request: RetrieveRequest) -> RetrieveResponse:
+        return self.search_many([retrieve_request])[0]
+
+    def _candidates(self, retrieve_request: RetrieveRequest) -> int:
+        return self.candidate_k or 2 * retrieve_request.k
+
+    def _bm25_search(self, retrieve_requests: List[RetrieveRequest]) -> List[List[RetrieveDoc]]:
+        queries = [retrieve_request.search_query for retrieve_request in retrieve_requests]
+        q_ids = [str(i) for i in range(len(queries))]
+        k = max(self._candidates(retrieve_request) for retrieve_request in retrieve_requests)
+        search_results = self.searcher.batch_search(queries, q_ids, k=k, threads=self.bm25_threads)
+
+        ranked = []
+        for q_id, retrieve_request in zip(q_ids, retrieve_requests):
+            docs = []
+            for hit in search_results.get(q_id, []):
+                doc = self.searcher.doc(hit.docid)
+                try:
+                    raw = json.loads(doc.raw())
+                except AttributeError:
+                    raw = json.loads(doc["contents"])
+                # 文档 id 形如 "{table}-**-{column}-**-{c_id}"
+                table_name, column_name, _ = raw["id"].split("-**-")
+                biz_data = {**self.bm25_biz_data, "table": table_name, "column": column_name}
+                if matches_conditions(biz_data, retrieve_request.filter_conditions):
+                    docs.append(RetrieveDoc(content=raw["contents"], biz_data=biz_data, score=hit.score))
+            ranked.append(docs[: self._candidates(retrieve_request)])
+        return ranked
+
+    def _vector_search(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        widened = [
+            retrieve_request.model_copy(update={"k": self._candidates(retrieve_request)})
+            for retrieve_request in retrieve_requests
+        ]
+        return self.vector_store.search_many(widened)
+
+    def _fuse(self, retrieve_request: RetrieveRequest, ranked_lists: List[List[RetrieveDoc]]) -> List[RetrieveDoc]:
+        scores: Dict[FusionKey, float] = {}
+        fused: Dict[FusionKey, RetrieveDoc] = {}
+        for docs in ranked_lists:
+            for rank, doc in enumerate(docs, start=1):
+                # 去重后的值文档按其所在的每一列参与融合，与 BM25 的逐列结果对齐
+                for location_doc in expand_cell_doc(doc):
+                    key = _fusion_key(location_doc)
+                    scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+                    if key in fused:
+                        fused[key].biz_data = {**location_doc.biz_data, **fused[key].biz_data}
+                    else:
+                        fused[key] = location_doc
+        ordered = sorted(scores, key=lambda key: scores[key], reverse=True)[: retrieve_request.k]
+        return [fused[key].model_copy(update={"score": scores[key]}) for key in ordered]
+
+    def search_many(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        hybrid = [i for i, retrieve_request in enumerate(retrieve_requests) if retrieve_request.mode == "hybrid"]
+        others = [i for i, retrieve_request in enumerate(retrieve_requests) if retrieve_request.mode != "hybrid"]
+        responses: List[Optional[RetrieveResponse]] = [None] * len(retrieve_requests)
+
+        if others:
+            for i, response in zip(others, self.vector_store.search_many([retrieve_requests[i] for i in others])):
+                responses[i] = response
+        if not hybrid:
+            return responses
+
+        hybrid_requests = [retrieve_requests[i] for i in hybrid]
+        # 两路检索并发执行，耗时取两者最大值
+        executor = _get_executor()
+        bm25_future = executor.submit(self._bm25_search, hybrid_requests)
+        vector_future = executor.submit(self._vector_search, hybrid_requests)
+        try:
+            bm25_lists = bm25_future.result()
+            bm25_error = None
+        except Exception as e:
+            logging.warning(f"BM25 search failed, falling back to vector results: {e}")
+            bm25_lists, bm25_error = [[] for _ in hybrid_requests], str(e)
+        try:
+            vector_responses = vector_future.result()
+        except Exception as e:
+            logging.warning(f"Vector search failed, falling back to BM25 results: {e}")
+            vector_responses = [RetrieveResponse(error_message=str(e)) for _ in hybrid_requests]
+
+        for i, retrieve_request, bm25_docs, vector_response in zip(
+                hybrid, hybrid_requests, bm25_lists, vector_responses
+        ):
+            if bm25_error and vector_response.error_message:
+                responses[i] = RetrieveResponse(error_message=f"{bm25_error}; {vector_response.error_message}")
+                continue
+            responses[i] = RetrieveResponse(docs=self._fuse(retrieve_request, [bm25_docs, vector_response.docs]))
+        return responses
+
+    def close(self) -> None:
+        """The searcher and thread pool are shared by the process; see `close_hybrid_resources`."""
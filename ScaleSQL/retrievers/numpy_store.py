@@ -0,0 +1,311 @@
+import json
+import logging
+import os
+import shutil
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+
+from ScaleSQL.retrievers.base import (
+    BaseVectorStore,
+    Condition,
+    RetrieveDoc,
+    RetrieveRequest,
+    RetrieveResponse,
+    validate_condition,
+)
+from ScaleSQL.retrievers.embedding import DEFAULT_EMBEDDING_MODEL_PATH, get_embedding_model
+from ScaleSQL.retrievers.query_cache import embed_queries
+
+Quantization = Literal["float16", "int8"]
+
+_INT8_SCALE = 127.0
+_MISSING = -1
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _vocab_key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def write_numpy_store(
+        path: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        quantization: Quantization = "float16",
+        model_id: Optional[str] = None,
+) -> None:
+    """Write a flat store to `path`, replacing any store already there.
+
+    Layout:
+        manifest.json       dtype, dimension, count, model id and metadata fields
+        vectors.npy         L2-normalized vectors, float16 or int8 (scaled by 127)
+        codes.npy           int32 (count, fields) dictionary codes of the metadata, -1 if missing
+        vocab.json          per field list of the distinct JSON-encoded values
+        documents.bin       utf-8 documents concatenated
+        offsets.npy         int64 (count + 1) byte offsets into documents.bin
+    """
+    if documents:
+        embeddings = _normalize(np.asarray(embeddings).reshape(len(documents), -1))
+    else:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+    if quantization == "int8":
+        vectors = np.clip(np.rint(embeddings * _INT8_SCALE), -127, 127).astype(np.int8)
+    elif quantization == "float16":
+        vectors = embeddings.astype(np.float16)
+    else:
+        raise ValueError(f"Unsupported quantization: {quantization}")
+
+    fields = sorted({field for metadata in metadatas for field in (metadata or {})})
+    vocab: Dict[str, Dict[str, int]] = {field: {} for field in fields}
+    codes = np.full((len(documents), len(fields)), _MISSING, dtype=np.int32)
+    for row, metadata in enumerate(metadatas):
+        for column, field in enumerate(fields):
+            if metadata and field in metadata:
+                codes[row, column] = vocab[field].setdefault(_vocab_key(metadata[field]), len(vocab[field]))
+
+    blobs = [document.encode("utf-8") for document in documents]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+
+    tmp_path = f"{path.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, "vectors.npy"), vectors)
+    np.save(os.path.join(tmp_path, "codes.npy"), codes)
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    with open(os.path.join(tmp_path, "documents.bin"), "wb") as f:
+        f.write(b"".join(blobs))
+    with open(os.path.join(tmp_path, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump({field: list(values) for field, values in vocab.items()}, f, ensure_ascii=False)
+    with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "dtype": quantization,
+                "dimension": int(vectors.shape[1]) if len(vectors) else 0,
+                "count": len(documents),
+                "model_id": model_id,
+                "fields": fields,
+            },
+            f,
+        )
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+def export_chroma_collection(
+        collection,
+        path: str,
+        quantization: Quantization = "float16",
+        model_id: Optional[str] = None,
+        page_size: int = 10000,
+) -> int:
+    """Copy the documents, metadata and embeddings of a Chroma collection into a flat store."""
+    documents, metadatas, embeddings = [], [], []
+    total = collection.count()
+    for offset in range(0, total, page_size):
+        page = collection.get(
+            include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset
+        )
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        embeddings.extend(page["embeddings"])
+    write_numpy_store(path, documents, metadatas, np.asarray(embeddings), quantization, model_id)
+    return total
+
+
+class NumpyVectorStore(BaseVectorStore):
+    """Exact-search vector store over memory-mapped NumPy arrays.
+
+    Meant for collections of up to a few hundred thousand vectors, where a brute-force matrix
+    multiply is as fast as an ANN index and opening the store is only a few `np.load` calls.
+    Distances are squared L2 between normalized vectors (`2 - 2 * cosine`), the same scale as a
+    Chroma collection queried with a normalizing model, so existing thresholds keep their meaning.
+    """
+
+    def __init__(
+            self,
+            store_path: str,
+            index_name: str,
+            embedding_model_path: str = DEFAULT_EMBEDDING_MODEL_PATH,
+            block_size: int = 65536,
+    ):
+        """
+        Args:
+            store_path: directory holding one sub directory per index.
+            index_name: name of the index, e.g. the database id.
+            embedding_model_path: local model used to embed queries and added documents.
+            block_size: rows scored per matrix multiply, bounds the temporary float32 copies.
+        """
+        super().__init__(index_name)
+        self.path = os.path.join(store_path, index_name)
+        self.embedding_model_path = embedding_model_path
+        self.block_size = block_size
+        self.vectors = None
+
+    def connect(self):
+        if self.vectors is not None:
+            return
+        start = time.perf_counter()
+        try:
+            with open(os.path.join(self.path, "manifest.json"), "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            with open(os.path.join(self.path, "vocab.json"), "r", encoding="utf-8") as f:
+                vocab = json.load(f)
+            self.vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+            self.codes = np.load(os.path.join(self.path, "codes.npy"), mmap_mode="r")
+            self.offsets = np.load(os.path.join(self.path, "offsets.npy"), mmap_mode="r")
+            documents_path = os.path.join(self.path, "documents.bin")
+            # np.memmap cannot map an empty file
+            if os.path.getsize(documents_path) > 0:
+                self.documents = np.memmap(documents_path, dtype=np.uint8, mode="r")
+            else:
+                self.documents = np.zeros(0, dtype=np.uint8)
+        except Exception as e:
+            raise Exception(f"Error opening numpy vector store {self.path}: {e}") from e
+        self.fields = {field: column for column, field in enumerate(self.manifest["fields"])}
+        self.vocab = vocab
+        self.vocab_index = {
+            field: {value: code for code, value in enumerate(values)} for field, values in vocab.items()
+        }
+        logging.info(
+            f"Opened numpy vector store {self.path} ({self.manifest['count']} vectors) "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    def disconnect(self):
+        self.vectors = None
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return get_embedding_model(self.embedding_model_path).encode(texts, normalize=True)
+
+    def _embed_queries(self, texts: List[str]) -> np.ndarray:
+        return _normalize(embed_queries(get_embedding_model(self.embedding_model_path), texts))
+
+    def _document(self, row: int) -> str:
+        return bytes(self.documents[self.offsets[row]: self.offsets[row + 1]]).decode("utf-8")
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        metadata = {}
+        for field, column in self.fields.items():
+            code = self.codes[row, column]
+            if code != _MISSING:
+                metadata[field] = json.loads(self.vocab[field][code])
+        return metadata
+
+    def add_documents(self, documents: List[RetrieveDoc]) -> List[str]:
+        """Append documents by rewriting the store; flat stores are built once and rarely updated."""
+        self.connect()
+        count = self.manifest["count"]
+        contents = [self._document(row) for row in range(count)] + [document.content for document in documents]
+        metadatas = [self._metadata(row) for row in range(count)] + [document.biz_data for document in documents]
+        new_vectors = self._embed([document.content for document in documents])
+        old_vectors = np.asarray(self.vectors, dtype=np.float32)
+        if self.manifest["dtype"] == "int8":
+            old_vectors = old_vectors / _INT8_SCALE
+        embeddings = np.concatenate([old_vectors.reshape(count, -1), new_vectors]) if count else new_vectors
+        self.disconnect()
+        write_numpy_store(
+            self.path, contents, metadatas, embeddings, self.manifest["dtype"], self.manifest.get("model_id")
+        )
+        return [str(row) for row in range(count, count + len(documents))]
+
+    def _condition_mask(self, condition: Condition) -> np.ndarray:
+        operator = validate_condition(condition)
+        if condition.field in self.fields:
+            index = self.vocab_index[condition.field]
+            wanted = [index[key] for key in (_vocab_key(value) for value in condition.value) if key in index]
+            mask = np.isin(self.codes[:, self.fields[condition.field]], wanted)
+        else:
+            mask = np.zeros(self.manifest["count"], dtype=bool)
+        return mask if operator in ("=", "in") else ~mask
+
+    def _candidate_rows(self, filter_conditions: List[Condition]) -> Optional[np.ndarray]:
+        if not filter_conditions:
+            return None
+        mask = np.ones(self.manifest["count"], dtype=bool)
+        for condition in filter_conditions:
+            mask &= self._condition_mask(condition)
+        return np.flatnonzero(mask)
+
+    def _similarities(self, rows: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+        total = self.manifest["count"] if rows is None else len(rows)
+        similarities = np.empty((total, len(queries)), dtype=np.float32)
+        for start in range(0, total, self.block_size):
+            end = min(start + self.block_size, total)
+            block = self.vectors[start:end] if rows is None else self.vectors[rows[start:end]]
+            similarities[start:end] = np.asarray(block, dtype=np.float32) @ queries.T
+        if self.manifest["dtype"] == "int8":
+            similarities /= _INT8_SCALE
+        return similarities
+
+    def search(self, retrieve_request: RetrieveRequest) -> RetrieveResponse:
+        return self.search_many([retrieve_request])[0]
+
+    def search_many(self, retrieve_requests: List[RetrieveRequest]) -> List[RetrieveResponse]:
+        """Exact top-k: requests with the same filters share one mask and one matrix multiply.
+
+        Raises:
+            RetrieveServiceException: a filter condition is not supported, as in `ChromaVectorStore`.
+        """
+        responses: List[Optional[RetrieveResponse]] = [None] * len(retrieve_requests)
+        if not retrieve_requests:
+            return responses
+        # invalid filters raise instead of being reported per request, whichever backend is used
+        for retrieve_request in retrieve_requests:
+            for condition in retrieve_request.filter_conditions or []:
+                validate_condition(condition)
+        try:
+            self.connect()
+            queries = self._embed_queries([retrieve_request.search_query for retrieve_request in retrieve_requests])
+        except Exception as e:
+            return [RetrieveResponse(error_message=str(e)) for _ in retrieve_requests]
+
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for i, retrieve_request in enumerate(retrieve_requests):
+            key = json.dumps(
+                [condition.model_dump() for condition in retrieve_request.filter_conditions or []],
+                sort_keys=True,
+                default=str,
+            )
+            groups[key].append(i)
+
+        for indices in groups.values():
+            try:
+                rows = self._candidate_rows(retrieve_requests[indices[0]].filter_conditions)
+                similarities = self._similarities(rows, queries[indices])
+                for column, i in enumerate(indices):
+                    responses[i] = RetrieveResponse(
+                        docs=self._top_k(retrieve_requests[i], rows, similarities[:, column])
+                    )
+            except Exception as e:
+                for i in indices:
+                    responses[i] = RetrieveResponse(error_message=str(e))
+        return responses
+
+    def _top_k(
+            self, retrieve_request: RetrieveRequest, rows: Optional[np.ndarray], similarities: np.ndarray
+    ) -> List[RetrieveDoc]:
+        k = min(retrieve_request.k, len(similarities))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        docs = []
+        for position in top:
+            distance = max(0.0, 2.0 - 2.0 * float(similarities[position]))
+            # 只保留那些满足质量阈值（距离足够近）的结果
+            if distance < retrieve_request.threshold:
+                row = int(position if rows is None else rows[position])
+                docs.append(RetrieveDoc(content=self._document(row), biz_data=self._metadata(row)))
+        return docs
@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ScaleSQL.retrievers.embedding import EmbeddingModel
+
+_KEY_SIZE = 16
+_HEADER_SIZE = 16
+
+
+def _query_key(model_id: str, text: str) -> bytes:
+    data = f"{model_id}\0{text}".encode("utf-8", errors="surrogatepass")
+    return hashlib.blake2b(data, digest_size=_KEY_SIZE).digest()
+
+
+class SharedQueryEmbeddings(object):
+    """Direct-mapped table of query embeddings in `multiprocessing.shared_memory`.
+
+    Worker processes attach to the block by name, so an embedding computed by one worker is
+    visible to the others. Each slot holds a checksum, the 16-byte key and the float32 vector.
+    Slots are written without cross-process locks; a reader verifies the checksum over key and
+    vector, so a slot torn by concurrent writers reads as a miss. A colliding key overwrites the slot.
+    """
+
+    def __init__(self, shm, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((2,), dtype=np.int64, buffer=shm.buf)
+        self.slots, self.dimension = int(header[0]), int(header[1])
+        offset = _HEADER_SIZE
+        self.checksums = np.ndarray((self.slots,), dtype=np.uint64, buffer=shm.buf, offset=offset)
+        offset += self.slots * 8
+        self.keys = np.ndarray((self.slots, _KEY_SIZE), dtype=np.uint8, buffer=shm.buf, offset=offset)
+        offset += self.slots * _KEY_SIZE
+        self.vectors = np.ndarray((self.slots, self.dimension), dtype=np.float32, buffer=shm.buf, offset=offset)
+
+    @classmethod
+    def create(cls, name: Optional[str], slots: int, dimension: int) -> "SharedQueryEmbeddings":
+        from multiprocessing import shared_memory
+
+        size = _HEADER_SIZE + slots * (8 + _KEY_SIZE + 4 * dimension)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        np.ndarray((2,), dtype=np.int64, buffer=shm.buf)[:] = (slots, dimension)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedQueryEmbeddings":
+        from multiprocessing import resource_tracker, shared_memory
+
+        shm = shared_memory.SharedMemory(name=name)
+        # Python 3.13 之前附加进程退出时 resource_tracker 会删除共享内存，只应由创建者删除
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, owner=False)
+
+    @classmethod
+    def open(cls, name: str, slots: int, dimension: int, attempts: int = 50) -> "SharedQueryEmbeddings":
+        """Attach to the table `name`, creating it when it does not exist yet.
+
+        Workers that start together race to create the block: the loser of `create` gets
+        `FileExistsError` and attaches instead, and a block whose creator has not written the
+        header yet (zero slots) is attached again shortly after.
+        """
+        for _ in range(attempts):
+            try:
+                shared = cls.attach(name)
+            except FileNotFoundError:
+                try:
+                    return cls.create(name, slots, dimension)
+                except FileExistsError:
+                    continue
+            if shared.slots > 0:
+                return shared
+            shared.close()
+            time.sleep(0.01)
+        raise RuntimeError(f"Shared query embeddings {name} were not initialised by their creator")
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _slot(self, key: bytes) -> int:
+        return int.from_bytes(key[:8], "little") % self.slots
+
+    @staticmethod
+    def _checksum(key: bytes, vector: np.ndarray) -> int:
+        digest = hashlib.blake2b(key + vector.tobytes(), digest_size=8).digest()
+        # 0 表示空槽位
+        return int.from_bytes(digest, "little") or 1
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        slot = self._slot(key)
+        checksum = int(self.checksums[slot])
+        if checksum == 0 or self.keys[slot].tobytes() != key:
+            return None
+        vector = self.vectors[slot].copy()
+        if self._checksum(key, vector) != checksum:
+            return None
+        return vector
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        slot = self._slot(key)
+        vector = np.asarray(vector, dtype=np.float32)
+        self.checksums[slot] = 0
+        self.keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self.vectors[slot] = vector
+        self.checksums[slot] = self._checksum(key, vector)
+
+    def close(self) -> None:
+        # numpy 视图引用共享内存缓冲区，需先释放才能关闭
+        self.checksums = self.keys = self.vectors = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class QueryEmbeddingCache(object):
+    """Bounded, thread-safe LRU cache of query embeddings keyed by (model id, text).
+
+    Retrieval sends the same literals and skeletons again and again, across questions and across
+    the candidate fan-out of one question; cached queries skip the model entirely. With a
+    `SharedQueryEmbeddings` table attached, misses of the local LRU are looked up in and written to
+    shared memory so that worker processes reuse each other's embeddings.
+    """
+
+    def __init__(self, capacity: int = 100000, shared: Optional[SharedQueryEmbeddings] = None):
+        self.capacity = capacity
+        self.shared = shared
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _get(self, key: bytes) -> Optional[np.ndarray]:
+        with self.lock:
+            vector = self.entries.get(key)
+            if vector is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return vector
+        if self.shared is not None:
+            vector = self.shared.get(key)
+            if vector is not None:
+                with self.lock:
+                    self.stats["shared_hits"] += 1
+                self._put(key, vector, share=False)
+                return vector
+        with self.lock:
+            self.stats["misses"] += 1
+        return None
+
+    def _put(self, key: bytes, vector: np.ndarray, share: bool = True) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self.lock:
+            self.entries[key] = vector
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        if share and self.shared is not None and len(vector) == self.shared.dimension:
+            self.shared.put(key, vector)
+
+    def embed(self, embedding_model: EmbeddingModel, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        """Embeddings of `texts` in order; only texts missing from the cache are encoded, each once."""
+        keys = [_query_key(embedding_model.model_id, text) for text in texts]
+        embeddings = np.zeros((len(texts), embedding_model.dimension), dtype=np.float32)
+        missing: Dict[bytes, List[int]] = OrderedDict()
+        for position, key in enumerate(keys):
+            vector = self._get(key) if key not in missing else None
+            if vector is None:
+                missing.setdefault(key, []).append(position)
+            else:
+                embeddings[position] = vector
+        if missing:
+            encoded = embedding_model.encode(
+                [texts[positions[0]] for positions in missing.values()], batch_size=batch_size
+            )
+            for (key, positions), vector in zip(missing.items(), encoded):
+                embeddings[positions] = vector
+                self._put(key, vector)
+        return embeddings
+
+    def hit_rate(self) -> float:
+        with self.lock:
+            hits = self.stats["hits"] + self.stats["shared_hits"]
+            total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            metrics = dict(self.stats, size=len(self.entries), capacity=self.capacity)
+        metrics["hit_rate"] = round(self.hit_rate(), 4)
+        return metrics
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+_query_cache: Optional[QueryEmbeddingCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Return the process-wide query cache, creating it with default settings on first use."""
+    global _query_cache
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                _query_cache = QueryEmbeddingCache()
+    return _query_cache
+
+
+def init_query_cache(configs: Dict[str, Any]) -> QueryEmbeddingCache:
+    """Create the process-wide query cache from the `query_cache` section of the pipeline config.
+
+    With `shared_memory_name` set, the first process creates the shared table of `shared_slots`
+    vectors and later processes attach to it.
+    """
+    global _query_cache
+    cache_config = configs.get("query_cache") or {}
+    shared = None
+    name = cache_config.get("shared_memory_name")
+    if name:
+        dimension = cache_config.get("embedding_dim", 384)
+        shared = SharedQueryEmbeddings.open(name, cache_config.get("shared_slots", 65536), dimension)
+        if shared.dimension != dimension:
+            # 例如上次运行遗留的、其他模型的共享内存：不共享，只使用进程内缓存
+            logging.warning(
+                f"Shared memory {name} holds {shared.dimension}-d embeddings, expected {dimension}; "
+                f"query embeddings are cached per process only"
+            )
+            shared.close()
+            shared = None
+        else:
+            logging.info(f"Query embedding cache attached to shared memory {name} ({shared.slots} slots)")
+    with _query_cache_lock:
+        _query_cache = QueryEmbeddingCache(capacity=cache_config.get("capacity", 100000), shared=shared)
+    return _query_cache
+
+
+def embed_queries(embedding_model: EmbeddingModel, texts: List[str]) -> np.ndarray:
+    """Embed retrieval queries through the process-wide cache."""
+    return get_query_cache().embed(embedding_model, texts)
+
@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+from chromadb.config import Settings
+
+
+class ChromaRegistry(object):
+    """Process-wide registry of open Chroma clients and collections.
+
+    Clients are keyed by path and collections by (path, name), so repeated retrievals reuse the
+    already loaded SQLite metadata and HNSW segments instead of reopening them. Clients are opened
+    with Chroma's LRU segment cache limited to `memory_budget_mb`, so Chroma itself unloads the
+    least recently used segments; the registry drops its collection handles in the same order.
+    Chroma keeps one client per path and process, so the settings cannot change once a path is open.
+    """
+
+    def __init__(self, memory_budget_mb: float = 4096, embedding_dim: int = 384):
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self.embedding_dim = embedding_dim
+        self.lock = threading.RLock()
+        self.clients: Dict[str, Any] = {}
+        self.collections: "OrderedDict[Tuple[str, str, Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self.metrics: Dict[str, float] = {
+            "client_opens": 0,
+            "client_open_sec": 0.0,
+            "collection_loads": 0,
+            "collection_load_sec": 0.0,
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def get_client(self, path: str):
+        with self.lock:
+            if path not in self.clients:
+                start = time.perf_counter()
+                self.clients[path] = chromadb.PersistentClient(
+                    path=path,
+                    settings=Settings(
+                        chroma_segment_cache_policy="LRU",
+                        chroma_memory_limit_bytes=int(self.memory_budget_bytes),
+                    ),
+                )
+                self.metrics["client_opens"] += 1
+                self.metrics["client_open_sec"] += time.perf_counter() - start
+            return self.clients[path]
+
+    def _estimate_bytes(self, collection) -> int:
+        # HNSW 向量 (float32) 加上元数据与图结构的粗略开销
+        return collection.count() * (self.embedding_dim * 4 + 256)
+
+    def get_collection(self, path: str, name: str, embedding_function=None, create: bool = True):
+        """Return the open collection `name` under `path`, opening it on first use.
+
+        Handles are cached per embedding model, so a collection opened without an embedding
+        function is never returned to a caller that asked for one.
+        """
+        key = (path, name, getattr(embedding_function, "model_name", None))
+        with self.lock:
+            if key in self.collections:
+                self.collections.move_to_end(key)
+                self.metrics["hits"] += 1
+                return self.collections[key]["collection"]
+
+            self.metrics["misses"] += 1
+            client = self.get_client(path)
+            start = time.perf_counter()
+            kwargs = {"name": name}
+            if embedding_function is not None:
+                kwargs["embedding_function"] = embedding_function
+            if create:
+                collection = client.get_or_create_collection(**kwargs)
+            else:
+                collection = client.get_collection(**kwargs)
+            self.metrics["collection_loads"] += 1
+            self.metrics["collection_load_sec"] += time.perf_counter() - start
+
+            self.collections[key] = {"collection": collection, "bytes": self._estimate_bytes(collection)}
+            self._evict(keep=key)
+            return collection
+
+    def _evict(self, keep: Tuple[str, str, Optional[str]]) -> None:
+        # the segments themselves are unloaded by chroma's LRU cache; this only releases the handles
+        total = sum(entry["bytes"] for entry in self.collections.values())
+        while total > self.memory_budget_bytes and len(self.collections) > 1:
+            key = next(iter(self.collections))
+            if key == keep:
+                self.collections.move_to_end(key)
+                continue
+            entry = self.collections.pop(key)
+            total -= entry["bytes"]
+            self.metrics["evictions"] += 1
+            logging.info(f"Evicted chroma collection {key} ({entry['bytes'] / 1024 / 1024:.1f} MB)")
+
+    def warm_up(self, collections: List[Dict[str, str]]) -> None:
+        """Open the named collections and run one query each so that their HNSW index is loaded.
+
+        Args:
+            collections: items of the form {"path": ..., "name": ...} with an optional
+                "embedding_model_path" of the local model used to query the collection.
+        """
+        from ScaleSQL.retrievers.embedding import get_embedding_function
+
+        for item in collections:
+            start = time.perf_counter()
+            try:
+                embedding_function = None
+                if item.get("embedding_model_path"):
+                    embedding_function = get_embedding_function(item["embedding_model_path"])
+                collection = self.get_collection(
+                    item["path"], item["name"], embedding_function=embedding_function, create=False
+                )
+                sample = collection.peek(limit=1)
+                embeddings = sample.get("embeddings")
+                if embeddings is not None and len(embeddings) > 0:
+                    collection.query(query_embeddings=[embeddings[0]], n_results=1)
+                logging.info(
+                    f"Warmed up chroma collection {item['name']} in {time.perf_counter() - start:.2f}s"
+                )
+            except Exception as e:
+                logging.warning(f"Warm up chroma collection {item} failed: {e}")
+
+    def invalidate(self, path: str, name: Optional[str] = None) -> None:
+        """Forget cached collections of `path` (or only `name`), e.g. after they were rebuilt."""
+        with self.lock:
+            for key in list(self.collections):
+                if key[0] == path and (name is None or key[1] == name):
+                    self.collections.pop(key)
+
+    def get_metrics(self) -> Dict[str, float]:
+        with self.lock:
+            return dict(
+                self.metrics,
+                open_clients=len(self.clients),
+                open_collections=len(self.collections),
+                estimated_mb=sum(entry["bytes"] for entry in self.collections.values()) / 1024 / 1024,
+            )
+
+
+_registry: Optional[ChromaRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_chroma_registry() -> ChromaRegistry:
+    """Return the process-wide registry, creating it with default settings on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ChromaRegistry()
+    return _registry
+
+
+def init_chroma_registry(configs: Dict[str, Any]) -> ChromaRegistry:
+    """Create the process-wide registry from the `chroma_registry` section of the pipeline config
+    and warm up the collections listed there."""
+    global _registry
+    registry_config = configs.get("chroma_registry") or {}
+    with _registry_lock:
+        _registry = ChromaRegistry(
+            memory_budget_mb=registry_config.get("memory_budget_mb", 4096),
+            embedding_dim=registry_config.get("embedding_dim", 384),
+        )
+    _registry.warm_up(registry_config.get("warm_up_collections") or [])
+    return _registry
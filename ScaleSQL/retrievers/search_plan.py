@@ -0,0 +1,66 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+SEARCH_PLAN_FILE = "search_plan.json"
+
+# single-query latency of brute force and HNSW break even around 10k vectors, see benchmarks/search_plan_benchmark.py
+DEFAULT_EXACT_SEARCH_THRESHOLD = 10000
+
+
+def choose_hnsw_params(count: int, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """HNSW parameters for a collection of `count` vectors.
+
+    Chroma's defaults (M=16, ef_construction=100, ef_search=100) lose recall on large collections
+    at our distance thresholds; larger graphs get more links and a wider search beam. Values in
+    `overrides` (keys "M", "ef_construction", "ef_search") take precedence.
+    """
+    if count < 500000:
+        params = {"M": 16, "ef_construction": 200, "ef_search": 128}
+    elif count < 2000000:
+        params = {"M": 32, "ef_construction": 300, "ef_search": 192}
+    else:
+        params = {"M": 48, "ef_construction": 400, "ef_search": 256}
+    params.update({key: value for key, value in (overrides or {}).items() if value is not None})
+    return params
+
+
+def hnsw_configuration(params: Dict[str, int]) -> Dict[str, Any]:
+    """Chroma collection configuration for the given HNSW parameters."""
+    return {
+        "hnsw": {
+            "max_neighbors": params["M"],
+            "ef_construction": params["ef_construction"],
+            "ef_search": params["ef_search"],
+        }
+    }
+
+
+def choose_search_plan(
+        count: int,
+        exact_threshold: int = DEFAULT_EXACT_SEARCH_THRESHOLD,
+        hnsw_overrides: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """Exact brute-force search below `exact_threshold` vectors, tuned HNSW above it."""
+    if count < exact_threshold:
+        return {"backend": "numpy", "count": count}
+    return {"backend": "chroma", "count": count, "hnsw": choose_hnsw_params(count, hnsw_overrides)}
+
+
+def load_search_plans(chroma_path: str) -> Dict[str, Dict[str, Any]]:
+    """Per-collection plans recorded by `ChromaWriter` under the Chroma client path, empty if none."""
+    plan_path = os.path.join(chroma_path, SEARCH_PLAN_FILE)
+    if not os.path.exists(plan_path):
+        return {}
+    with open(plan_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_search_plans(chroma_path: str, plans: Dict[str, Dict[str, Any]]) -> None:
+    """Merge `plans` into the manifest; written to a temporary file and renamed into place."""
+    merged = {**load_search_plans(chroma_path), **plans}
+    plan_path = os.path.join(chroma_path, SEARCH_PLAN_FILE)
+    tmp_path = plan_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, plan_path)
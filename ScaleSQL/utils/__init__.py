@@ -1,33 +1,60 @@
+from .column_policy import ColumnPolicy
+from .ddl_store import DDLSchemaStore, render_ddl, write_ddl_store
+from .jsonl_store import JsonlAppender, compact_jsonl, iter_jsonl, write_json_atomic
 from .load_env import read_env
-from .markdown import dict_to_markdown
+from .markdown import dict_to_markdown, markdown_table
 from .qwen_count_token import count_qwen_tokens
-from .timeout import timeout
+from .sampling import reservoir_sample, sample_distinct_values
+from .schema_store import SchemaStore, load_schema_artifact, schema_store_path, write_schema_store
+from .timeout import async_timeout, get_timeout_stats, register_cancel_hook, timeout
 from .utils import (
     display_execution_result,
     display_for_merge,
     display_for_selection,
     display_matched_contents,
     display_similar_questions,
+    filter_valid_candidates,
     read_json,
     save_or_append_json,
     get_cursor_from_path,
+    open_cursor_from_path,
     get_worker_db_uri
 )
 from .logging import setup_logging
 
 __all__ = [
+    "ColumnPolicy",
+    "DDLSchemaStore",
+    "render_ddl",
+    "write_ddl_store",
     "read_json",
     "save_or_append_json",
+    "JsonlAppender",
+    "compact_jsonl",
+    "iter_jsonl",
+    "write_json_atomic",
     "read_env",
     "dict_to_markdown",
+    "markdown_table",
     "count_qwen_tokens",
+    "reservoir_sample",
+    "sample_distinct_values",
+    "SchemaStore",
+    "load_schema_artifact",
+    "schema_store_path",
+    "write_schema_store",
     "timeout",
+    "async_timeout",
+    "get_timeout_stats",
+    "register_cancel_hook",
     "display_execution_result",
     "display_for_merge",
     "display_for_selection",
     "display_matched_contents",
     "display_similar_questions",
+    "filter_valid_candidates",
     "setup_logging",
     "get_cursor_from_path",
+    "open_cursor_from_path",
     "get_worker_db_uri"
 ]
@@ -0,0 +1,196 @@
+import logging
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import sqlglot
+from sqlglot import exp
+
+IndexTarget = Tuple[str, Tuple[str, ...]]
+
+_INDEX_NAME_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+_STAT_TABLES = ("sqlite_stat1", "sqlite_stat4")
+
+
+def _quote(identifier: str) -> str:
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def _existing_index_prefixes(conn: sqlite3.Connection, table: str) -> List[Tuple[str, ...]]:
+    """
+    Return the (lower-cased) column lists already covered by an index of `table`,
+    including the implicit rowid alias of an INTEGER PRIMARY KEY column.
+    """
+    prefixes = []
+    for _, index_name, *_ in conn.execute(f"PRAGMA index_list({_quote(table)})").fetchall():
+        columns = conn.execute(f"PRAGMA index_info({_quote(index_name)})").fetchall()
+        prefixes.append(tuple(col[2].lower() for col in sorted(columns) if col[2] is not None))
+
+    table_info = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+    pk_columns = [col for col in table_info if col[5] > 0]
+    if len(pk_columns) == 1 and pk_columns[0][2].upper() == "INTEGER":
+        prefixes.append((pk_columns[0][1].lower(),))
+    return prefixes
+
+
+def _table_columns(conn: sqlite3.Connection) -> Dict[str, Tuple[str, Dict[str, str]]]:
+    """
+    Map lower-cased table name -> (original table name, {lower-cased column: original column}).
+    """
+    tables = {}
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for (table,) in rows:
+        columns = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+        tables[table.lower()] = (table, {col[1].lower(): col[1] for col in columns})
+    return tables
+
+
+def collect_index_targets(
+    conn: sqlite3.Connection,
+    db_info: Optional[Dict] = None,
+    filter_columns: Optional[Iterable[str]] = None,
+) -> List[IndexTarget]:
+    """
+    Collect the column lists worth indexing for a database.
+
+    Args:
+        conn: connection to the (in-memory) database copy.
+        db_info: the `tables.json` entry of the database. When omitted, primary and
+            foreign keys are read from the SQLite schema itself.
+        filter_columns: extra "table.column" names that candidate SQL filters on.
+
+    Returns:
+        List[IndexTarget]: de-duplicated (table, columns) pairs using the original casing.
+    """
+    tables = _table_columns(conn)
+    targets: List[IndexTarget] = []
+
+    def add(table: str, columns: Sequence[str]) -> None:
+        if table.lower() not in tables or not columns:
+            return
+        table, table_columns = tables[table.lower()]
+        if any(column.lower() not in table_columns for column in columns):
+            return
+        target = (table, tuple(table_columns[column.lower()] for column in columns))
+        if target not in targets:
+            targets.append(target)
+
+    if db_info:
+        table_names = db_info["table_names_original"]
+        column_names = db_info["column_names_original"]
+        for primary_key in db_info.get("primary_keys", []):
+            column_ids = primary_key if isinstance(primary_key, list) else [primary_key]
+            table_ids = {column_names[i][0] for i in column_ids}
+            if len(table_ids) == 1:
+                add(table_names[table_ids.pop()], [column_names[i][1] for i in column_ids])
+        for source_column_id, target_column_id in db_info.get("foreign_keys", []):
+            for column_id in (source_column_id, target_column_id):
+                table_id, column_name = column_names[column_id]
+                add(table_names[table_id], [column_name])
+    else:
+        for table, _ in tables.values():
+            table_info = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+            pk_columns = [col[1] for col in sorted(table_info, key=lambda c: c[5]) if col[5] > 0]
+            add(table, pk_columns)
+            for fk in conn.execute(f"PRAGMA foreign_key_list({_quote(table)})").fetchall():
+                add(table, [fk[3]])
+                if fk[4]:
+                    add(fk[2], [fk[4]])
+
+    for name in filter_columns or []:
+        if "." not in name:
+            continue
+        table, column = name.rsplit(".", 1)
+        add(table, [column])
+
+    return targets
+
+
+def create_auto_indexes(
+    conn: sqlite3.Connection,
+    db_info: Optional[Dict] = None,
+    filter_columns: Optional[Iterable[str]] = None,
+    analyze: bool = True,
+) -> List[str]:
+    """
+    Create indexes on primary-key, foreign-key and frequently filtered columns of a
+    private database copy, then run ANALYZE so the planner can use them.
+
+    Indexes never change the set of rows a query returns, only the plan used to find them,
+    with one exception: a LIMIT without an ORDER BY that fixes the order may return other rows
+    of the same result. The statistics tables that ANALYZE creates are dropped again once the
+    statistics are loaded, so `sqlite_master` lists the same tables as the original database;
+    the statistics stay in effect on `conn` until its schema is reloaded.
+
+    Returns:
+        List[str]: names of the indexes that were created.
+    """
+    created = []
+    for table, columns in collect_index_targets(conn, db_info, filter_columns):
+        lowered = tuple(column.lower() for column in columns)
+        if any(prefix[: len(lowered)] == lowered for prefix in _existing_index_prefixes(conn, table)):
+            continue
+        index_name = _INDEX_NAME_PATTERN.sub("_", "auto_idx_{}_{}".format(table, "_".join(columns)))
+        statement = "CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+            _quote(index_name), _quote(table), ", ".join(_quote(column) for column in columns)
+        )
+        try:
+            conn.execute(statement)
+            created.append(index_name)
+        except sqlite3.Error as e:
+            # virtual tables, views or unusual schemas, the copy simply stays unindexed
+            logging.warning(f"Skip auto index on {table}{columns}: {e}")
+
+    if analyze:
+        existing = {
+            name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'sqlite_stat%'"
+            ).fetchall()
+        }
+        conn.execute("ANALYZE")
+        for table in _STAT_TABLES:
+            if table not in existing:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.commit()
+    logging.info(f"Created {len(created)} auto indexes: {created}")
+    return created
+
+
+def count_filter_columns(sql_list: Iterable[str], dialect: str = "sqlite") -> Counter:
+    """
+    Count how often each "table.column" appears in WHERE and JOIN ... ON predicates
+    of the given SQL, resolving table aliases. Unqualified columns are only attributed
+    when the query reads from a single table.
+    """
+    counter = Counter()
+    for sql in sql_list:
+        try:
+            tree = sqlglot.parse_one(sql, read=dialect)
+        except Exception:
+            continue
+        if tree is None:
+            continue
+        for select in tree.find_all(exp.Select):
+            aliases = {}
+            for table in select.find_all(exp.Table):
+                aliases[(table.alias_or_name or "").lower()] = table.name
+            predicates = []
+            if select.args.get("where") is not None:
+                predicates.append(select.args["where"])
+            for join in select.args.get("joins") or []:
+                if join.args.get("on") is not None:
+                    predicates.append(join.args["on"])
+            for predicate in predicates:
+                for column in predicate.find_all(exp.Column):
+                    if column.table:
+                        table_name = aliases.get(column.table.lower())
+                    elif len(set(aliases.values())) == 1:
+                        table_name = next(iter(aliases.values()))
+                    else:
+                        table_name = None
+                    if table_name:
+                        counter[f"{table_name}.{column.name}"] += 1
+    return counter
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+
+class ColumnProfile(BaseModel):
+    """列的统计信息"""
+
+    table: str
+    column: str
+    rows: Optional[int] = Field(default=None, description="非空行数，只在需要计算占比时统计")
+    distinct: int = Field(default=0, description="不同值个数")
+
+    @property
+    def distinct_ratio(self) -> Optional[float]:
+        if self.rows is None:
+            return None
+        return self.distinct / self.rows if self.rows else 0.0
+
+
+class ColumnDecision(BaseModel):
+    db_id: Optional[str] = Field(default=None)
+    table: str
+    column: str
+    rows: Optional[int]
+    distinct: int
+    distinct_ratio: Optional[float]
+    indexed: bool
+    reason: str
+
+
+def count_rows(cursor, table_name: str, column_name: str) -> int:
+    cursor.execute(f"SELECT COUNT(`{column_name}`) FROM `{table_name}`")
+    return cursor.fetchone()[0]
+
+
+class ColumnPolicy(object):
+    """
+    按基数决定列是否建立索引：不同值个数 ≤ max_distinct 或 不同值占比 ≤ max_distinct_ratio 时建立索引。
+    判断基于构建器本来就要读取的 SELECT DISTINCT 结果，不额外扫描列。
+    两个阈值都为空时所有列都建立索引。每列的决策记录在 decisions 中，可通过 write_report 写出。
+    """
+
+    def __init__(
+            self,
+            max_distinct: Optional[int] = None,
+            max_distinct_ratio: Optional[float] = None,
+    ):
+        self.max_distinct = max_distinct
+        self.max_distinct_ratio = max_distinct_ratio
+        self.decisions: List[ColumnDecision] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, configs: Optional[Dict[str, Any]]) -> Optional["ColumnPolicy"]:
+        """从配置中的 column_policy 段创建，未配置时返回 None（默认不启用，索引内容与按列名筛选时相同）"""
+        if not configs:
+            return None
+        return cls(
+            max_distinct=configs.get("max_distinct"),
+            max_distinct_ratio=configs.get("max_distinct_ratio"),
+        )
+
+    def evaluate(self, profile: ColumnProfile) -> Tuple[bool, str]:
+        if self.max_distinct is None and self.max_distinct_ratio is None:
+            return True, "no cardinality limit"
+        if self.max_distinct is not None and profile.distinct <= self.max_distinct:
+            return True, f"distinct {profile.distinct} <= {self.max_distinct}"
+        if self.max_distinct_ratio is not None and profile.distinct_ratio <= self.max_distinct_ratio:
+            return True, f"distinct ratio {profile.distinct_ratio:.4f} <= {self.max_distinct_ratio}"
+        if profile.distinct_ratio is None:
+            return False, f"distinct {profile.distinct} above limit"
+        return False, f"distinct {profile.distinct} / ratio {profile.distinct_ratio:.4f} above limits"
+
+    def should_index(
+            self, cursor, table_name: str, column_name: str, distinct_values: Sequence[Any], db_id: Optional[str] = None
+    ) -> bool:
+        """
+        按构建器已经读取的不同值决定是否为该列建立索引并记录决策：不同值个数直接取 len(distinct_values)，
+        不再单独扫描列；只有绝对阈值不满足且配置了占比阈值时，才用 COUNT 统计非空行数。
+        """
+        profile = ColumnProfile(table=table_name, column=column_name, distinct=len(distinct_values))
+        if self.max_distinct_ratio is not None and not (
+                self.max_distinct is not None and profile.distinct <= self.max_distinct
+        ):
+            profile.rows = count_rows(cursor, table_name, column_name)
+        indexed, reason = self.evaluate(profile)
+        with self._lock:
+            self.decisions.append(
+                ColumnDecision(
+                    db_id=db_id,
+                    table=table_name,
+                    column=column_name,
+                    rows=profile.rows,
+                    distinct=profile.distinct,
+                    distinct_ratio=None if profile.distinct_ratio is None else round(profile.distinct_ratio, 6),
+                    indexed=indexed,
+                    reason=reason,
+                )
+            )
+        if not indexed:
+            logging.info(f"Skipping column {column_name} in table {table_name}: {reason}")
+        return indexed
+
+    def write_report(self, report_path: str) -> None:
+        with self._lock:
+            decisions = [decision.model_dump() for decision in self.decisions]
+        skipped = [decision for decision in decisions if not decision["indexed"]]
+        report = {
+            "max_distinct": self.max_distinct,
+            "max_distinct_ratio": self.max_distinct_ratio,
+            "columns": len(decisions),
+            "indexed_columns": len(decisions) - len(skipped),
+            "skipped_rows": sum(decision["rows"] or 0 for decision in skipped),
+            "decisions": decisions,
+        }
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logging.info(
+            f"Column policy report written to {report_path}: "
+            f"{report['indexed_columns']}/{report['columns']} columns indexed"
+        )
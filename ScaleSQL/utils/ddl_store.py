@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+from ScaleSQL.utils.schema_store import SchemaStore, schema_store_path, write_schema_store
+
+BASE_SUFFIX = ".base.json"
+MAX_EXAMPLE_VALUES = 6
+
+
+def ddl_base_path(json_path: str) -> str:
+    """DDL 产物中各数据库基础模板的路径，如 bird_dev_ddl_schema.json -> bird_dev_ddl_schema.base.json"""
+    return os.path.splitext(schema_store_path(json_path))[0] + BASE_SUFFIX
+
+
+def base_key(base: Dict[str, Any]) -> str:
+    """按内容寻址的模板键：结构与采样值完全相同的数据库共用同一份模板"""
+    data = json.dumps(base, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def render_ddl(base: Dict[str, Any], values: Optional[Dict[str, List[Any]]] = None) -> str:
+    """
+    由数据库模板与单个问题的相关取值（{"table.column": [value, ...]}，键为小写）还原该问题的完整 DDL。
+    与逐问题生成的文本逐字节一致：相关取值排在采样值之前，按 repr 去重后保留前 6 个，以 Python 列表形式写入注释。
+    """
+    values = values or {}
+    tables = []
+    for table in base["tables"]:
+        lines = []
+        for line in table["lines"]:
+            if isinstance(line, str):
+                lines.append(line)
+                continue
+            examples = [repr(value) for value in values.get(line["key"], [])] + line["values"]
+            examples = list(dict.fromkeys(examples))[:MAX_EXAMPLE_VALUES]
+            if examples:
+                lines.append(line["text"] + line["sep"] + "[" + ", ".join(examples) + "]")
+            else:
+                lines.append(line["text"])
+        table_ddl = table["header"] + "\n".join(lines)
+        if table_ddl.endswith(","):
+            table_ddl = table_ddl[:-1]  # remove extra commas
+        tables.append(table_ddl + "\n);")
+    return "\n\n".join(tables)
+
+
+def write_ddl_store(json_path: str, bases: Dict[str, Dict[str, Any]], questions: List[Dict[str, Any]]) -> str:
+    """
+    写入去重后的 DDL 产物：<name>.base.json 保存按内容寻址的数据库模板，
+    <name>.jsonl 按问题序号保存 {"db_id", "base", "values"}，values 只含该问题检索到的相关取值。
+    bases 为 {db_id: 模板}，questions 中每项为 {"db_id": ..., "values": {...}}。
+    """
+    db_keys = {db_id: base_key(base) for db_id, base in bases.items()}
+    templates = {db_keys[db_id]: base for db_id, base in bases.items()}
+    overlays = [
+        {"db_id": question["db_id"], "base": db_keys[question["db_id"]], "values": question["values"]}
+        for question in questions
+    ]
+
+    base_path = ddl_base_path(json_path)
+    os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+    with open(base_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(templates, f, ensure_ascii=False)
+    os.replace(base_path + ".tmp", base_path)
+    logging.info(f"✅ {len(overlays)} 个问题共用 {len(templates)} 个 DDL 模板，写入 {base_path}。")
+    return write_schema_store(json_path, overlays)
+
+
+class DDLSchemaStore(object):
+    """
+    按问题序号惰性还原的 DDL 产物：store[i] 在访问时由模板与该问题的取值覆盖层重建完整 DDL 字符串，
+    与原先 JSON 数组中的第 i 项相同。模板常驻内存，覆盖层通过 SchemaStore 按需读取。
+    """
+
+    def __init__(self, json_path: str):
+        with open(ddl_base_path(json_path), "r", encoding="utf-8") as f:
+            self.bases: Dict[str, Dict[str, Any]] = json.load(f)
+        self.overlays = SchemaStore(schema_store_path(json_path))
+
+    def __len__(self) -> int:
+        return len(self.overlays)
+
+    def __getitem__(self, index: int) -> str:
+        overlay = self.overlays[index]
+        return render_ddl(self.bases[overlay["base"]], overlay["values"])
+
+    def db_id(self, index: int) -> str:
+        return self.overlays[index]["db_id"]
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+    def close(self) -> None:
+        self.overlays.close()
+
+    def __enter__(self) -> "DDLSchemaStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，退化为单进程写入
+    fcntl = None
+
+
+@contextmanager
+def file_lock(f, exclusive: bool = True):
+    """对已打开的文件加 flock，多个进程写同一文件时互斥"""
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _repair_tail(f) -> None:
+    """截掉崩溃时写了一半、没有换行结尾的末行；调用方需持有排他锁"""
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return
+    position = size
+    block = 65536
+    while position > 0:
+        start = max(0, position - block)
+        f.seek(start)
+        chunk = f.read(position - start)
+        newline = chunk.rfind(b"\n")
+        if newline >= 0:
+            end = start + newline + 1
+            break
+        position = start
+    else:
+        end = 0
+    if end != size:
+        f.truncate(end)
+        logging.info(f"截断 {f.name} 末尾不完整的记录 ({size - end} 字节)")
+
+
+class JsonlAppender(object):
+    """
+    只追加的 JSONL 记录写入器：每条记录一行，追加的代价与已有记录数无关。
+    每次写入在 flock 排他锁内以一次 write 完成，多个进程可同时追加同一文件；
+    每 fsync_every 条或间隔 fsync_interval 秒 fsync 一次，close 时 fsync 剩余记录。
+    打开时会截掉上次崩溃留下的不完整末行。
+    """
+
+    def __init__(self, path: str, fsync_every: int = 64, fsync_interval: float = 1.0, ensure_ascii: bool = False):
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.ensure_ascii = ensure_ascii
+        self.file = open(path, "a+b")
+        with file_lock(self.file):
+            _repair_tail(self.file)
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def append(self, record: Any) -> None:
+        self.extend([record])
+
+    def extend(self, records: Iterable[Any]) -> None:
+        data = b"".join(
+            json.dumps(record, ensure_ascii=self.ensure_ascii).encode("utf-8") + b"\n" for record in records
+        )
+        if not data:
+            return
+        with file_lock(self.file):
+            # 追加模式下 write 总是写到文件末尾，锁保证多进程的记录不会交错
+            self.file.write(data)
+            self.file.flush()
+        self.pending += data.count(b"\n")
+        if self.pending >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        if self.pending:
+            self.sync()
+        self.file.close()
+
+    def __enter__(self) -> "JsonlAppender":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """
+    逐行流式读取 JSONL 记录，不把整个文件载入内存。
+    文件不存在时不产生记录；没有换行结尾且无法解析的末行视为写入中断，忽略。
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith(b"\n"):
+                    raise
+                logging.info(f"忽略 {path} 末尾不完整的记录")
+
+
+def _write_json_atomic(path: str, write) -> None:
+    """写入临时文件、fsync 后改名，崩溃时原文件保持完整"""
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_json_atomic(data: Any, path: str, indent: Optional[int] = 2, ensure_ascii: bool = False) -> None:
+    _write_json_atomic(path, lambda f: json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii))
+
+
+def compact_jsonl(
+        jsonl_path: str, json_path: str, indent: Optional[int] = 2, ensure_ascii: bool = False, remove: bool = True
+) -> int:
+    """
+    将 JSONL 记录整理为旧版的 JSON 数组文件（与 json.dump(records, indent=indent) 的输出相同），
+    逐条流式写入临时文件后原子改名。整理期间持有排他锁，remove=True 时随后清空 JSONL。返回记录数。
+    """
+    count = 0
+    with open(jsonl_path, "a+b") as lock_file, file_lock(lock_file):
+        def write(f):
+            nonlocal count
+            if indent is None:
+                separator, newline, element_indent = ", ", "", ""
+            else:
+                separator, newline, element_indent = ",", "\n", " " * indent
+            for record in iter_jsonl(jsonl_path):
+                text = json.dumps(record, indent=indent, ensure_ascii=ensure_ascii)
+                f.write(("[" if count == 0 else separator) + newline + element_indent)
+                f.write(text.replace("\n", "\n" + element_indent) if indent is not None else text)
+                count += 1
+            f.write("[]" if count == 0 else newline + "]")
+
+        _write_json_atomic(json_path, write)
+        if remove:
+            lock_file.truncate(0)
+    logging.info(f"✅ {jsonl_path} 中的 {count} 条记录已整理到 {json_path}。")
+    return count
@@ -1,27 +1,372 @@
-from typing import Dict
+import datetime
+import math
+import re
+from decimal import Decimal
+from itertools import zip_longest
+from typing import Any, Dict, List, Sequence
+
+try:
+    import wcwidth  # tabulate 在安装了 wcwidth 时按显示宽度计算 CJK 字符
+except ImportError:
+    wcwidth = None
+
+# 以下规则与 tabulate 0.9 的 pipe 格式一致，保证输出与 DataFrame.to_markdown(index=False) 逐字节相同
+_MIN_PADDING = 2
+_FLOAT_FORMAT = "g"
+_INT_FORMAT = ""
+_MISSING_VALUE = ""
+
+_multiline_codes = re.compile(r"\r|\n|\r\n")
+_esc = r"\x1b"
+_csi = rf"{_esc}\["
+_osc = rf"{_esc}\]"
+_st = rf"{_esc}\\"
+_ansi_codes = re.compile(
+    rf"""
+    (
+        {_csi}
+        [\x30-\x3f]*
+        [\x20-\x2f]*
+        [\x40-\x7e]
+    |
+        {_osc}8;
+        (\w+=\w+:?)*
+        ;
+        ([^{_esc}]+)
+        {_st}
+        ([^{_esc}]+)
+        {_osc}8;;{_st}
+    )
+    """,
+    re.VERBOSE,
+)
+_ansi_codes_bytes = re.compile(_ansi_codes.pattern.encode("utf8"), re.VERBOSE)
+_float_with_thousands_separators = re.compile(
+    r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$"
+)
+
+# pandas 推断列类型时原样保留为 object 的值类型；其他类型（datetime、numpy 标量等）交给 pandas 处理
+_OBJECT_TYPES = (str, bytes, Decimal, list, tuple, dict, set, datetime.date, datetime.time)
+_INT64_MIN, _INT64_MAX, _UINT64_MAX = -(2 ** 63), 2 ** 63 - 1, 2 ** 64 - 1
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _column_dtype(values: Sequence[Any]) -> str:
+    """按 pandas 由 list 构造 DataFrame 时的规则推断列类型：int64 / uint64 / float64 / bool / object"""
+    kinds = set()
+    has_none = False
+    for value in values:
+        value_type = type(value)
+        if value is None:
+            has_none = True
+        elif value_type in (bool, int, float):
+            kinds.add(value_type)
+        elif isinstance(value, _OBJECT_TYPES) and not isinstance(value, datetime.datetime):
+            kinds.add(object)
+        else:
+            raise _Unsupported(value_type)
+    if not kinds or object in kinds:
+        return "object"
+    if kinds == {bool}:
+        return "object" if has_none else "bool"
+    if bool in kinds:
+        return "object"
+    ints = [value for value in values if type(value) is int]
+    if any(value < _INT64_MIN or value > _UINT64_MAX for value in ints):
+        if kinds == {int} and not has_none:
+            return "object"
+        raise _Unsupported(int)
+    if kinds == {int} and not has_none:
+        if all(value <= _INT64_MAX for value in ints):
+            return "int64"
+        if all(value >= 0 for value in ints):
+            return "uint64"
+        return "object"
+    if any(value > _INT64_MAX for value in ints):
+        raise _Unsupported(int)
+    return "float64"
+
+
+def _frame_rows(data: Dict[Any, Sequence[Any]]) -> List[List[Any]]:
+    """
+    DataFrame.values 的行，数值转换为 tabulate 看到的 Python 值：
+    所有列同为数值类型或公共类型为 float64 时得到 numpy 标量，tabulate 一律按 float 处理；
+    否则为 object 数组，float64 列中的缺失值为 nan，其余值保持原样。
+    """
+    columns = [list(values) for values in data.values()]
+    if len({len(values) for values in columns}) > 1:
+        raise ValueError("All arrays must be of the same length")
+    dtypes = [_column_dtype(values) for values in columns]
+    numeric = {"int64", "uint64", "float64"}
+    if len(set(dtypes)) == 1 and dtypes[0] != "object" or dtypes and set(dtypes) <= numeric:
+        columns = [[math.nan if value is None else float(value) for value in values] for values in columns]
+    else:
+        columns = [
+            [math.nan if value is None else float(value) for value in values] if dtype == "float64" else values
+            for values, dtype in zip(columns, dtypes)
+        ]
+    return [list(row) for row in zip(*columns)]
+
+
+def _strip_ansi(s):
+    if isinstance(s, str):
+        return _ansi_codes.sub(r"\4", s)
+    return _ansi_codes_bytes.sub(r"\4", s)
+
+
+def _isconvertible(conv, string) -> bool:
+    try:
+        conv(string)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _isnumber(string) -> bool:
+    if not _isconvertible(float, string):
+        return False
+    elif isinstance(string, (str, bytes)) and (math.isinf(float(string)) or math.isnan(float(string))):
+        return string.lower() in ["inf", "-inf", "nan"]
+    return True
+
+
+def _isint(string) -> bool:
+    return type(string) is int or isinstance(string, (bytes, str)) and _isconvertible(int, string)
+
+
+def _isbool(string) -> bool:
+    return type(string) is bool or (isinstance(string, (bytes, str)) and string in ("True", "False"))
+
+
+# 与逐项判断结果相同的快速路径：容器在 float() 时抛出 TypeError，按 str 处理
+_EXACT_TYPES = {type(None): type(None), bool: bool, int: int, float: float, list: str, tuple: str, dict: str, set: str}
+
+
+def _type(string, has_invisible: bool):
+    exact_type = _EXACT_TYPES.get(type(string))
+    if exact_type is not None:
+        return exact_type
+    if has_invisible and isinstance(string, (str, bytes)):
+        string = _strip_ansi(string)
+    if string is None:
+        return type(None)
+    elif hasattr(string, "isoformat"):
+        return str
+    elif _isbool(string):
+        return bool
+    elif _isint(string):
+        return int
+    elif _isnumber(string):
+        return float
+    elif isinstance(string, bytes):
+        return bytes
+    return str
+
+
+_TYPE_ORDER = {type(None): 0, bool: 1, int: 2, float: 3, bytes: 4, str: 5}
+_ORDERED_TYPES = {order: value_type for value_type, order in _TYPE_ORDER.items()}
+
+
+def _more_generic(type1, type2):
+    return _ORDERED_TYPES[max(_TYPE_ORDER.get(type1, 5), _TYPE_ORDER.get(type2, 5))]
+
+
+def _column_type(values, has_invisible: bool):
+    column_type = bool
+    for value in values:
+        column_type = _more_generic(column_type, _type(value, has_invisible))
+        if column_type is str:
+            break
+    return column_type
+
+
+def _format(val, valtype, has_invisible: bool) -> str:
+    if val is None:
+        return _MISSING_VALUE
+    if valtype is str:
+        return f"{val}"
+    elif valtype is int:
+        return format(val, _INT_FORMAT)
+    elif valtype is bytes:
+        try:
+            return str(val, "ascii")
+        except (TypeError, UnicodeDecodeError):
+            return str(val)
+    elif valtype is float:
+        if has_invisible and isinstance(val, (str, bytes)):
+            raw_val = _strip_ansi(val)
+            return val.replace(raw_val, format(float(raw_val), _FLOAT_FORMAT))
+        return format(float(val), _FLOAT_FORMAT)
+    return f"{val}"
+
+
+def _afterpoint(string: str) -> int:
+    if _isnumber(string) or bool(re.match(_float_with_thousands_separators, string)):
+        if _isint(string):
+            return -1
+        pos = string.rfind(".")
+        pos = string.lower().rfind("e") if pos < 0 else pos
+        return len(string) - pos - 1 if pos >= 0 else -1
+    return -1
+
+
+def _visible_width(s) -> int:
+    len_fn = wcwidth.wcswidth if wcwidth is not None else len
+    if isinstance(s, (str, bytes)):
+        return len_fn(_strip_ansi(s))
+    return len_fn(str(s))
+
+
+def _line_width_fn(has_invisible: bool):
+    if has_invisible:
+        return _visible_width
+    if wcwidth is not None:
+        return wcwidth.wcswidth
+    return len
+
+
+def _align_column(strings: List[str], alignment: str, minwidth: int, has_invisible: bool, is_multiline: bool):
+    if alignment == "decimal":
+        decimals = [_afterpoint(_strip_ansi(s) if has_invisible else s) for s in strings]
+        maxdecimals = max(decimals)
+        strings = [s + (maxdecimals - decs) * " " for s, decs in zip(strings, decimals)]
+        padfn = "{0:>%ds}"
+    else:
+        strings = [s.strip() for s in strings]
+        padfn = "{0:<%ds}"
+
+    line_width_fn = _line_width_fn(has_invisible)
+    plain = wcwidth is None and not has_invisible
+    if is_multiline:
+        s_widths = [list(map(line_width_fn, re.split("[\r\n]", s))) for s in strings]
+        maxwidth = max(max(width for widths in s_widths for width in widths), minwidth)
+        if plain:
+            return ["\n".join([(padfn % maxwidth).format(s) for s in ms.splitlines()]) for ms in strings]
+        s_lens = [[len(s) for s in re.split("[\r\n]", ms)] for ms in strings]
+        visible_widths = [[maxwidth - (w - n) for w, n in zip(mw, ml)] for mw, ml in zip(s_widths, s_lens)]
+        return [
+            "\n".join([(padfn % w).format(s) for s, w in zip((ms.splitlines() or ms), mw)])
+            for ms, mw in zip(strings, visible_widths)
+        ]
+
+    s_widths = list(map(line_width_fn, strings))
+    maxwidth = max(max(s_widths), minwidth)
+    if plain:
+        return [(padfn % maxwidth).format(s) for s in strings]
+    visible_widths = [maxwidth - (w - len(s)) for w, s in zip(s_widths, strings)]
+    return [(padfn % w).format(s) for s, w in zip(strings, visible_widths)]
+
+
+def _align_header(header: str, alignment: str, width: int, visible_width: int, is_multiline: bool, width_fn) -> str:
+    if is_multiline:
+        return "\n".join(
+            _align_header(h, alignment, width, width_fn(h), False, width_fn) for h in re.split(_multiline_codes, header)
+        )
+    width += len(header) - visible_width
+    if alignment == "left":
+        return ("{0:<%ds}" % width).format(header)
+    return ("{0:>%ds}" % width).format(header)
+
+
+def _pipe_line(colwidths: List[int], colaligns: List[str]) -> str:
+    if not colaligns:
+        colaligns = [""] * len(colwidths)
+    segments = []
+    for align, width in zip(colaligns, colwidths):
+        if align == "decimal":
+            segments.append("-" * (width - 1) + ":")
+        elif align == "left":
+            segments.append(":" + "-" * (width - 1))
+        else:
+            segments.append("-" * width)
+    return "|" + "|".join(segments) + "|"
+
+
+def _to_str(s) -> str:
+    if isinstance(s, bytes):
+        return s.decode(encoding="utf8", errors="ignore")
+    return str(s)
+
+
+def _pipe_table(headers: List[str], rows: List[List[Any]]) -> str:
+    plain_text = "\t".join(
+        [_to_str(h) for h in headers] + [_to_str(cell) for row in rows for cell in row]
+    )
+    has_invisible = _ansi_codes.search(plain_text) is not None
+    is_multiline = bool(re.search(_multiline_codes, plain_text))
+    line_width_fn = _line_width_fn(has_invisible)
+    if is_multiline:
+        def width_fn(s):
+            return max(map(line_width_fn, re.split("[\r\n]", s)))
+    else:
+        width_fn = line_width_fn
+
+    cols = list(zip_longest(*rows))
+    coltypes = [_column_type(col, has_invisible) for col in cols]
+    cols = [[_format(v, ct, has_invisible) for v in col] for col, ct in zip(cols, coltypes)]
+    aligns = ["decimal" if ct in [int, float] else "left" for ct in coltypes]
+    minwidths = [width_fn(h) + _MIN_PADDING for h in headers] if headers else [0] * len(cols)
+    cols = [
+        _align_column(col, align, minwidth, has_invisible, is_multiline)
+        for col, align, minwidth in zip(cols, aligns, minwidths)
+    ]
+    if headers:
+        t_cols = cols or [[""]] * len(headers)
+        t_aligns = aligns or ["left"] * len(headers)
+        minwidths = [max(minwidth, max(width_fn(cell) for cell in col)) for minwidth, col in zip(minwidths, t_cols)]
+        headers = [
+            _align_header(h, align, minwidth, width_fn(h), is_multiline, width_fn)
+            for h, align, minwidth in zip(headers, t_aligns, minwidths)
+        ]
+    else:
+        minwidths = [max(width_fn(cell) for cell in col) for col in cols]
+    rows = list(zip(*cols))
+
+    padded_widths = [width + 2 for width in minwidths]
+    lines = []
+
+    def append_row(cells):
+        if not is_multiline:
+            lines.append(("|" + "|".join(" " + cell + " " for cell in cells) + "|").rstrip())
+            return
+        cells_lines = [cell.splitlines() for cell in cells]
+        nlines = max(map(len, cells_lines))
+        cells_lines = [
+            cell_lines + [" " * width] * (nlines - len(cell_lines))
+            for cell_lines, width in zip(cells_lines, minwidths)
+        ]
+        for i in range(nlines):
+            lines.append(("|" + "|".join(" " + cell_lines[i] + " " for cell_lines in cells_lines) + "|").rstrip())
+
+    if headers:
+        append_row(headers)
+        lines.append(_pipe_line(padded_widths, aligns))
+    for row in rows:
+        append_row(row)
+    if headers or rows:
+        return "\n".join(lines)
+    return ""
+
+
+def markdown_table(data: Dict[Any, Sequence[Any]]) -> str:
+    """
+    将 {列名: 值列表} 渲染为 markdown 表格，输出与 pd.DataFrame(data).to_markdown(index=False) 逐字节相同，
+    但不构造 DataFrame、不依赖 pandas 与 tabulate。
+    遇到 datetime、numpy 标量等 pandas 会做类型转换的值时，退回 pandas 实现以保证结果一致。
+    """
+    try:
+        rows = _frame_rows(data)
+    except _Unsupported:
+        import pandas as pd
+
+        return pd.DataFrame(data).to_markdown(index=False)
+    return _pipe_table([str(key) for key in data], rows)
 
 
 def dict_to_markdown(data: Dict) -> str:
     if not data:
         return ""
-
-    # 获取表头
-    headers = list(data.keys())
-
-    # 构建表头行
-    header_row = "| " + " | ".join(headers) + " |"
-    # 构建分隔行
-    separator = "| " + " | ".join(["---"] * len(headers)) + " |"
-
-    # 构建数据行
-    rows = []
-    for i in range(len(next(iter(data.values())))):
-        row = []
-        for key in headers:
-            value = data[key][i]
-            formatted_value = str(value)
-            row.append(formatted_value)
-        rows.append("| " + " | ".join(row) + " |")
-
-    # 组合所有行
-    return "\n".join([header_row, separator] + rows)
+    return markdown_table(data)
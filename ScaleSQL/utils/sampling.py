@@ -0,0 +1,42 @@
+import random
+from typing import Any, Iterable, List, Optional
+
+
+def reservoir_sample(values: Iterable[Any], k: int, rng: random.Random) -> List[Any]:
+    """
+    单次遍历的蓄水池抽样（Algorithm R），不排序、内存 O(k)。
+    结果按值在输入中出现的顺序返回，相同的输入与随机种子得到相同的结果。
+    """
+    reservoir = []
+    positions = []
+    for position, value in enumerate(values):
+        if position < k:
+            reservoir.append(value)
+            positions.append(position)
+            continue
+        slot = rng.randint(0, position)
+        if slot < k:
+            reservoir[slot] = value
+            positions[slot] = position
+    return [value for _, value in sorted(zip(positions, reservoir), key=lambda item: item[0])]
+
+
+def sample_distinct_values(
+        cursor, table_name: str, column_name: str, k: int = 3, seed: Optional[Any] = None, fetch_size: int = 10000
+) -> List[Any]:
+    """
+    从列的不同非空值中均匀抽取 k 个，替代 ORDER BY RANDOM() 对整列排序。
+    随机数生成器由 seed 与表名、列名共同决定，结果与处理顺序、并发方式无关，可复现。
+    """
+    rng = random.Random(f"{seed}|{table_name}|{column_name}")
+    cursor.execute(f"SELECT DISTINCT `{column_name}` FROM `{table_name}` WHERE `{column_name}` IS NOT NULL")
+
+    def iter_values():
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row[0]
+
+    return reservoir_sample(iter_values(), k, rng)
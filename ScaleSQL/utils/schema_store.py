@@ -0,0 +1,142 @@
+import json
+import logging
+import mmap
+import os
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from ScaleSQL.utils.utils import read_json
+
+STORE_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+STORE_VERSION = 1
+
+
+def schema_store_path(json_path: str) -> str:
+    """JSON 产物对应的索引 JSONL 路径，如 bird_test_light_schema.json -> bird_test_light_schema.jsonl"""
+    root, ext = os.path.splitext(json_path)
+    return json_path if ext == STORE_SUFFIX else root + STORE_SUFFIX
+
+
+def write_schema_store(json_path: str, records: Union[Dict[str, Any], List[Any]]) -> str:
+    """
+    将 schema 产物写为带偏移索引的 JSONL：每条记录一行，索引文件记录每行的起始偏移与键。
+    dict 按键（db_id）索引，list 按位置（问题序号）索引。先写临时文件再改名，读者不会看到写了一半的文件。
+    """
+    store_path = schema_store_path(json_path)
+    dir_path = os.path.dirname(store_path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+
+    keys = list(records.keys()) if isinstance(records, dict) else None
+    values = records.values() if isinstance(records, dict) else records
+    offsets = [0]
+    with open(store_path + ".tmp", "wb") as f:
+        for value in values:
+            f.write(json.dumps(value, ensure_ascii=False).encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+    index = {"version": STORE_VERSION, "keys": keys, "offsets": offsets}
+    with open(store_path + INDEX_SUFFIX + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(store_path + ".tmp", store_path)
+    os.replace(store_path + INDEX_SUFFIX + ".tmp", store_path + INDEX_SUFFIX)
+    logging.info(f"✅ 索引文件 {store_path} 已写入 {len(offsets) - 1} 条记录。")
+    return store_path
+
+
+class SchemaStore(object):
+    """
+    只读的 schema 产物：数据文件通过 mmap 映射，按 db_id 或问题序号取一条记录只解析这一行，
+    不需要 json.load 整个文件。按键构建的产物同时支持 store[db_id] 与 store[i]。
+    """
+
+    def __init__(self, store_path: str):
+        self.path = store_path
+        with open(store_path + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != STORE_VERSION:
+            raise ValueError(f"不支持的索引版本: {index.get('version')}")
+        self.offsets: List[int] = index["offsets"]
+        self.key_list: Optional[List[str]] = index["keys"]
+        self.key_positions = {key: i for i, key in enumerate(self.key_list)} if self.key_list is not None else None
+
+        self.file = open(store_path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size != self.offsets[-1]:
+            self.file.close()
+            raise ValueError(f"{store_path} 与索引不一致: 文件大小 {size}, 索引记录 {self.offsets[-1]}")
+        # 空文件无法 mmap
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _record(self, position: int) -> Any:
+        return json.loads(self.buffer[self.offsets[position]: self.offsets[position + 1]])
+
+    def __getitem__(self, key: Union[int, str]) -> Any:
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError(key)
+            return self._record(key)
+        if self.key_positions is None or key not in self.key_positions:
+            raise KeyError(key)
+        return self._record(self.key_positions[key])
+
+    def __contains__(self, key: Union[int, str]) -> bool:
+        if isinstance(key, int):
+            return -len(self) <= key < len(self)
+        return self.key_positions is not None and key in self.key_positions
+
+    def get(self, key: Union[int, str], default: Any = None) -> Any:
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def keys(self) -> List[str]:
+        return list(self.key_list) if self.key_list is not None else []
+
+    def __iter__(self) -> Iterator[Any]:
+        """与 read_json 的结果一致：按键构建时遍历键，否则遍历记录"""
+        if self.key_list is not None:
+            return iter(self.key_list)
+        return (self._record(i) for i in range(len(self)))
+
+    def items(self) -> Iterator:
+        return ((key, self._record(i)) for i, key in enumerate(self.keys()))
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self) -> "SchemaStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def load_schema_artifact(path: str) -> Union[SchemaStore, Dict[str, Any], List[Any]]:
+    """
+    读取 schema 产物：存在与之匹配且不旧于 JSON 的索引 JSONL 时返回 SchemaStore，否则退回 read_json 整体加载。
+    去重后的 DDL 产物（带 <name>.base.json）返回按问题序号惰性还原的 DDLSchemaStore。
+    各种结果都支持按 db_id（light schema）或问题序号（DDL schema）下标访问。
+    """
+    store_path = schema_store_path(path)
+    index_path = store_path + INDEX_SUFFIX
+    stale = os.path.exists(path) and path != store_path and os.path.exists(index_path) \
+        and os.path.getmtime(path) > os.path.getmtime(index_path)
+    if os.path.exists(store_path) and os.path.exists(index_path) and not stale:
+        # ddl_store 依赖本模块，在此延迟导入
+        from ScaleSQL.utils.ddl_store import DDLSchemaStore, ddl_base_path
+
+        try:
+            if os.path.exists(ddl_base_path(path)):
+                return DDLSchemaStore(path)
+            return SchemaStore(store_path)
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            logging.warning(f"索引文件 {store_path} 不可用，退回读取 JSON: {e}")
+    return read_json(path)
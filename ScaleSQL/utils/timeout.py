@@ -1,17 +1,301 @@
+import asyncio
 import concurrent.futures
 import functools
-from typing import Type, Union
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+# 所有超时任务共用的有界线程池，首次使用时创建；被超时任务占满后在线程总数上限内整体替换
+_DEFAULT_MAX_WORKERS = 32
+_pool_lock = threading.Lock()
+_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_max_workers = _DEFAULT_MAX_WORKERS
+# 线程总数上限：当前线程池的 worker 加上已替换线程池中仍在运行的泄漏任务
+_max_threads = _DEFAULT_MAX_WORKERS * 4
+# 当前线程池 / 已替换线程池中已超时但仍在运行的任务数
+_pool_leaked = 0
+_retired_leaked = 0
+# 等待结果时检查线程池是否已被替换的间隔（秒）
+_POLL_SEC = 0.1
+
+_stats_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "timed_out": 0,
+    "running_after_timeout": 0,
+}
+
+_local = threading.local()
+
+
+class CancelScope(object):
+    """
+    一次带超时调用的取消作用域。
+
+    超时时依次执行登记的取消钩子（例如 sqlite3.Connection.interrupt、关闭 HTTP 请求），
+    让仍在运行的任务尽快结束。每个钩子只执行一次，钩子中的异常会被记录并忽略。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hooks: List[Callable[[], Any]] = []
+        self.cancelled = False
+
+    def add_hook(self, hook: Callable[[], Any]) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._hooks.append(hook)
+                return
+        # 已经超时，立即执行
+        self._run_hook(hook)
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            hooks, self._hooks = self._hooks, []
+        for hook in hooks:
+            self._run_hook(hook)
+
+    @staticmethod
+    def _run_hook(hook: Callable[[], Any]) -> None:
+        try:
+            hook()
+        except Exception as e:
+            logging.warning(f"Cancel hook {hook} failed: {e}")
+
+
+def current_cancel_scope() -> Optional[CancelScope]:
+    """返回当前线程正在执行的超时任务的取消作用域，不在超时任务中时返回 None。"""
+    return getattr(_local, "scope", None)
+
+
+def register_cancel_hook(hook: Callable[[], Any]) -> None:
+    """
+    在超时任务内部登记取消钩子，不在超时任务中调用时不做任何事。
+
+    示例:
+        @timeout(5.0)
+        def run(conn, sql):
+            register_cancel_hook(conn.interrupt)
+            return conn.execute(sql).fetchall()
+    """
+    scope = current_cancel_scope()
+    if scope is not None:
+        scope.add_hook(hook)
+
+
+def configure_timeout_pool(max_workers: int, max_threads: Optional[int] = None) -> None:
+    """
+    设置共享线程池的大小与线程总数上限（默认为 4 倍线程池大小），需在第一次使用前调用，
+    之后调用仅对重新创建的线程池生效。
+    """
+    global _max_workers, _max_threads
+    _max_workers = max_workers
+    _max_threads = max(max_threads or max_workers * 4, max_workers)
+
+
+def _acquire_pool() -> Optional[concurrent.futures.ThreadPoolExecutor]:
+    """
+    返回用于提交任务的线程池。当前线程池的全部 worker 都被超时任务占用时换用新的线程池，
+    旧线程池中的线程在泄漏任务结束后退出；替换后线程总数会超过 _max_threads 时不再替换，返回 None。
+    """
+    global _pool, _pool_leaked, _retired_leaked
+    retired = None
+    with _pool_lock:
+        if _pool is not None and _pool_leaked >= _max_workers:
+            if _max_workers + _retired_leaked + _pool_leaked > _max_threads:
+                return None
+            retired, _pool = _pool, None
+            _retired_leaked += _pool_leaked
+            _pool_leaked = 0
+        if _pool is None:
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="timeout")
+        pool = _pool
+    if retired is not None:
+        logging.warning(f"All {_max_workers} timeout workers are occupied by timed-out tasks, replacing the pool.")
+        retired.shutdown(wait=False)
+    return pool
+
+
+def _release_leaked(pool: concurrent.futures.ThreadPoolExecutor) -> None:
+    global _pool_leaked, _retired_leaked
+    _incr("running_after_timeout", -1)
+    with _pool_lock:
+        if _pool is pool:
+            _pool_leaked -= 1
+        else:
+            _retired_leaked -= 1
+
+
+def get_timeout_stats() -> Dict[str, int]:
+    """
+    返回超时设施的统计信息，其中 running_after_timeout 为已超时但仍在运行（泄漏/卡住）的任务数。
+    """
+    with _stats_lock:
+        return dict(_stats, max_workers=_max_workers, max_threads=_max_threads)
+
+
+def _incr(key: str, value: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += value
+
+
+def _run_in_scope(scope: CancelScope, func: Callable, args, kwargs) -> Any:
+    _local.scope = scope
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _local.scope = None
+
+
+def _build_exception(
+        exception: Union[Type[Exception], Exception], func: Callable, timeout_sec: float
+) -> Exception:
+    if isinstance(exception, Exception):
+        return exception
+    return exception(f"'{func.__name__}' timed out after {timeout_sec} seconds")
+
+
+class _Call(object):
+    """一次提交到共享线程池的调用，期限从提交时开始计算"""
+
+    def __init__(
+            self,
+            func: Callable,
+            args: tuple,
+            kwargs: Dict[str, Any],
+            scope: CancelScope,
+            timeout_sec: float,
+            exception: Union[Type[Exception], Exception],
+    ):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.scope = scope
+        self.exception = exception
+        self.deadline = time.monotonic() + timeout_sec
+        self.submit()
+        _incr("submitted")
+
+    def submit(self) -> None:
+        pool = _acquire_pool()
+        if pool is None:
+            if isinstance(self.exception, Exception):
+                raise self.exception
+            raise self.exception(
+                f"'{self.func.__name__}' was not started: "
+                f"all {_max_threads} timeout threads are held by timed-out tasks"
+            )
+        self.pool = pool
+        self.future = pool.submit(_run_in_scope, self.scope, self.func, self.args, self.kwargs)
+        self.future.add_done_callback(lambda f: _incr("completed") if not f.cancelled() else None)
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def resubmit_if_stranded(self) -> None:
+        """仍在已被替换的线程池中排队时，改为提交到当前线程池"""
+        with _pool_lock:
+            stranded = self.pool is not _pool
+        if stranded and self.future.cancel():
+            self.submit()
+
+
+def _wait_done(call: _Call) -> bool:
+    """等待任务结束，到期仍未结束时返回 False；func 自身抛出的 TimeoutError 不会被当作超时"""
+    while True:
+        remaining = call.remaining()
+        if remaining <= 0:
+            return False
+        done, _ = concurrent.futures.wait([call.future], timeout=min(remaining, _POLL_SEC))
+        if done and not call.future.cancelled():
+            return True
+        call.resubmit_if_stranded()
+
+
+async def _async_wait_done(call: _Call) -> bool:
+    future, wrapped = None, None
+    while True:
+        remaining = call.remaining()
+        if remaining <= 0:
+            return False
+        if future is not call.future:
+            # 每个 future 只包装一次，避免轮询时不断登记回调
+            future, wrapped = call.future, asyncio.wrap_future(call.future)
+        await asyncio.wait([wrapped], timeout=min(remaining, _POLL_SEC))
+        if future.done() and not future.cancelled():
+            return True
+        call.resubmit_if_stranded()
+
+
+def _on_timeout(call: _Call) -> None:
+    global _pool_leaked, _retired_leaked
+    _incr("timed_out")
+    # 仍在排队的任务直接取消；已经在运行的线程无法被强制停止，记录为泄漏任务，结束时扣减
+    if not call.future.cancel():
+        _incr("running_after_timeout")
+        with _pool_lock:
+            saturated = False
+            if _pool is call.pool:
+                _pool_leaked += 1
+                saturated = _pool_leaked >= _max_workers
+            else:
+                _retired_leaked += 1
+        pool = call.pool
+        call.future.add_done_callback(lambda _: _release_leaked(pool))
+        if saturated:
+            # 立即换用新线程池，让仍在排队的调用不必等到下一次提交
+            _acquire_pool()
+    call.scope.cancel()
+
+
+def run_with_timeout(
+        func: Callable,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        timeout_sec: float = 60.0,
+        exception: Union[Type[Exception], Exception] = TimeoutError,
+        on_timeout: Optional[Callable[..., Any]] = None,
+) -> Any:
+    """
+    在共享线程池中执行 func，到达期限后立即在调用方抛出异常，不等待任务真正结束。
+    期限从提交时按调用方的挂钟时间计算，包含排队时间；到期时仍在排队的任务被取消，不再执行。
+    线程池的 worker 全部被超时任务占用且线程总数已达上限时，不再创建新线程，直接抛出 exception。
+
+    不支持嵌套：在带超时的任务内部再调用带超时的函数会在等待内层任务时占用一个 worker，
+    线程池繁忙时内层任务的排队时间同时计入内外两层的期限。
+
+    参数:
+        on_timeout: 超时时调用的取消钩子，参数与 func 相同
+    """
+    kwargs = kwargs or {}
+    scope = CancelScope()
+    if on_timeout is not None:
+        scope.add_hook(lambda: on_timeout(*args, **kwargs))
+
+    call = _Call(func, args, kwargs, scope, timeout_sec, exception)
+    if not _wait_done(call):
+        _on_timeout(call)
+        raise _build_exception(exception, func, timeout_sec)
+    return call.future.result()
 
 
 def timeout(
-    timeout_sec: float, exception: Union[Type[Exception], Exception] = TimeoutError
+    timeout_sec: float,
+    exception: Union[Type[Exception], Exception] = TimeoutError,
+    on_timeout: Optional[Callable[..., Any]] = None,
 ) -> callable:
     """
-    超时处理装饰器
+    超时处理装饰器，期限从提交时计算；不支持嵌套使用，见 run_with_timeout。
 
     参数:
         timeout_sec: 超时时间（秒）
         exception: 超时时抛出的异常类型或异常实例（默认TimeoutError）
+        on_timeout: 超时时调用的取消钩子，参数与被装饰函数相同（例如中断 SQLite 连接）
 
     返回:
         装饰器函数
@@ -20,24 +304,54 @@ def timeout(
         @timeout(5.0, exception=TimeoutError("操作超时"))
         def long_operation():
             time.sleep(10)
+
+        @timeout(5.0, on_timeout=lambda cursor, sql: cursor.connection.interrupt())
+        def execute(cursor, sql):
+            return cursor.execute(sql).fetchall()
     """
 
     def decorator(func: callable) -> callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> any:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(func, *args, **kwargs)
+            return run_with_timeout(func, args, kwargs, timeout_sec, exception, on_timeout)
+
+        return wrapper
+
+    return decorator
+
+
+def async_timeout(
+    timeout_sec: float,
+    exception: Union[Type[Exception], Exception] = TimeoutError,
+    on_timeout: Optional[Callable[..., Any]] = None,
+) -> callable:
+    """
+    timeout 的 asyncio 版本。
+
+    协程函数通过 asyncio.wait_for 取消；普通函数在共享线程池中运行，期限从提交时计算，
+    超时后协程立即返回，并执行取消钩子。
+    """
+
+    def decorator(func: callable) -> callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> any:
+            scope = CancelScope()
+            if on_timeout is not None:
+                scope.add_hook(lambda: on_timeout(*args, **kwargs))
+
+            if asyncio.iscoroutinefunction(func):
                 try:
-                    return future.result(timeout=timeout_sec)
-                except concurrent.futures.TimeoutError as exc:
-                    # 清理未完成的 future
-                    future.cancel()
-                    # 构造并抛出自定义异常
-                    if isinstance(exception, Exception):
-                        raise exception from exc
-                    raise exception(
-                        f"'{func.__name__}' timed out after {timeout_sec} seconds"
-                    ) from exc
+                    return await asyncio.wait_for(func(*args, **kwargs), timeout=timeout_sec)
+                except asyncio.TimeoutError as exc:
+                    _incr("timed_out")
+                    scope.cancel()
+                    raise _build_exception(exception, func, timeout_sec) from exc
+
+            call = _Call(func, args, kwargs, scope, timeout_sec, exception)
+            if not await _async_wait_done(call):
+                _on_timeout(call)
+                raise _build_exception(exception, func, timeout_sec)
+            return call.future.result()
 
         return wrapper
 
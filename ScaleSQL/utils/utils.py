@@ -3,15 +3,17 @@ import os
 
 import torch
 import logging
-from typing import List
-import pandas as pd
+from typing import Dict, List, Optional, Tuple
 import platform
 import sqlite3
 from functools import lru_cache
 
-from ScaleSQL.executions import QueryExecutionRequest
+from ScaleSQL.executions import QueryExecutionRequest, SQLValidator, get_schema_catalog
 from ScaleSQL.executions.sqlalchemy import SQLAlchemyExecutor
+from ScaleSQL.utils.auto_index import create_auto_indexes
+from ScaleSQL.utils.jsonl_store import file_lock, write_json_atomic
 from ScaleSQL.utils.logging import setup_logging
+from ScaleSQL.utils.markdown import markdown_table
 
 setup_logging()
 
@@ -21,9 +23,43 @@ worker_cache = {
 }
 
 
+@lru_cache(maxsize=8)
+def load_db_info(tables_json_path: str, db_id: str) -> Optional[Dict]:
+    """
+    Return the `tables.json` entry of `db_id`, or None if it is not listed.
+    """
+    for db_info in read_json(tables_json_path):
+        if db_info["db_id"] == db_id:
+            return db_info
+    return None
+
+
+def auto_index_connection(
+        conn: sqlite3.Connection,
+        db_path: str,
+        tables_json_path: Optional[str] = None,
+        filter_columns: Optional[Tuple[str, ...]] = None,
+) -> None:
+    """
+    Index the keys and filter columns of a private in-memory copy of `db_path`.
+    Primary and foreign keys come from `tables.json` when given, otherwise from the SQLite schema.
+    """
+    db_info = None
+    if tables_json_path:
+        db_id = os.path.splitext(os.path.basename(db_path))[0]
+        db_info = load_db_info(tables_json_path, db_id)
+    create_auto_indexes(conn, db_info=db_info, filter_columns=filter_columns)
+
+
 @lru_cache(maxsize=16)
-def get_worker_db_uri(db_path: str) -> str:
-    if db_path not in worker_cache["uris"]:
+def get_worker_db_uri(
+        db_path: str,
+        auto_index: bool = False,
+        tables_json_path: Optional[str] = None,
+        filter_columns: Optional[Tuple[str, ...]] = None,
+) -> str:
+    cache_key = (db_path, auto_index, tables_json_path, filter_columns)
+    if cache_key not in worker_cache["uris"]:
         source_db_uri = f'file:{db_path}?mode=ro'
         mem_db_uri = 'file::memory:'
 
@@ -33,9 +69,11 @@ def get_worker_db_uri(db_path: str) -> str:
 
             source_conn.backup(mem_conn)
             source_conn.close()
+            if auto_index:
+                auto_index_connection(mem_conn, db_path, tables_json_path, filter_columns)
 
-            worker_cache["uris"][db_path] = mem_db_uri
-            worker_cache["connections"][db_path] = mem_conn
+            worker_cache["uris"][cache_key] = mem_db_uri
+            worker_cache["connections"][cache_key] = mem_conn
 
             logging.info(f"[Worker PID: {os.getpid()}] Successfully loaded '{db_path}' into private memory.")
 
@@ -43,11 +81,37 @@ def get_worker_db_uri(db_path: str) -> str:
             logging.error(f"[Worker PID: {os.getpid()}] Failed to load DB {db_path}: {e}")
             return f'file:{db_path}?mode=ro'
 
-    return worker_cache["connections"][db_path]
+    return worker_cache["connections"][cache_key]
 
 
 @lru_cache(maxsize=16)
-def get_cursor_from_path(sqlite_path):
+def get_cursor_from_path(
+        sqlite_path,
+        auto_index: bool = False,
+        tables_json_path: Optional[str] = None,
+        filter_columns: Optional[Tuple[str, ...]] = None,
+):
+    """
+    Load a SQLite database into a private in-memory connection and return a cursor on it.
+
+    With `auto_index=True` the in-memory copy additionally gets indexes on its primary-key,
+    foreign-key and `filter_columns` ("table.column") columns, followed by ANALYZE.
+    The file on disk is never modified. The cursor is cached and shared by later callers,
+    so its connection must not be closed; use `open_cursor_from_path` for a private one.
+    """
+    return open_cursor_from_path(sqlite_path, auto_index, tables_json_path, filter_columns)
+
+
+def open_cursor_from_path(
+        sqlite_path,
+        auto_index: bool = False,
+        tables_json_path: Optional[str] = None,
+        filter_columns: Optional[Tuple[str, ...]] = None,
+):
+    """
+    Uncached variant of `get_cursor_from_path`: every call loads a new in-memory copy, which the
+    caller owns and closes with `cursor.connection.close()` once done.
+    """
     try:
         if not os.path.exists(sqlite_path):
             raise FileNotFoundError(f"SQLite database not found: {sqlite_path}")
@@ -62,6 +126,8 @@ def get_cursor_from_path(sqlite_path):
 
         disk_conn.backup(memory_conn)
         disk_conn.close()
+        if auto_index:
+            auto_index_connection(memory_conn, sqlite_path, tables_json_path, filter_columns)
 
         cursor = memory_conn.cursor()
         logging.info("Database successfully loaded into memory.")
@@ -92,30 +158,23 @@ def read_json(filename: str):
 
 
 def save_or_append_json(data, filename, overwrite=False, indent=2, ensure_ascii=False):
+    """
+    写入 JSON 文件：覆盖写入与追加都先写临时文件再原子改名，崩溃不会留下损坏的文件；
+    追加时持有 <filename>.lock 上的排他锁，多个进程不会互相覆盖。
+    追加仍需读出并重写整个文件，逐条追加大量记录请使用 JsonlAppender，最后用 compact_jsonl 整理为 JSON。
+    """
     try:
-        # 1. 路径不存在时自动创建
-        dir_path = os.path.dirname(filename)
-        if dir_path and not os.path.exists(dir_path):
-            os.makedirs(dir_path, exist_ok=True)
-
-        # 2. 文件不存在，直接写入新文件
-        if not os.path.exists(filename):
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
-            logging.info(f"✅ 文件 {filename} 已创建并写入数据。")
-            return
-
-        # 3. 文件存在且需要覆盖
-        if overwrite:
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
-            logging.info(f"✅ 文件 {filename} 已被覆盖。")
+        # 1. 文件不存在或需要覆盖，直接写入
+        if overwrite or not os.path.exists(filename):
+            existed = os.path.exists(filename)
+            write_json_atomic(data, filename, indent=indent, ensure_ascii=ensure_ascii)
+            logging.info(f"✅ 文件 {filename} 已被覆盖。" if existed else f"✅ 文件 {filename} 已创建并写入数据。")
             return
 
-        # 4. 文件存在且不允许覆盖，追加到已有内容后面，保证为list
-        with open(filename, "r+", encoding="utf-8") as f:
+        # 2. 文件存在且不允许覆盖，追加到已有内容后面，保证为list
+        with open(filename + ".lock", "a") as lock_file, file_lock(lock_file):
             try:
-                existing_data = json.load(f)
+                existing_data = read_json(filename)
             except Exception as e:
                 raise RuntimeError(f"读取原文件 {filename} 失败: {e}")
 
@@ -129,9 +188,7 @@ def save_or_append_json(data, filename, overwrite=False, indent=2, ensure_ascii=
             else:
                 existing_data.append(data)
 
-            f.seek(0)
-            json.dump(existing_data, f, indent=indent, ensure_ascii=ensure_ascii)
-            f.truncate()
+            write_json_atomic(existing_data, filename, indent=indent, ensure_ascii=ensure_ascii)
         logging.info(f"✅ 数据已追加到文件 {filename}。")
     except Exception as e:
         logging.info(f"❌ 写入 JSON 文件 {filename} 失败: {e}")
@@ -172,16 +229,39 @@ def display_execution_result(results):
 
     for column, values in results.items():
         pd_data[column] = values[:5]
-    column_information = pd.DataFrame(pd_data)
-    return column_information.to_markdown(index=False)
+    return markdown_table(pd_data)
+
+
+def filter_valid_candidates(sql_candidates, db_path, db, catalog=None):
+    """
+    Statically validate the candidates against the schema catalog of `db` and
+    return the (index, sql) pairs that can possibly execute.
+    """
+    if catalog is None:
+        catalog = get_schema_catalog(db, db_path=db_path)
+    validator = SQLValidator(catalog)
+
+    valid_candidates = []
+    for i, sql in enumerate(sql_candidates):
+        validation = validator.validate(sql)
+        if not validation.valid:
+            logging.info(f"Drop candidate {i} of {db}: {validation.error_type} {validation.error_message}")
+            continue
+        valid_candidates.append((i, sql))
+    return valid_candidates
 
 
-def display_for_selection(sql_candidates, db_path, db):
+def display_for_selection(sql_candidates, db_path, db, validate=True, catalog=None):
     db_path = db_path.format(db=db)
     db_executor = SQLAlchemyExecutor(connection_string=f"sqlite:///{db_path}")
 
+    if validate:
+        candidates = filter_valid_candidates(sql_candidates, db_path, db, catalog)
+    else:
+        candidates = list(enumerate(sql_candidates))
+
     result = ""
-    for i, sql in enumerate(sql_candidates):
+    for i, sql in candidates:
         execution_response = db_executor.execute_query(QueryExecutionRequest(query=sql))
         if execution_response.results is not None:
             result += f"Candidate {i}:\n{sql}\nFive rows from the database execution results: \n{display_execution_result(execution_response.results)}\n\n"
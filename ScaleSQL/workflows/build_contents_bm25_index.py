@@ -4,16 +4,17 @@ import argparse
 import os, shutil
 import sqlite3
 import yaml
-from func_timeout import func_set_timeout, FunctionTimedOut
 from pathlib import Path
-from ScaleSQL.utils import setup_logging
+from ScaleSQL.utils import setup_logging, timeout
+from ScaleSQL.utils.column_policy import ColumnPolicy
 from ScaleSQL.utils.utils import get_cursor_from_path
 
 setup_logging()
 
 
 # execute predicted sql with a long time limitation (for buiding content index)
-@func_set_timeout(3600)
+# the sqlite query is interrupted on timeout instead of running on in the background
+@timeout(3600, on_timeout=lambda cursor, sql: cursor.connection.interrupt())
 def execute_sql(cursor, sql):
     cursor.execute(sql)
 
@@ -43,7 +44,8 @@ def is_number(s):
         return False
 
 
-def build_content_index(db_file_path, index_path):
+def build_content_index(db_file_path, index_path, column_policy=None):
+    db_id = os.path.splitext(os.path.basename(db_file_path))[0]
     cursor = get_cursor_from_path(db_file_path)
 
     results = execute_sql(cursor, "SELECT name FROM sqlite_master WHERE type='table';")
@@ -61,6 +63,11 @@ def build_content_index(db_file_path, index_path):
                 logging.info(f"SELECT DISTINCT `{column_name}` FROM `{table_name}` WHERE `{column_name}` IS NOT NULL;")
                 results = execute_sql(cursor,
                                       f"SELECT DISTINCT `{column_name}` FROM `{table_name}` WHERE `{column_name}` IS NOT NULL;")
+                # 高基数的自由文本列对字面值匹配帮助不大，按策略跳过；直接使用这次扫描读到的不同值
+                if column_policy is not None and not column_policy.should_index(
+                        cursor, table_name, column_name, [result[0] for result in results], db_id
+                ):
+                    continue
                 column_contents = [result[0] for result in results if
                                    isinstance(result[0], str) and not is_number(result[0])]
 
@@ -129,6 +136,7 @@ if __name__ == "__main__":
         db_path = dataset_info[dataset_name]["db_path"]
         index_path_prefix = dataset_info[dataset_name]["index_path_prefix"]
         remove_contents_of_a_folder(index_path_prefix)
+        column_policy = ColumnPolicy.from_config(configs.get("column_policy"))
         # build content index
         db_ids = os.listdir(db_path)
         # db_ids = ["the_table's_domain_appears_to_be_related_to_demographic_and_employment_data"]
@@ -138,7 +146,15 @@ if __name__ == "__main__":
                 logging.info(f"The file '{db_file_path}' exists.")
                 build_content_index(
                     db_file_path,
-                    os.path.join(index_path_prefix, db_id)
+                    os.path.join(index_path_prefix, db_id),
+                    column_policy=column_policy,
                 )
             else:
                 logging.info(f"The file '{db_file_path}' does not exist.")
+        if column_policy is not None:
+            column_policy.write_report(
+                os.path.join(
+                    configs["column_policy"].get("report_dir", "./ScaleSQL/reports"),
+                    "column_policy_bm25_{}.json".format(configs["evaluation_type"]),
+                )
+            )
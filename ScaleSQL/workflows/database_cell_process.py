@@ -1,12 +1,28 @@
 import argparse
+import json
 import logging
 import os
-from uuid import uuid4
-from ScaleSQL.utils.utils import get_default_device, get_cursor_from_path
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from ScaleSQL.retrievers.base import cell_document_id
+from ScaleSQL.retrievers.embedding import SharedEmbeddingFunction, get_embedding_model
+from ScaleSQL.retrievers.embedding_cache import embed_with_cache, open_embedding_cache
+from ScaleSQL.retrievers.numpy_store import export_chroma_collection
+from ScaleSQL.retrievers.registry import get_chroma_registry
+from ScaleSQL.retrievers.search_plan import (
+    choose_hnsw_params,
+    choose_search_plan,
+    hnsw_configuration,
+    load_search_plans,
+    save_search_plans,
+)
+from ScaleSQL.utils.utils import get_default_device, open_cursor_from_path
 from ScaleSQL.utils import setup_logging
-import chromadb
+from ScaleSQL.utils.column_policy import ColumnPolicy
 import yaml
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
 from sentence_transformers import SentenceTransformer
 
 setup_logging()
@@ -22,6 +38,14 @@ class ChromaWriter:
             batch_size=1000,
             max_str_len=256,
             embedding_model="all-MiniLM-L6-v2",
+            precision="fp32",
+            embedding_cache_dir=None,
+            single_collection_name=None,
+            column_policy=None,
+            exact_search_threshold=None,
+            numpy_store_path=None,
+            quantization="float16",
+            hnsw=None,
     ):
         self.database_folder = database_folder
         self.dataset_cell_chroma_path = dataset_cell_chroma_path
@@ -41,6 +65,23 @@ class ChromaWriter:
         self.device = device
         self.batch_size = batch_size
         self.max_str_len = max_str_len
+        # 所有集合共用同一个模型实例
+        self.embedding_model = get_embedding_model(
+            self.embedding_model_path, device=device, precision=precision
+        )
+        self.embedding_function = SharedEmbeddingFunction(self.embedding_model)
+        # 相同的值在不同列/数据库之间只编码一次
+        self.embedding_cache = open_embedding_cache(embedding_cache_dir, self.embedding_model)
+        # 设置后所有数据库写入同一个集合，通过元数据 db_id 过滤
+        self.single_collection_name = single_collection_name
+        # 按列基数（不同值个数/占比）筛选的策略，为空时只按列名关键字筛选
+        self.column_policy = column_policy
+        # 设置后按集合大小选择检索方式：小于阈值的集合导出为精确检索的 numpy 平铺索引，其余使用调优后的 HNSW
+        self.exact_search_threshold = exact_search_threshold
+        self.numpy_store_path = numpy_store_path or dataset_cell_chroma_path.rstrip("/") + "_numpy"
+        self.quantization = quantization
+        self.hnsw = hnsw
+        self.search_plans = load_search_plans(dataset_cell_chroma_path)
         self.skip_keywords = [
             "_id",
             " id",
@@ -52,121 +93,459 @@ class ChromaWriter:
             "address",
         ]
 
-    def process_single_db(self, collection_name):
-        client = chromadb.PersistentClient(path=self.dataset_cell_chroma_path)
-        embedding_function = SentenceTransformerEmbeddingFunction(
-            model_name=self.embedding_model_path,
-            device=self.device,
+    def iter_table_values(self, db_path, db_id):
+        """逐表读取数据库中需要索引的字符串值，产出 (table_name, values, metadatas)"""
+        # 私有连接：get_cursor_from_path 的游标被缓存共享，关闭后其他调用方会拿到已关闭的连接
+        cursor = open_cursor_from_path(db_path)
+        try:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            tables = cursor.fetchall()
+            for table in tables:
+                values, metadatas = [], []
+                table_name = table[0]
+                cursor.execute(f"PRAGMA table_info(`{table_name}`);")
+                columns = cursor.fetchall()
+                primary_keys = [col[1].lower() for col in columns if col[5] > 0]
+                string_columns = [
+                    col[1]
+                    for col in columns
+                    if "text" in col[2].lower()
+                ]
+
+                for col_name in string_columns:
+                    col_lower = col_name.lower()
+                    if (
+                            col_lower in primary_keys
+                            or any(keyword in col_lower for keyword in self.skip_keywords)
+                            or col_lower.endswith("id")
+                    ):
+                        logging.info(
+                            f"Skipping column {col_name} in table {table_name} due to filter."
+                        )
+                        continue
+                    query = f"SELECT DISTINCT `{col_name}` FROM `{table_name}` WHERE `{col_name}` IS NOT NULL"
+
+                    cursor.execute(query)
+                    rows = cursor.fetchall()
+                    # 基数策略直接使用这次扫描读到的不同值
+                    if self.column_policy is not None and not self.column_policy.should_index(
+                            cursor, table_name, col_name, [row[0] for row in rows], db_id
+                    ):
+                        continue
+
+                    filtered_values = [
+                        row[0]
+                        for row in rows
+                        if isinstance(row[0], str) and len(row[0]) <= self.max_str_len
+                    ]
+
+                    metadatas.extend(
+                        {"table": table_name, "column": col_name, "db_id": db_id}
+                        for _ in range(len(filtered_values))
+                    )
+                    values.extend(filtered_values)
+                yield table_name, values, metadatas
+        finally:
+            cursor.connection.close()
+
+    def get_db_path(self, collection_name):
+        return f"{self.database_folder}/{collection_name}/{collection_name}.sqlite"
+
+    def get_collection_name(self, db_id):
+        return self.single_collection_name or db_id
+
+    def get_target_collections(self, collections):
+        return [self.single_collection_name] if self.single_collection_name else collections
+
+    def get_existing_ids(self, collection, db_id, page_size=10000):
+        """读取集合中属于该数据库的全部文档 ID"""
+        where = {"db_id": db_id} if self.single_collection_name else None
+        existing_ids, offset = set(), 0
+        while True:
+            page = collection.get(where=where, include=[], limit=page_size, offset=offset)
+            existing_ids.update(page["ids"])
+            if len(page["ids"]) < page_size:
+                return existing_ids
+            offset += page_size
+
+    def delete_ids(self, collection, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), self.batch_size):
+            collection.delete(ids=ids[i: i + self.batch_size])
+
+    def collect_db_values(self, db_path, db_id):
+        """
+        读取数据库中需要索引的字符串值并按值去重：出现在多个列中的相同字符串只保留一条文档，
+        全部 (table, column) 位置以 JSON 字符串记录在元数据 locations 中，table/column 为第一个位置。
+        检索时由 CellValueStore 展开为逐列结果，对 table/column 的过滤在展开后进行，k 仍按 (列, 值) 计数。
+        """
+        locations = {}
+        for table_name, values, metadatas in self.iter_table_values(db_path, db_id):
+            for value, metadata in zip(values, metadatas):
+                locations.setdefault(value, []).append([metadata["table"], metadata["column"]])
+        values = list(locations)
+        metadatas = [
+            {
+                "table": locations[value][0][0],
+                "column": locations[value][0][1],
+                "db_id": db_id,
+                "locations": json.dumps(locations[value], ensure_ascii=False),
+            }
+            for value in values
+        ]
+        return values, metadatas
+
+    def diff_db_values(self, db_path, db_id, existing_ids):
+        """
+        返回 (values, metadatas, ids, seen_ids)：values 等只包含集合中尚不存在的值，
+        seen_ids 为数据库当前所有值的 ID，用于计算需要删除的旧值。
+        """
+        values, metadatas = self.collect_db_values(db_path, db_id)
+        ids = [
+            cell_document_id(db_id, value, metadata["locations"])
+            for value, metadata in zip(values, metadatas)
+        ]
+        new_rows = [i for i, doc_id in enumerate(ids) if doc_id not in existing_ids]
+        return (
+            [values[i] for i in new_rows],
+            [metadatas[i] for i in new_rows],
+            [ids[i] for i in new_rows],
+            set(ids),
         )
+
+    def process_single_db(self, collection_name):
+        client = get_chroma_registry().get_client(self.dataset_cell_chroma_path)
         # 只 get 已存在的 collection，不再 create
         collection = client.get_collection(
-            name=collection_name, embedding_function=embedding_function
+            name=self.get_collection_name(collection_name), embedding_function=self.embedding_function
         )
-        db_path = f"{self.database_folder}/{collection_name}/{collection_name}.sqlite"
+        db_path = self.get_db_path(collection_name)
         logging.info(f"Processing {db_path}")
 
-        cursor = get_cursor_from_path(db_path)
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        num_cells = 0
-        for table in tables:
-            values, metadatas, ids = [], [], []
-            table_name = table[0]
-            cursor.execute(f"PRAGMA table_info(`{table_name}`);")
-            columns = cursor.fetchall()
-            primary_keys = [col[1].lower() for col in columns if col[5] > 0]
-            string_columns = [
-                col[1]
-                for col in columns
-                if "text" in col[2].lower()
-            ]
-
-            for col_name in string_columns:
-                col_lower = col_name.lower()
-                if (
-                        col_lower in primary_keys
-                        or any(keyword in col_lower for keyword in self.skip_keywords)
-                        or col_lower.endswith("id")
-                ):
-                    logging.info(
-                        f"Skipping column {col_name} in table {table_name} due to filter."
-                    )
-                    continue
-                query = f"SELECT DISTINCT `{col_name}` FROM `{table_name}` WHERE `{col_name}` IS NOT NULL"
-
-                cursor.execute(query)
-                rows = cursor.fetchall()
+        # ID 由 (db, value, locations) 决定，只写入新增的值并删除已不存在的值
+        existing_ids = self.get_existing_ids(collection, collection_name)
+        values, metadatas, ids, seen_ids = self.diff_db_values(db_path, collection_name, existing_ids)
+        total_batches = (
+            (len(values) + self.batch_size - 1) // self.batch_size if values else 0
+        )
+        for i in range(0, len(values), self.batch_size):
+            batch_values = values[i: i + self.batch_size]
+            batch_metadatas = metadatas[i: i + self.batch_size]
+            batch_ids = ids[i: i + self.batch_size]
+            embeddings = embed_with_cache(
+                self.embedding_model, self.embedding_cache, batch_values
+            )
+            collection.upsert(
+                documents=list(batch_values),
+                embeddings=embeddings,
+                metadatas=list(batch_metadatas),
+                ids=list(batch_ids),
+            )
+            logging.info(
+                f"[{collection_name}] Batch {i // self.batch_size + 1}/{total_batches} 已写入 {min(i + self.batch_size, len(values))}/{len(values)}"
+            )
+        num_cells = len(values)
+        removed_ids = existing_ids - seen_ids
+        self.delete_ids(collection, removed_ids)
+        logging.info(
+            f"[Success] 集合 '{collection_name}' 新增 {num_cells} 条、删除 {len(removed_ids)} 条、"
+            f"保留 {len(existing_ids & seen_ids)} 条字符串值。"
+        )
 
-                filtered_values = [
-                    row[0]
-                    for row in rows
-                    if isinstance(row[0], str) and len(row[0]) <= self.max_str_len
-                ]
+    def collection_kwargs(self, collection_name):
+        """创建集合时的参数；HNSW 的 M 与 ef_construction 只能在创建时设置，按上次构建记录的向量数选择"""
+        kwargs = {"name": collection_name, "embedding_function": self.embedding_function}
+        if self.exact_search_threshold is not None:
+            count = self.search_plans.get(collection_name, {}).get("count", 0)
+            kwargs["configuration"] = hnsw_configuration(choose_hnsw_params(count, self.hnsw))
+        return kwargs
 
-                metadatas.extend(
-                    {"table": table_name, "column": col_name}
-                    for _ in range(len(filtered_values))
-                )
-                values.extend(filtered_values)
-                for i in range(len(filtered_values)):
-                    ids.append(str(uuid4()))
-            total_batches = (
-                (len(values) + self.batch_size - 1) // self.batch_size if values else 0
-            )
-            for i in range(0, len(values), self.batch_size):
-                batch_values = values[i: i + self.batch_size]
-                batch_metadatas = metadatas[i: i + self.batch_size]
-                batch_ids = ids[i: i + self.batch_size]
-                if batch_values:
-                    collection.add(
-                        documents=list(batch_values),
-                        metadatas=list(batch_metadatas),
-                        ids=list(batch_ids),
-                    )
-                    logging.info(
-                        f"[{collection_name}] Table: {table_name} | Batch {i // self.batch_size + 1}/{total_batches} 已写入 {min(i + self.batch_size, len(values))}/{len(values)}"
-                    )
-            num_cells += len(values)
-        logging.info(f"[Success] 共写入 {num_cells} 条字符串值到 ChromaDB 集合 '{collection_name}' 中。")
-        # conn.close()
+    def ensure_collections(self, client, collections):
+        for collection_name in collections:
+            client.get_or_create_collection(**self.collection_kwargs(collection_name))
 
-    def process_db(self, collections):
-        client = chromadb.PersistentClient(path=self.dataset_cell_chroma_path)
+    def recreate_collections(self, client, collections):
         exist_collections = [col.name for col in client.list_collections()]
-
-        # 1. 先顺序创建所有 collection
         for collection_name in collections:
             if collection_name in exist_collections:
                 try:
                     client.delete_collection(collection_name)
+                    # 同一进程中检索时缓存的旧集合句柄随之失效
+                    get_chroma_registry().invalidate(self.dataset_cell_chroma_path, collection_name)
                     logging.info(f"Deleted existing collection: {collection_name}")
                 except Exception as e:
                     logging.warning(f"Delete collection error: {e}")
 
-            embedding_function = SentenceTransformerEmbeddingFunction(
-                model_name=self.embedding_model_path,
-                device=self.device,
-            )
             try:
-                client.create_collection(
-                    name=collection_name, embedding_function=embedding_function
-                )
+                client.create_collection(**self.collection_kwargs(collection_name))
                 logging.info(f"Created collection: {collection_name}")
             except Exception as e:
                 logging.warning(f"Create collection error: {e}")
 
+    def log_cache_stats(self):
+        if self.embedding_cache is not None:
+            logging.info(
+                f"Embedding cache {self.embedding_cache.path}: {len(self.embedding_cache)} vectors, "
+                f"hit rate {self.embedding_cache.hit_rate():.2%}"
+            )
+
+    def prepare_collections(self, client, collections, rebuild):
+        if rebuild:
+            self.recreate_collections(client, self.get_target_collections(collections))
+        else:
+            self.ensure_collections(client, self.get_target_collections(collections))
+
+    def plan_search(self, client, collections):
+        """
+        按写入后的集合大小选择检索方式并记录到 search_plan.json：
+        小于 exact_search_threshold 的集合导出为 numpy 平铺索引做精确检索，其余集合设置调优后的 ef_search。
+        """
+        if self.exact_search_threshold is None:
+            return
+        plans = {}
+        for collection_name in self.get_target_collections(collections):
+            try:
+                collection = client.get_collection(name=collection_name, embedding_function=self.embedding_function)
+                plan = choose_search_plan(collection.count(), self.exact_search_threshold, self.hnsw)
+                if plan["backend"] == "numpy":
+                    export_chroma_collection(
+                        collection,
+                        os.path.join(self.numpy_store_path, collection_name),
+                        self.quantization,
+                        self.embedding_model.model_id,
+                    )
+                    plan["numpy_path"] = self.numpy_store_path
+                else:
+                    collection.modify(configuration={"hnsw": {"ef_search": plan["hnsw"]["ef_search"]}})
+                    built = (collection.configuration or {}).get("hnsw") or {}
+                    if built.get("max_neighbors", plan["hnsw"]["M"]) != plan["hnsw"]["M"]:
+                        logging.info(
+                            f"集合 '{collection_name}' 的 HNSW 以 M={built['max_neighbors']} 构建，"
+                            f"建议 M={plan['hnsw']['M']}，使用 --rebuild 后生效。"
+                        )
+                    plan["hnsw"]["M"] = built.get("max_neighbors", plan["hnsw"]["M"])
+                    plan["hnsw"]["ef_construction"] = built.get("ef_construction", plan["hnsw"]["ef_construction"])
+                plans[collection_name] = plan
+                logging.info(f"[Search plan] 集合 '{collection_name}': {plan}")
+            except Exception as e:
+                logging.error(f"[Error] 集合 '{collection_name}' 选择检索方式失败，错误信息：{e}", exc_info=True)
+        save_search_plans(self.dataset_cell_chroma_path, plans)
+        self.search_plans.update(plans)
+
+    def process_db(self, collections, rebuild=False):
+        client = get_chroma_registry().get_client(self.dataset_cell_chroma_path)
+
+        # 1. 先创建所有 collection；rebuild 时删除重建，否则增量更新
+        self.prepare_collections(client, collections, rebuild)
+
         # 2. 顺序处理每一个数据库
         logging.info("Starting to process databases sequentially...")
+        succeeded = []
         for collection_name in collections:
             try:
                 self.process_single_db(collection_name)
+                succeeded.append(collection_name)
                 logging.info(f"[Success] 集合 '{collection_name}' 处理成功。")
             except Exception as e:
                 # 记录详细的 traceback 信息会更有帮助
                 logging.error(f"[Error] 集合 '{collection_name}' 处理失败，错误信息：{e}", exc_info=True)
+        self.log_cache_stats()
+        self.plan_search(client, succeeded)
+
+    def process_db_pipelined(
+            self, collections, num_readers=4, encode_batch_size=4096, queue_size=16, rebuild=False
+    ):
+        """
+        流水线方式写入：读取线程并发读取多个数据库 -> 编码线程跨表/跨库组成大批次编码 -> 写入线程按集合写入预计算向量。
+        各阶段之间使用有界队列形成背压，结束时输出各阶段的吞吐（行/秒）。
+        """
+        client = get_chroma_registry().get_client(self.dataset_cell_chroma_path)
+        self.prepare_collections(client, collections, rebuild)
+        removed = {}
+
+        read_queue = queue.Queue(maxsize=queue_size)
+        write_queue = queue.Queue(maxsize=queue_size)
+        stats = {name: _StageStats(name) for name in ("read", "encode", "write")}
+        written = Counter()
+        failed = set()
+
+        def read(collection_name):
+            db_path = self.get_db_path(collection_name)
+            logging.info(f"Processing {db_path}")
+            try:
+                busy_start = time.perf_counter()
+                collection = client.get_collection(
+                    name=self.get_collection_name(collection_name), embedding_function=self.embedding_function
+                )
+                existing_ids = self.get_existing_ids(collection, collection_name)
+                values, metadatas, ids, seen_ids = self.diff_db_values(db_path, collection_name, existing_ids)
+                for i in range(0, len(values), self.batch_size):
+                    batch_values = values[i: i + self.batch_size]
+                    stats["read"].add(len(batch_values), time.perf_counter() - busy_start)
+                    # 队列满时阻塞，避免读取远快于编码时占满内存
+                    read_queue.put(
+                        (
+                            collection_name,
+                            batch_values,
+                            metadatas[i: i + self.batch_size],
+                            ids[i: i + self.batch_size],
+                        )
+                    )
+                    busy_start = time.perf_counter()
+                removed[collection_name] = existing_ids - seen_ids
+            except Exception as e:
+                failed.add(collection_name)
+                logging.error(f"[Error] 集合 '{collection_name}' 读取失败，错误信息：{e}", exc_info=True)
+
+        def encode():
+            pending, pending_rows = [], 0
+
+            def flush():
+                texts = [value for _, batch_values, _, _ in pending for value in batch_values]
+                busy_start = time.perf_counter()
+                try:
+                    embeddings = embed_with_cache(self.embedding_model, self.embedding_cache, texts)
+                except Exception as e:
+                    failed.update(item[0] for item in pending)
+                    logging.error(f"[Error] 编码 {len(texts)} 条字符串值失败，错误信息：{e}", exc_info=True)
+                    return
+                stats["encode"].add(len(texts), time.perf_counter() - busy_start)
+                offset = 0
+                for collection_name, batch_values, batch_metadatas, batch_ids in pending:
+                    write_queue.put(
+                        (
+                            collection_name,
+                            batch_values,
+                            embeddings[offset: offset + len(batch_values)],
+                            batch_metadatas,
+                            batch_ids,
+                        )
+                    )
+                    offset += len(batch_values)
+
+            while True:
+                item = read_queue.get()
+                if item is None:
+                    break
+                pending.append(item)
+                pending_rows += len(item[1])
+                if pending_rows >= encode_batch_size:
+                    flush()
+                    pending, pending_rows = [], 0
+            if pending:
+                flush()
+            write_queue.put(None)
+
+        def write():
+            opened = {}
+            last_report = time.perf_counter()
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    break
+                collection_name, batch_values, embeddings, batch_metadatas, batch_ids = item
+                busy_start = time.perf_counter()
+                try:
+                    target_name = self.get_collection_name(collection_name)
+                    if target_name not in opened:
+                        opened[target_name] = client.get_collection(
+                            name=target_name, embedding_function=self.embedding_function
+                        )
+                    opened[target_name].upsert(
+                        documents=list(batch_values),
+                        embeddings=embeddings,
+                        metadatas=list(batch_metadatas),
+                        ids=list(batch_ids),
+                    )
+                except Exception as e:
+                    failed.add(collection_name)
+                    logging.error(f"[Error] 集合 '{collection_name}' 写入失败，错误信息：{e}", exc_info=True)
+                    continue
+                written[collection_name] += len(batch_values)
+                stats["write"].add(len(batch_values), time.perf_counter() - busy_start)
+                if time.perf_counter() - last_report > 30:
+                    logging.info(_format_stage_stats(stats, time.perf_counter() - start))
+                    last_report = time.perf_counter()
+
+        logging.info(f"Starting pipelined processing with {num_readers} reader threads...")
+        start = time.perf_counter()
+        encoder = threading.Thread(target=encode, name="cell-encoder", daemon=True)
+        writer = threading.Thread(target=write, name="cell-writer", daemon=True)
+        encoder.start()
+        writer.start()
+        with ThreadPoolExecutor(max_workers=num_readers, thread_name_prefix="cell-reader") as executor:
+            list(executor.map(read, collections))
+        read_queue.put(None)
+        encoder.join()
+        writer.join()
+
+        for collection_name in collections:
+            if collection_name in failed:
+                # 未完整写入的数据库不删除旧值，下次运行时重新比对
+                logging.error(f"[Error] 集合 '{collection_name}' 处理失败。")
+                continue
+            removed_ids = removed.get(collection_name, set())
+            try:
+                self.delete_ids(
+                    client.get_collection(
+                        name=self.get_collection_name(collection_name), embedding_function=self.embedding_function
+                    ),
+                    removed_ids,
+                )
+            except Exception as e:
+                logging.error(f"[Error] 集合 '{collection_name}' 删除旧值失败，错误信息：{e}", exc_info=True)
+                continue
+            logging.info(
+                f"[Success] 集合 '{collection_name}' 新增 {written[collection_name]} 条、删除 {len(removed_ids)} 条字符串值。"
+            )
+        logging.info(_format_stage_stats(stats, time.perf_counter() - start))
+        self.log_cache_stats()
+        self.plan_search(
+            client, [collection_name for collection_name in collections if collection_name not in failed]
+        )
+
+
+class _StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.busy_sec = 0.0
+        self.lock = threading.Lock()
 
+    def add(self, rows, busy_sec):
+        with self.lock:
+            self.rows += rows
+            self.busy_sec += busy_sec
 
-def ChromaWriteMain(database_folder, dataset_cell_chroma_path, embedding_model_path):
+
+def _format_stage_stats(stats, elapsed_sec):
+    parts = []
+    for stage in stats.values():
+        busy_rate = stage.rows / stage.busy_sec if stage.busy_sec > 0 else 0.0
+        parts.append(
+            f"{stage.name}: {stage.rows} rows, {stage.rows / max(elapsed_sec, 1e-9):.0f} rows/s "
+            f"({busy_rate:.0f} rows/s busy)"
+        )
+    return f"[Pipeline] {elapsed_sec:.1f}s | " + " | ".join(parts)
+
+
+def ChromaWriteMain(
+        database_folder,
+        dataset_cell_chroma_path,
+        embedding_model_path,
+        precision="fp32",
+        embedding_cache_dir=None,
+        pipelined=False,
+        num_readers=4,
+        single_collection_name=None,
+        rebuild=False,
+        column_policy=None,
+        column_policy_report_path=None,
+        exact_search_threshold=None,
+        numpy_store_path=None,
+        quantization="float16",
+        hnsw=None,
+):
     def return_dbs_in_dataset(db_file_folder):
         """返回数据集文件夹下所有数据库名"""
         return [
@@ -181,9 +560,22 @@ def ChromaWriteMain(database_folder, dataset_cell_chroma_path, embedding_model_p
         database_folder=database_folder,
         dataset_cell_chroma_path=dataset_cell_chroma_path,
         embedding_model_path=embedding_model_path,
-        device=get_default_device()
+        device=get_default_device(),
+        precision=precision,
+        embedding_cache_dir=embedding_cache_dir,
+        single_collection_name=single_collection_name,
+        column_policy=column_policy,
+        exact_search_threshold=exact_search_threshold,
+        numpy_store_path=numpy_store_path,
+        quantization=quantization,
+        hnsw=hnsw,
     )
-    chroma_writer.process_db(collections)
+    if pipelined:
+        chroma_writer.process_db_pipelined(collections, num_readers=num_readers, rebuild=rebuild)
+    else:
+        chroma_writer.process_db(collections, rebuild=rebuild)
+    if column_policy is not None and column_policy_report_path:
+        column_policy.write_report(column_policy_report_path)
 
 
 if __name__ == "__main__":
@@ -201,6 +593,21 @@ if __name__ == "__main__":
         type=str,
         default="ScaleSQL/workflows/config/pipeline_config.yaml"
     )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="overlap database reads, embedding and writes across databases"
+    )
+    parser.add_argument(
+        "--num_readers",
+        type=int,
+        default=4
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="drop and recreate the collections instead of updating them incrementally"
+    )
     args = parser.parse_args()
 
     with open(args.config_path, "r", encoding="utf-8") as f:
@@ -221,10 +628,30 @@ if __name__ == "__main__":
         base_path,
         "ScaleSQL/chroma/bird_{}".format(configs["evaluation_type"])
     )
-    embedding_model_path = "./ScaleSQL/model/all-MiniLM-L6-v2"
+    embedding_config = configs.get("embedding") or {}
+    embedding_model_path = embedding_config.get("model_path", "./ScaleSQL/model/all-MiniLM-L6-v2")
+    store_config = configs.get("vector_store") or {}
 
     ChromaWriteMain(
         database_folder=database_folder,
         dataset_cell_chroma_path=dataset_cell_chroma_path,
-        embedding_model_path=embedding_model_path
+        embedding_model_path=embedding_model_path,
+        precision=embedding_config.get("precision", "fp32"),
+        embedding_cache_dir=embedding_config.get("cache_dir"),
+        pipelined=configs["pipelined"],
+        num_readers=configs["num_readers"],
+        single_collection_name=store_config.get("single_collection"),
+        rebuild=configs["rebuild"],
+        column_policy=ColumnPolicy.from_config(configs.get("column_policy")),
+        column_policy_report_path=os.path.join(
+            (configs.get("column_policy") or {}).get("report_dir", "./ScaleSQL/reports"),
+            "column_policy_cell_{}.json".format(configs["evaluation_type"]),
+        ),
+        exact_search_threshold=store_config.get("exact_search_threshold"),
+        numpy_store_path=os.path.join(
+            store_config.get("numpy_path", "./ScaleSQL/numpy_store"),
+            os.path.basename(os.path.normpath(dataset_cell_chroma_path)),
+        ),
+        quantization=store_config.get("quantization", "float16"),
+        hnsw=store_config.get("hnsw"),
     )
@@ -13,6 +13,7 @@ from nltk import ngrams
 import ijson
 import yaml
 from ScaleSQL.utils import setup_logging
+from ScaleSQL.utils.ddl_store import render_ddl, write_ddl_store
 from ScaleSQL.utils.utils import get_cursor_from_path
 
 setup_logging()
@@ -220,8 +221,13 @@ def obtain_pk_fk_column_idx(db_info):
     return pk_fk_column_idx_list
 
 
-def obtain_db_details(db_info, sampled_db_values_dict, relavant_db_values_dict):
-    db_details = []
+def obtain_db_template(db_info, sampled_db_values_dict):
+    """
+    Build the question-independent DDL template of a database. Column lines keep their
+    sampled example values apart, so that `render_ddl` can merge in the values relevant to
+    each question and reproduce the full DDL text.
+    """
+    db_template = []
     assert len(db_info["column_names_original"]) == len(db_info["column_names"]) == len(db_info["column_types"])
 
     # put all tables and columns in the prompt
@@ -242,26 +248,22 @@ def obtain_db_details(db_info, sampled_db_values_dict, relavant_db_values_dict):
                 if column_idx not in used_column_idx_list:
                     continue
 
-                column_values = []
-                if f"{table_name}.{column_name}".lower() in relavant_db_values_dict:
-                    column_values.extend(relavant_db_values_dict[f"{table_name}.{column_name}".lower()])
-                if f"{table_name}.{column_name}".lower() in sampled_db_values_dict:
-                    column_values.extend(sampled_db_values_dict[f"{table_name}.{column_name}".lower()])
-                column_values = list(dict.fromkeys(column_values))  # dedup (reserve order)
-                column_values = column_values[:6]
+                # example values are rendered per question: relevant values first, then the sampled ones
+                column_key = f"{table_name}.{column_name}".lower()
+                sampled_values = [repr(value) for value in sampled_db_values_dict.get(column_key, [])]
 
                 if column_name.lower() in [column_comment.lower(), column_comment.lower().replace(" ", "_"),
                                            column_comment.lower().replace(" ", "")] \
                         or column_comment.strip() == "":
                     column_info = f'    {format_identifier(column_name)} {column_type},'
-                    if len(column_values) > 0:
-                        column_info += f" -- example: {column_values}"
+                    separator = " -- example: "
                 else:
                     column_info = f'    {format_identifier(column_name)} {column_type}, -- {column_comment}'
-                    if len(column_values) > 0:
-                        column_info += f", example: {column_values}"
+                    separator = ", example: "
 
-                column_info_list.append(column_info)
+                column_info_list.append(
+                    dict(key=column_key, text=column_info, sep=separator, values=sampled_values)
+                )
 
                 for primary_keys_idx in db_info["primary_keys"]:
                     if isinstance(primary_keys_idx, int):
@@ -291,25 +293,26 @@ def obtain_db_details(db_info, sampled_db_values_dict, relavant_db_values_dict):
                 pk_info = []
             fk_info = list(OrderedDict.fromkeys(fk_info))
 
-            table_ddl = ""
-            table_ddl += f'CREATE TABLE {format_identifier(table_name)} (\n'
-            table_ddl += "\n".join(column_info_list + pk_info + fk_info)
-            if table_ddl.endswith(","):
-                table_ddl = table_ddl[:-1]  # remove extra commas
-            table_ddl += "\n);"
-
-            db_details.append(table_ddl)
+            db_template.append(dict(
+                header=f'CREATE TABLE {format_identifier(table_name)} (\n',
+                lines=column_info_list + pk_info + fk_info,
+            ))
 
-    db_details = "\n\n".join(db_details)
+    db_template = dict(tables=db_template)
 
     # double check
+    db_details = render_ddl(db_template).lower()
     for column_idx, (_, column_name) in enumerate(db_info["column_names_original"]):
         if column_name == "*":
             continue
         if column_idx in used_column_idx_list:
-            assert column_name.lower() in db_details.lower()
+            assert column_name.lower() in db_details
+
+    return db_template
 
-    return db_details
+
+def obtain_db_details(db_info, sampled_db_values_dict, relavant_db_values_dict):
+    return render_ddl(obtain_db_template(db_info, sampled_db_values_dict), relavant_db_values_dict)
 
 
 def deduplicate_dicts(dict_list):
@@ -325,7 +328,11 @@ def deduplicate_dicts(dict_list):
     return unique_dicts
 
 
-def prepare_input_output_pairs(data, ek_key, db_id2relevant_hits, sampled_db_values_dict, db_info):
+def obtain_question_db_values(data, ek_key, db_id2relevant_hits):
+    """
+    Database values relevant to one question, {"table.column": [value, ...]}; this is all that
+    distinguishes its DDL from the template of its database.
+    """
     if data[ek_key].strip() == "":
         question = data["question"]
     else:
@@ -341,6 +348,12 @@ def prepare_input_output_pairs(data, ek_key, db_id2relevant_hits, sampled_db_val
         hits = deduplicate_dicts(hits)
         relavant_db_values_dict = retrieve_question_related_db_values(hits, question)
 
+    return relavant_db_values_dict
+
+
+def prepare_input_output_pairs(data, ek_key, db_id2relevant_hits, sampled_db_values_dict, db_info):
+    relavant_db_values_dict = obtain_question_db_values(data, ek_key, db_id2relevant_hits)
+
     db_details = obtain_db_details(
         db_info, sampled_db_values_dict, relavant_db_values_dict
     )
@@ -364,6 +377,11 @@ if __name__ == "__main__":
         default="ScaleSQL/workflows/config/pipeline_config.yaml",
         help="YAML 配置文件路径",
     )
+    parser.add_argument(
+        "--no_legacy_json",
+        action="store_true",
+        help="只写去重后的 DDL 产物，不再写出每个问题完整 DDL 的 JSON 数组（旧格式）",
+    )
     opt = parser.parse_args()
 
     with open(opt.config_path, "r", encoding="utf-8") as f:
@@ -397,6 +415,10 @@ if __name__ == "__main__":
         sampled_db_values_dict = sample_table_values(db_file, db_info["table_names_original"], opt.value_limit_num)
         db_id2sampled_db_values[db_id] = sampled_db_values_dict
         db_id2db_info[db_id] = db_info
+    # the DDL of all questions on a database only differs in the values relevant to each question
+    db_id2db_template = {
+        db_id: obtain_db_template(db_id2db_info[db_id], db_id2sampled_db_values[db_id]) for db_id in db_id2db_info
+    }
 
     batch_size = 20000
     sliced_datasets = [dataset[i: i + batch_size] for i in range(0, len(dataset), batch_size)]
@@ -437,14 +459,22 @@ if __name__ == "__main__":
             db_id2relevant_hits = None
 
         for data in tqdm(batch_dataset):
-            new_dataset.append(
-                prepare_input_output_pairs(data, ek_key, db_id2relevant_hits, db_id2sampled_db_values[data["db_id"]],
-                                           db_id2db_info[data["db_id"]])
-            )
+            new_dataset.append(dict(
+                db_id=data["db_id"],
+                values=obtain_question_db_values(data, ek_key, db_id2relevant_hits),
+            ))
         del db_id2searcher, db_id2relevant_hits,
 
     if not os.path.exists(dataset_schema_path):
         os.makedirs(os.path.dirname(dataset_schema_path), exist_ok=True)
 
-    with open(dataset_schema_path, "w", encoding="utf-8") as f:
-        f.write(json.dumps(new_dataset, indent=2, ensure_ascii=False))
+    # 旧格式 JSON 先于索引写出，索引不旧于 JSON，load_schema_artifact 才会使用索引
+    if not opt.no_legacy_json:
+        with open(dataset_schema_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(
+                [render_ddl(db_id2db_template[data["db_id"]], data["values"]) for data in new_dataset],
+                indent=2, ensure_ascii=False
+            ))
+
+    # 每个数据库一份模板 + 每个问题的相关取值，load_schema_artifact 按问题序号惰性还原完整 DDL
+    write_ddl_store(dataset_schema_path, db_id2db_template, new_dataset)
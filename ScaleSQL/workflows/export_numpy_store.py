@@ -0,0 +1,57 @@
+import argparse
+import logging
+import os
+
+import yaml
+
+from ScaleSQL.retrievers.embedding import DEFAULT_EMBEDDING_MODEL_PATH
+from ScaleSQL.retrievers.numpy_store import export_chroma_collection
+from ScaleSQL.retrievers.registry import get_chroma_registry
+from ScaleSQL.utils import setup_logging
+
+setup_logging()
+
+
+def export_collections(chroma_path, numpy_path, quantization="float16", model_id=None, collections=None):
+    """将 Chroma 持久化目录下的集合导出为 NumpyVectorStore 平铺索引"""
+    client = get_chroma_registry().get_client(chroma_path)
+    names = collections or [col.name for col in client.list_collections()]
+    os.makedirs(numpy_path, exist_ok=True)
+    for name in names:
+        try:
+            count = export_chroma_collection(
+                client.get_collection(name), os.path.join(numpy_path, name), quantization, model_id
+            )
+            logging.info(f"[Success] 集合 '{name}' 共导出 {count} 条向量。")
+        except Exception as e:
+            logging.error(f"[Error] 集合 '{name}' 导出失败，错误信息：{e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chroma_path", required=True, type=str)
+    parser.add_argument("--collections", nargs="*", default=None)
+    parser.add_argument(
+        "--config_path",
+        type=str,
+        default="ScaleSQL/workflows/config/pipeline_config.yaml"
+    )
+    args = parser.parse_args()
+
+    with open(args.config_path, "r", encoding="utf-8") as f:
+        configs = yaml.safe_load(f)
+    store_config = configs.get("vector_store") or {}
+    embedding_config = configs.get("embedding") or {}
+    model_path = embedding_config.get("model_path", DEFAULT_EMBEDDING_MODEL_PATH)
+
+    export_collections(
+        chroma_path=args.chroma_path,
+        numpy_path=os.path.join(
+            store_config.get("numpy_path", "./ScaleSQL/numpy_store"), os.path.basename(os.path.normpath(args.chroma_path))
+        ),
+        quantization=store_config.get("quantization", "float16"),
+        model_id="{}@{}".format(
+            os.path.basename(os.path.normpath(model_path)), embedding_config.get("precision", "fp32")
+        ),
+        collections=args.collections,
+    )
@@ -1,15 +1,22 @@
 import argparse
+import functools
+import os
 import yaml
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Dict
 
 from ScaleSQL.modules.light_schema import LightSchema
+from ScaleSQL.utils.sampling import sample_distinct_values
 from ScaleSQL.utils import (
     read_json,
     save_or_append_json,
     read_env,
     setup_logging,
-    get_cursor_from_path
+    open_cursor_from_path,
+    iter_jsonl,
+    write_schema_store,
+    JsonlAppender
 )
 
 setup_logging()
@@ -40,69 +47,56 @@ class SchemaGeneration:
         )
 
     @staticmethod
-    def light_schema_generation(schema_generation_configuration: Dict[str, Any]):
-        def get_random_rows(db_path, table_name, column_name):
-            query = f"SELECT DISTINCT `{column_name}` FROM `{table_name}` WHERE `{column_name}` IS NOT NULL ORDER BY RANDOM() LIMIT 3;"
-
-            cursor = get_cursor_from_path(db_path)
-            cursor.execute(query)
-            results = cursor.fetchall()
-            if len(cursor.description) == 1:
-                return [row[0] for row in results]
-            else:
-                return results
-
-        def get_format_column_meaning(column_meaning_path):
-            column_meaning_raw = read_json(column_meaning_path)
-            column_meaning = {}
-            for key, value in column_meaning_raw.items():
-                db_id, table_name, column_name = key.split('|')
-                if db_id not in column_meaning:
-                    column_meaning[db_id] = {}
-                if table_name not in column_meaning[db_id]:
-                    column_meaning[db_id][table_name] = {}
-                value = value.replace('#', '').replace('\n', ' ').strip()
-                column_meaning[db_id][table_name][column_name] = value
-            return column_meaning
+    def get_format_column_meaning(column_meaning_path):
+        column_meaning_raw = read_json(column_meaning_path)
+        column_meaning = {}
+        for key, value in column_meaning_raw.items():
+            db_id, table_name, column_name = key.split('|')
+            if db_id not in column_meaning:
+                column_meaning[db_id] = {}
+            if table_name not in column_meaning[db_id]:
+                column_meaning[db_id][table_name] = {}
+            value = value.replace('#', '').replace('\n', ' ').strip()
+            column_meaning[db_id][table_name][column_name] = value
+        return column_meaning
 
-        schema_meta_data_file_dir = schema_generation_configuration["schema_meta_data_file_dir"]
-        db_path_template = schema_generation_configuration["database_execution_path"]
-        column_meaning = get_format_column_meaning(schema_generation_configuration["column_meaning_path"])
-
-        metadata = read_json(schema_meta_data_file_dir)
-        logging.info(f"有 {len(metadata)} 个数据库的 schema需要产生")
-        schema_dict = {}
-        for data in metadata:
-            table_list = {}
-            db = data["db_id"]
-            table_names = data["table_names_original"]
-            for table in table_names:
-                table_list[table] = dict(
-                    table="",
-                    columns=[],
-                    primary_key=[],
-                    foreign_key=[],
-                )
-            column_names = data["column_names_original"]
-            column_types = data["column_types"]
-            primary_keys = data["primary_keys"]
-            primary_keys = [
-                item
-                for sublist in primary_keys
-                for item in (sublist if isinstance(sublist, list) else [sublist])
-            ]
-            foreign_keys = data["foreign_keys"]
+    @staticmethod
+    def db_schema_generation(data, db_path_template, column_meaning, seed=42):
+        """
+        产生单个数据库的 light schema，返回 (db_id, schema)。
+        数据库之间互不依赖，可在进程池中并行执行；样例值使用带种子的蓄水池抽样，结果可复现。
+        """
+        table_list = {}
+        db = data["db_id"]
+        table_names = data["table_names_original"]
+        for table in table_names:
+            table_list[table] = dict(
+                table="",
+                columns=[],
+                primary_key=[],
+                foreign_key=[],
+            )
+        column_names = data["column_names_original"]
+        column_types = data["column_types"]
+        primary_keys = data["primary_keys"]
+        primary_keys = [
+            item
+            for sublist in primary_keys
+            for item in (sublist if isinstance(sublist, list) else [sublist])
+        ]
+        foreign_keys = data["foreign_keys"]
 
+        # 每个数据库只加载一次；使用私有连接，用完关闭不影响 get_cursor_from_path 的缓存
+        cursor = open_cursor_from_path(db_path_template.format(db=db))
+        try:
             for [table_id, column_name], type in zip(
                     column_names, column_types
             ):
                 if table_id < 0:
                     continue
                 table_name = table_names[table_id]
-                samples = get_random_rows(
-                    db_path=db_path_template.format(db=db),
-                    table_name=table_name,
-                    column_name=column_name,
+                samples = sample_distinct_values(
+                    cursor, table_name, column_name, k=3, seed=f"{seed}|{db}"
                 )
                 processed_samples = []
                 for sample in samples:
@@ -119,36 +113,85 @@ class SchemaGeneration:
                 table_list[table_name]["columns"].append(
                     dict(name=column_name, type=type, description=column_desc, samples=samples)
                 )
+        finally:
+            cursor.connection.close()
 
-            for i in primary_keys:
-                table_id, column_name = column_names[i]
-                table_name = table_names[table_id]
-                table_list[table_name]["primary_key"].append(column_name)
-
-            for [column_id1, column_id2] in foreign_keys:
-                table_id1, column_name1 = column_names[column_id1]
-                table_id2, column_name2 = column_names[column_id2]
-                table1, table2 = table_names[table_id1], table_names[table_id2]
-                fk_desc = f"{table1}.{column_name1} = {table2}.{column_name2}"
-                table_list[table1]["foreign_key"].append(fk_desc)
-                table_list[table2]["foreign_key"].append(fk_desc)
-
-            schema = ""
-            for table, table_info in table_list.items():
-                schema += (
-                        LightSchema.create_schema(
-                            database=db,
-                            table=table,
-                            columns=table_info["columns"],
-                            primary_key=table_info["primary_key"],
-                            foreign_key=table_info["foreign_key"],
-                        ).replace("### Table description\n\n", "")
-                        + "\n"
-                )
+        for i in primary_keys:
+            table_id, column_name = column_names[i]
+            table_name = table_names[table_id]
+            table_list[table_name]["primary_key"].append(column_name)
+
+        for [column_id1, column_id2] in foreign_keys:
+            table_id1, column_name1 = column_names[column_id1]
+            table_id2, column_name2 = column_names[column_id2]
+            table1, table2 = table_names[table_id1], table_names[table_id2]
+            fk_desc = f"{table1}.{column_name1} = {table2}.{column_name2}"
+            table_list[table1]["foreign_key"].append(fk_desc)
+            table_list[table2]["foreign_key"].append(fk_desc)
+
+        schema = ""
+        for table, table_info in table_list.items():
+            schema += (
+                    LightSchema.create_schema(
+                        database=db,
+                        table=table,
+                        columns=table_info["columns"],
+                        primary_key=table_info["primary_key"],
+                        foreign_key=table_info["foreign_key"],
+                    ).replace("### Table description\n\n", "")
+                    + "\n"
+            )
+        return db, schema
+
+    @staticmethod
+    def read_partial_schemas(partial_path):
+        """读取上次未完成运行中已写入的数据库模式，文件末尾不完整的行会被忽略"""
+        return {item["db_id"]: item["schema"] for item in iter_jsonl(partial_path)}
 
-            schema_dict[db] = schema
-            logging.info(f"已经产生完成 {db} 的数据库的模式.")
+    @staticmethod
+    def light_schema_generation(
+            schema_generation_configuration: Dict[str, Any], workers: int = 1, seed: int = 42
+    ):
+        """
+        产生全部数据库的 light schema。workers > 1 时数据库分配到进程池并行处理，
+        结果按 tables.json 中的原始顺序合并；每完成一个数据库即追加到 <dataset_schema_path>.partial.jsonl，
+        中断后重新运行会跳过已完成的数据库。
+        """
+        schema_meta_data_file_dir = schema_generation_configuration["schema_meta_data_file_dir"]
+        db_path_template = schema_generation_configuration["database_execution_path"]
+        column_meaning = SchemaGeneration.get_format_column_meaning(
+            schema_generation_configuration["column_meaning_path"]
+        )
+
+        metadata = read_json(schema_meta_data_file_dir)
+        logging.info(f"有 {len(metadata)} 个数据库的 schema需要产生")
+        partial_path = schema_generation_configuration["dataset_schema_path"] + ".partial.jsonl"
+        completed = SchemaGeneration.read_partial_schemas(partial_path)
+        if completed:
+            logging.info(f"跳过上次已完成的 {len(completed)} 个数据库。")
+        pending = [data for data in metadata if data["db_id"] not in completed]
 
+        generate = functools.partial(
+            SchemaGeneration.db_schema_generation,
+            db_path_template=db_path_template,
+            column_meaning=column_meaning,
+            seed=seed,
+        )
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            # executor.map 按提交顺序返回结果
+            results = executor.map(generate, pending) if executor is not None else map(generate, pending)
+            # 打开时截掉中断时写了一半的末行，后续结果接着追加
+            with JsonlAppender(partial_path) as appender:
+                for db, schema in results:
+                    completed[db] = schema
+                    appender.append({"db_id": db, "schema": schema})
+                    logging.info(f"已经产生完成 {db} 的数据库的模式.")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        schema_dict = {data["db_id"]: completed[data["db_id"]] for data in metadata}
         logging.info(f"已经产生完成 {len(schema_dict)} 个数据库的模式.")
         logging.info(f"打印第一个模式:\n{next(iter(schema_dict.values()))}")
         return schema_dict
@@ -161,12 +204,18 @@ class SchemaGeneration:
         logging.info(f"schema_generation_configuration:\n {schema_generation_configuration}")
 
         light_schema = SchemaGeneration.light_schema_generation(
-            schema_generation_configuration
+            schema_generation_configuration,
+            workers=configs.get("workers", 1),
+            seed=configs.get("seed", 42),
         )
 
         save_or_append_json(
             data=light_schema, filename=schema_generation_configuration["dataset_schema_path"], overwrite=True
         )
+        # 按 db_id 随机读取的索引版本，load_schema_artifact 优先使用
+        write_schema_store(schema_generation_configuration["dataset_schema_path"], light_schema)
+        # 完整结果写入后删除增量文件
+        os.remove(schema_generation_configuration["dataset_schema_path"] + ".partial.jsonl")
 
 
 if __name__ == "__main__":
@@ -183,6 +232,18 @@ if __name__ == "__main__":
         type=str,
         default="ScaleSQL/workflows/config/pipeline_config.yaml"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes generating database schemas in parallel"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="seed of the column value samples"
+    )
     args = parser.parse_args()
 
     with open(args.config_path, "r", encoding="utf-8") as f:
@@ -0,0 +1,134 @@
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import yaml
+
+from ScaleSQL.retrievers.embedding import DEFAULT_EMBEDDING_MODEL_PATH, get_embedding_model
+from ScaleSQL.retrievers.exact_knn import l2_top_k
+from ScaleSQL.retrievers.registry import get_chroma_registry
+from ScaleSQL.utils import setup_logging
+from ScaleSQL.utils.utils import get_default_device
+
+setup_logging()
+
+
+def load_train_matrix(chroma_client_path, collection_name, page_size=10000):
+    """读取训练集 skeleton 集合中的全部 ID、向量与元数据"""
+    client = get_chroma_registry().get_client(chroma_client_path)
+    collection = client.get_collection(collection_name)
+    ids, embeddings, metadatas = [], [], []
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        metadatas.extend(page["metadatas"])
+    return ids, np.asarray(embeddings, dtype=np.float32), metadatas
+
+
+def build_skeleton_lookup(
+        skeletons,
+        train_ids,
+        train_embeddings,
+        train_metadatas,
+        embedding_model,
+        threshold=1.5,
+        k=15,
+        batch_size=1024,
+        collection_name=None,
+):
+    """
+    批量编码全部问题 skeleton，并与训练集向量矩阵做分块精确 top-k 检索。
+    与在线检索一致：先取 top-k，再保留距离小于 threshold 的结果。
+    """
+    skeletons = list(dict.fromkeys(skeleton for skeleton in skeletons if skeleton))
+    start = time.perf_counter()
+    query_embeddings = embedding_model.encode(skeletons, batch_size=batch_size)
+    logging.info(f"Embedded {len(skeletons)} skeletons in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    indices, distances = l2_top_k(query_embeddings, train_embeddings, k)
+    logging.info(f"Computed top-{k} neighbours in {time.perf_counter() - start:.2f}s")
+
+    neighbors, used = {}, set()
+    for skeleton, row_indices, row_distances in zip(skeletons, indices, distances):
+        hits = [
+            [train_ids[index], round(float(distance), 6)]
+            for index, distance in zip(row_indices, row_distances)
+            if distance < threshold
+        ]
+        used.update(train_id for train_id, _ in hits)
+        neighbors[skeleton] = hits
+
+    return {
+        "collection": collection_name,
+        "model_id": embedding_model.model_id,
+        "threshold": threshold,
+        "k": k,
+        "examples": {
+            train_id: metadata for train_id, metadata in zip(train_ids, train_metadatas) if train_id in used
+        },
+        "neighbors": neighbors,
+    }
+
+
+def read_skeletons(skeleton_file_path):
+    """读取问题 skeleton：字符串列表，或包含 question_skeleton 字段的对象列表"""
+    with open(skeleton_file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [item if isinstance(item, str) else item.get("question_skeleton", "") for item in data]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--skeleton_file",
+        required=True,
+        type=str,
+        help="JSON list of question skeletons, or of objects with a question_skeleton field"
+    )
+    parser.add_argument("--output_path", required=True, type=str)
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument(
+        "--config_path",
+        type=str,
+        default="ScaleSQL/workflows/config/pipeline_config.yaml"
+    )
+    args = parser.parse_args()
+
+    with open(args.config_path, "r", encoding="utf-8") as f:
+        configs = yaml.safe_load(f)
+    embedding_config = configs.get("embedding") or {}
+
+    if os.path.isdir("/tmp"):
+        base_path = "/tmp"
+    else:
+        base_path = "."
+    chroma_client_path = os.path.join(base_path, "ScaleSQL/chroma/bird_train_skeleton/")
+    collection_name = "bird_train_skeleton"
+
+    train_ids, train_embeddings, train_metadatas = load_train_matrix(chroma_client_path, collection_name)
+    embedding_model = get_embedding_model(
+        embedding_config.get("model_path", DEFAULT_EMBEDDING_MODEL_PATH),
+        device=get_default_device(),
+        precision=embedding_config.get("precision", "fp32"),
+    )
+    lookup = build_skeleton_lookup(
+        read_skeletons(args.skeleton_file),
+        train_ids,
+        train_embeddings,
+        train_metadatas,
+        embedding_model,
+        threshold=args.threshold,
+        k=args.k,
+        collection_name=collection_name,
+    )
+    with open(args.output_path, "w", encoding="utf-8") as f:
+        json.dump(lookup, f, ensure_ascii=False)
+    logging.info(
+        f"[Process] 共写入 {len(lookup['neighbors'])} 条 skeleton 的近邻结果到 {args.output_path}。"
+    )
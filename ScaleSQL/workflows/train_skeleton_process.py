@@ -1,11 +1,14 @@
 import os
 import argparse
-import json
 import logging
+import ijson
+from ScaleSQL.retrievers.base import document_id, pack_skeleton_examples
+from ScaleSQL.retrievers.embedding import SharedEmbeddingFunction, get_embedding_model
+from ScaleSQL.retrievers.embedding_cache import embed_with_cache, open_embedding_cache
+from ScaleSQL.retrievers.registry import get_chroma_registry
 from ScaleSQL.utils.utils import get_default_device
 from ScaleSQL.utils import setup_logging
-import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+import yaml
 
 setup_logging()
 
@@ -18,7 +21,9 @@ class TrainSkeletonWriter:
             collection_name,
             embedding_model_path,
             device="mps",
-            batch_size=1000
+            batch_size=1000,
+            precision="fp32",
+            embedding_cache_dir=None,
     ):
         self.skeleton_file_path = skeleton_file_path
         self.chroma_client_path = chroma_client_path
@@ -34,38 +39,59 @@ class TrainSkeletonWriter:
 
         self.device = device
         self.batch_size = batch_size
+        self.precision = precision
+        self.embedding_cache_dir = embedding_cache_dir
+
+    @staticmethod
+    def normalize_skeleton(skeleton):
+        # 向量模型不区分大小写，合并空白并转小写后相同的 skeleton 视为同一条
+        return " ".join(str(skeleton).split()).lower()
+
+    def group_examples(self):
+        """流式读取 skeleton 文件，按归一化后的 skeleton 分组"""
+        groups = {}
+        num_examples = 0
+        with open(self.skeleton_file_path, "rb") as f:
+            for idx, item in enumerate(ijson.items(f, "item", use_float=True)):
+                skeleton = self.normalize_skeleton(item["skeleton"])
+                groups.setdefault(skeleton, []).append(
+                    {
+                        "question": item.get("question", ""),
+                        "sql": item.get("sql", ""),
+                        "evidence": item.get("evidence", ""),
+                        "db": item.get("db", ""),
+                        "id": item.get("id", idx),
+                    }
+                )
+                num_examples += 1
+        return groups, num_examples
 
     def write(self):
-        # 读取 skeleton 文件
-        with open(self.skeleton_file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        groups, num_examples = self.group_examples()
+        logging.info(f"[Process] {num_examples} 条样例共 {len(groups)} 个不同的 skeleton。")
 
-        client = chromadb.PersistentClient(path=self.chroma_client_path)
+        client = get_chroma_registry().get_client(self.chroma_client_path)
         try:
             client.delete_collection(self.collection_name)
+            # 同一进程中检索时缓存的旧集合句柄随之失效
+            get_chroma_registry().invalidate(self.chroma_client_path, self.collection_name)
         except Exception as e:
             logging.warning(f"Delete collection error: {e}")
-        embedding_function = SentenceTransformerEmbeddingFunction(
-            model_name=self.embedding_model_path,
-            device=self.device,
+        embedding_model = get_embedding_model(
+            self.embedding_model_path, device=self.device, precision=self.precision
         )
+        embedding_function = SharedEmbeddingFunction(embedding_model)
+        embedding_cache = open_embedding_cache(self.embedding_cache_dir, embedding_model)
         collection = client.create_collection(
             name=self.collection_name, embedding_function=embedding_function
         )
 
-        docs, metadatas, ids = [], [], []
-        for idx, item in enumerate(data):
-            docs.append(item["skeleton"])
-            metadatas.append(
-                {
-                    "question": item.get("question", ""),
-                    "sql": item.get("sql", ""),
-                    "evidence": item.get("evidence", ""),
-                    "db": item.get("db", ""),
-                    "id": item.get("id", idx),
-                }
-            )
-            ids.append(f"id_{idx}")
+        # 每个 skeleton 只编码一次，同组样例紧凑地存放在元数据 examples 中
+        docs = list(groups)
+        metadatas = [
+            {"examples": pack_skeleton_examples(groups[doc]), "count": len(groups[doc])} for doc in docs
+        ]
+        ids = [document_id(doc) for doc in docs]
 
         # 分批写入
         for i in range(0, len(docs), self.batch_size):
@@ -74,15 +100,16 @@ class TrainSkeletonWriter:
             batch_ids = ids[i: i + self.batch_size]
             collection.add(
                 documents=batch_docs,
+                embeddings=embed_with_cache(embedding_model, embedding_cache, batch_docs),
                 metadatas=batch_metadatas,
                 ids=batch_ids,
             )
         logging.info(
-            f"[Process] 共写入 {len(docs)} 条 skeleton 到 ChromaDB 集合 '{self.collection_name}' 中。"
+            f"[Process] 共写入 {len(docs)} 条 skeleton（{num_examples} 条样例）到 ChromaDB 集合 '{self.collection_name}' 中。"
         )
 
 
-def main():
+def main(configs):
     skeleton_file_path = "./ScaleSQL/dataset/bird_train.json"
     if os.path.isdir("/tmp"):
         base_path = "/tmp"
@@ -93,17 +120,28 @@ def main():
         "ScaleSQL/chroma/bird_train_skeleton/"
     )
     collection_name = "bird_train_skeleton"
-    embedding_model_path = "./ScaleSQL/model/all-MiniLM-L6-v2"
+    embedding_config = configs.get("embedding") or {}
     writer = TrainSkeletonWriter(
         skeleton_file_path=skeleton_file_path,
         chroma_client_path=chroma_client_path,
         collection_name=collection_name,
-        embedding_model_path=embedding_model_path,
-        device=get_default_device()
+        embedding_model_path=embedding_config.get("model_path", "./ScaleSQL/model/all-MiniLM-L6-v2"),
+        device=get_default_device(),
+        precision=embedding_config.get("precision", "fp32"),
+        embedding_cache_dir=embedding_config.get("cache_dir"),
     )
     writer.write()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    main()
+    parser.add_argument(
+        "--config_path",
+        type=str,
+        default="ScaleSQL/workflows/config/pipeline_config.yaml"
+    )
+    args = parser.parse_args()
+
+    with open(args.config_path, "r", encoding="utf-8") as f:
+        configs = yaml.safe_load(f)
+    main(configs)